@@ -0,0 +1,184 @@
+import io
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+import urllib.request
+from pathlib import Path
+from contextlib import redirect_stdout
+
+from mock_provider import PROFILES
+from run_benchmarks import DEFAULT_PAIRS, API_TARGETS, load_sample, make_model
+
+MOCK_PROVIDER = Path(__file__).resolve().parent / "mock_provider.py"
+FAILOVER_PARTNER = {"gpt4o": "deepseek", "deepseek": "gpt4o"}
+
+
+def start_mock(profile: str, seed: int, overrides: dict) -> tuple:
+    """
+    Starts mock_provider.py in its own process (so its threads do not share our GIL)
+    and returns (process, base URL).
+    """
+    command = [sys.executable, str(MOCK_PROVIDER), "--profile", profile, "--port", "0", "--seed", str(seed)]
+    for key, value in overrides.items():
+        command += [f"--{key.replace('_', '-')}", str(value)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    return process, process.stdout.readline().strip()
+
+
+def mock_stats(url: str) -> dict:
+    with urllib.request.urlopen(f"{url}/mock/stats") as response:
+        return json.loads(response.read())
+
+
+async def run_report(model, text: str, stream: bool) -> dict:
+    start = time.perf_counter()
+    ttft = None
+    if stream:
+        outputs = {}
+        async for event in model.simplify_stream(text):
+            if ttft is None and event.get("delta"):
+                ttft = time.perf_counter() - start
+            if "text" in event:
+                outputs[event["stage"]] = event["text"]
+    elif hasattr(model, "simplify_async"):
+        outputs = await model.simplify_async(text)
+    else:
+        outputs = await asyncio.to_thread(model.simplify, text)
+    return {
+        "latency_s": time.perf_counter() - start,
+        "ttft_s": ttft,
+        "failed": any(value == "" for value in outputs.values()),
+    }
+
+
+async def run_load(model, texts: list, concurrency: int, stream: bool) -> tuple:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(text):
+        async with semaphore:
+            return await run_report(model, text, stream)
+
+    start = time.perf_counter()
+    reports = await asyncio.gather(*(bounded(text) for text in texts))
+    return reports, time.perf_counter() - start
+
+
+def summarize(reports: list, wall: float, records: list) -> dict:
+    """
+    Report-level latency / throughput / failure rate plus per-stage call latency, errors and retries.
+    """
+    from call_metrics import percentile
+    latencies = [r["latency_s"] for r in reports]
+    ttfts = [r["ttft_s"] for r in reports if r["ttft_s"] is not None]
+    summary = {
+        "reports": len(reports),
+        "throughput_per_s": len(reports) / wall,
+        "p50_latency_s": percentile(latencies, 50),
+        "p95_latency_s": percentile(latencies, 95),
+        "p99_latency_s": percentile(latencies, 99),
+        "max_latency_s": max(latencies),
+        "failed_reports": sum(r["failed"] for r in reports),
+        "stages": {},
+    }
+    if ttfts:
+        summary["p50_ttft_s"] = percentile(ttfts, 50)
+        summary["p95_ttft_s"] = percentile(ttfts, 95)
+    for record in records:
+        stage = summary["stages"].setdefault(record["stage"], {
+            "calls": 0, "errors": 0, "retries": 0, "prompt_tokens": 0, "cached_tokens": 0, "latencies": [],
+        })
+        stage["calls"] += 1
+        stage["prompt_tokens"] += record["prompt_tokens"]
+        stage["cached_tokens"] += record["cached_tokens"]
+        stage["errors"] += record["error"] is not None
+        stage["retries"] += record["retries"]
+        stage["latencies"].append(record["latency_s"])
+    for stage in summary["stages"].values():
+        latencies = stage.pop("latencies")
+        stage["p50_latency_s"] = percentile(latencies, 50)
+        stage["p99_latency_s"] = percentile(latencies, 99)
+        stage["prompt_cache_hit_rate"] = stage["cached_tokens"] / stage["prompt_tokens"] if stage["prompt_tokens"] else 0.0
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and tail latency of an API pipeline against the mock provider.")
+    parser.add_argument("--target", default="gpt4o", choices=API_TARGETS)
+    parser.add_argument("--profile", default="realistic", choices=sorted(PROFILES))
+    parser.add_argument("--pairs", default=str(DEFAULT_PAIRS))
+    parser.add_argument("-n", type=int, default=50, help="reports in the fixed sample")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="reports in flight; one run per value")
+    parser.add_argument("--stream", action="store_true", help="use simplify_stream() and also report time to first token")
+    parser.add_argument("--failover", action="store_true",
+                        help="wrap the target in FailoverModel, hedging / failing over to the other API class")
+    parser.add_argument("--hedge-percentile", type=float, default=95)
+    parser.add_argument("--client-tpm", type=int, default=0,
+                        help="client-side tokens-per-minute throttle of the async transport (0 = off, so the mock's limits are what is measured)")
+    parser.add_argument("--out", help="write the summaries as JSON")
+    for key, value in PROFILES["ideal"].items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), help="overrides the profile")
+    args = parser.parse_args()
+    overrides = {key: getattr(args, key) for key in PROFILES["ideal"] if getattr(args, key) is not None}
+    if args.failover and args.target not in FAILOVER_PARTNER:
+        parser.error(f"--failover needs a target with a partner API class: {', '.join(FAILOVER_PARTNER)}")
+
+    process, url = start_mock(args.profile, args.seed, overrides)
+    try:
+        # the model modules read their base URLs at import time
+        os.environ.update({
+            "OPENAI_BASE_URL": url, "DEEPSEEK_BASE_URL": url,
+            "OPENAI_API_KEY": "mock", "DEEPSEEK_API_KEY": "mock",
+            "OPENAI_TPM": str(args.client_tpm), "DEEPSEEK_TPM": str(args.client_tpm),
+            "MEDEASE_CACHE_DISABLE": "1", "MEDEASE_METRICS_PATH": "",
+        })
+        from call_metrics import get_sink
+        model = make_model(args.target, {})
+        if args.failover:
+            sys.path.append(str(Path(__file__).resolve().parents[1] / "pipelines" / "orchestration"))
+            from failover import FailoverModel
+            model = FailoverModel(model, make_model(FAILOVER_PARTNER[args.target], {}), hedge_percentile=args.hedge_percentile)
+        texts = load_sample(args.pairs, args.n, args.seed)
+
+        summaries = []
+        for concurrency in args.concurrency:
+            get_sink().records.clear()
+            before = mock_stats(url)
+            # the per-call [X ERROR] lines are counted in the summary instead
+            with redirect_stdout(io.StringIO()):
+                reports, wall = asyncio.run(run_load(model, texts, concurrency, args.stream))
+            after = mock_stats(url)
+            summary = summarize(reports, wall, get_sink().records)
+            summary["concurrency"] = concurrency
+            summary["mock_provider"] = {key: after[key] - before[key] for key in after}
+            if args.failover:
+                summary["failover"] = dict(model.stats)
+                model.stats = dict.fromkeys(model.stats, 0)
+            summaries.append(summary)
+
+            mock = summary["mock_provider"]
+            print(f"{args.target} c={concurrency:<3d} {summary['throughput_per_s']:6.2f} reports/s  "
+                  f"p50 {summary['p50_latency_s']:6.2f} s  p95 {summary['p95_latency_s']:6.2f} s  p99 {summary['p99_latency_s']:6.2f} s  "
+                  f"failed {summary['failed_reports']}/{summary['reports']}  "
+                  f"429s {mock['rate_limited']}  5xx {mock['server_errors']}  stalls {mock['stalled']}")
+            for stage, s in summary["stages"].items():
+                print(f"    {str(stage):25s} calls {s['calls']:4d}  errors {s['errors']:3d}  retries {s['retries']:3d}  "
+                      f"p50 {s['p50_latency_s']:6.2f} s  p99 {s['p99_latency_s']:6.2f} s  "
+                      f"prompt cache {s['prompt_cache_hit_rate']:.0%}")
+            if args.failover:
+                print(f"    failover: {summary['failover']}")
+    finally:
+        process.terminate()
+        process.wait()
+
+    if args.out:
+        Path(args.out).write_text(json.dumps({"target": args.target, "profile": args.profile, "overrides": overrides,
+                                              "runs": summaries}, indent=1), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
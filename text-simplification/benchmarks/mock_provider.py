@@ -0,0 +1,315 @@
+import sys
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Fault profiles. Latency is lognormal around `latency_s` (sigma 0 = fixed); a `stall_rate`
+# share of requests hangs for `stall_s` on top; past `rate_limit_rps` requests get a 429 with
+# Retry-After; each request starts a burst of `error_burst` 5xx replies with probability `error_rate`.
+# `prefill_s_per_1k` adds time per 1k prompt tokens not served from the prefix cache.
+PROFILES = {
+    "ideal": {
+        "latency_s": 0.05, "latency_sigma": 0.0, "stall_rate": 0.0, "stall_s": 0.0,
+        "token_interval_s": 0.0, "rate_limit_rps": 0.0, "error_rate": 0.0, "error_burst": 1, "error_status": 503,
+        "prefill_s_per_1k": 0.0,
+    },
+    "realistic": {
+        "latency_s": 0.6, "latency_sigma": 0.5, "stall_rate": 0.01, "stall_s": 8.0,
+        "token_interval_s": 0.01, "rate_limit_rps": 20.0, "error_rate": 0.005, "error_burst": 3, "error_status": 503,
+        "prefill_s_per_1k": 0.05,
+    },
+    "degraded": {
+        "latency_s": 1.2, "latency_sigma": 0.8, "stall_rate": 0.05, "stall_s": 15.0,
+        "token_interval_s": 0.02, "rate_limit_rps": 5.0, "error_rate": 0.03, "error_burst": 5, "error_status": 502,
+        "prefill_s_per_1k": 0.1,
+    },
+}
+
+# Automatic prefix caching as the providers do it: cached prompt tokens are the longest prefix
+# already seen, in whole blocks, once the prompt is long enough (OpenAI 128-token blocks from
+# 1024 tokens, DeepSeek 64-token blocks). Token counts are estimated at ~4 chars per token.
+PREFIX_CACHE = {
+    "openai": {"block_tokens": 128, "min_tokens": 1024},
+    "deepseek": {"block_tokens": 64, "min_tokens": 64},
+}
+
+
+def mock_completion(payload: dict) -> str:
+    """
+    Deterministic stand-in for a model reply: the text after the last "Original:" / "Text:" /
+    "Input:" marker of the final message, so downstream stages get realistic-length input.
+    """
+    content = payload["messages"][-1]["content"]
+    for marker in ("Original:", "Text:\n", "Input:"):
+        if marker in content:
+            content = content.rsplit(marker, 1)[1]
+    return content.replace("\nSimplified:", "").replace("\nPolished:", "").strip()
+
+
+def mock_structured(schema: dict, text: str):
+    """
+    An instance of a json_schema response format with every string field set to `text`.
+    """
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: mock_structured(field, text) for name, field in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [mock_structured(schema.get("items", {}), text)]
+    return text if kind == "string" else None
+
+
+def dialect(model: str) -> str:
+    return "deepseek" if model.startswith("deepseek") else "openai"
+
+
+class MockState:
+    """
+    Shared, thread-safe state of one mock server: seeded fault sampling, the rate-limit
+    bucket, the current error burst, the prefix cache and request counters.
+    """
+
+    def __init__(self, profile: dict, seed: int = 0):
+        self.profile = profile
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        # rate limits and error bursts are per dialect, like two independent providers
+        self._buckets = {kind: [float(profile["rate_limit_rps"]), time.monotonic()] for kind in PREFIX_CACHE}
+        self._burst_left = {kind: 0 for kind in PREFIX_CACHE}
+        self._prefixes = set()
+        self.stats = {"requests": 0, "ok": 0, "streamed": 0, "rate_limited": 0, "server_errors": 0, "stalled": 0}
+
+    def admit(self, kind: str):
+        """
+        None when the request is served, else (status, retry_after_s or None) of the fault to return.
+        """
+        profile = self.profile
+        with self._lock:
+            self.stats["requests"] += 1
+            rate = profile["rate_limit_rps"]
+            if rate > 0:
+                bucket = self._buckets[kind]
+                now = time.monotonic()
+                bucket[0] = min(rate, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+                if bucket[0] < 1:
+                    self.stats["rate_limited"] += 1
+                    return 429, (1 - bucket[0]) / rate
+                bucket[0] -= 1
+            if self._burst_left[kind] > 0 or self._rng.random() < profile["error_rate"]:
+                self._burst_left[kind] = (self._burst_left[kind] or profile["error_burst"]) - 1
+                self.stats["server_errors"] += 1
+                return profile["error_status"], None
+        return None
+
+    def latency(self) -> float:
+        profile = self.profile
+        with self._lock:
+            latency = profile["latency_s"]
+            if profile["latency_sigma"] > 0:
+                latency *= self._rng.lognormvariate(0.0, profile["latency_sigma"])
+            if self._rng.random() < profile["stall_rate"]:
+                self.stats["stalled"] += 1
+                latency += profile["stall_s"]
+        return latency
+
+    def usage(self, payload: dict, text: str) -> dict:
+        """
+        Usage block in the dialect of the requested model, with simulated prefix-cache hits.
+        """
+        prompt = "".join(f"{m['role']}\n{m['content']}\n" for m in payload["messages"])
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(text) // 4
+        kind = dialect(payload["model"])
+        block_chars = PREFIX_CACHE[kind]["block_tokens"] * 4
+        cached_tokens = 0
+        if prompt_tokens >= PREFIX_CACHE[kind]["min_tokens"]:
+            keys = [
+                hashlib.sha256(f"{payload['model']}\n{prompt[:end]}".encode("utf-8")).hexdigest()
+                for end in range(block_chars, len(prompt) + 1, block_chars)
+            ]
+            with self._lock:
+                for i, key in enumerate(keys):
+                    if key not in self._prefixes:
+                        break
+                    cached_tokens = (i + 1) * block_chars // 4
+                self._prefixes.update(keys)
+
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        if kind == "deepseek":
+            usage["prompt_cache_hit_tokens"] = cached_tokens
+            usage["prompt_cache_miss_tokens"] = prompt_tokens - cached_tokens
+        else:
+            usage["prompt_tokens_details"] = {"cached_tokens": cached_tokens}
+        return usage
+
+    def count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body go out in separate writes; with Nagle on, keep-alive replies wait on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict, headers: dict = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status: int, retry_after_s: float = None):
+        headers = {}
+        if status == 429:
+            message, kind = "Rate limit reached for requests", "rate_limit_exceeded"
+            headers["Retry-After"] = str(max(1, math.ceil(retry_after_s)))
+            headers["retry-after-ms"] = str(int(retry_after_s * 1000))
+        else:
+            message, kind = "The server is overloaded or not ready yet.", "server_error"
+        self._send_json(status, {"error": {"message": message, "type": kind, "code": kind}}, headers)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/mock/stats"):
+            return self._send_json(200, self.server.state.stats)
+        self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        # OpenAI clients call {base}/chat/completions with a /v1 base; DeepSeek accepts both
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+        state = self.server.state
+        fault = state.admit(dialect(payload["model"]))
+        if fault is not None:
+            return self._send_error(*fault)
+
+        text = mock_completion(payload)
+        response_format = payload.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            text = json.dumps(mock_structured(response_format["json_schema"]["schema"], text))
+        usage = state.usage(payload, text)
+        cached = usage.get("prompt_cache_hit_tokens", usage.get("prompt_tokens_details", {}).get("cached_tokens", 0))
+        time.sleep(state.latency() + (usage["prompt_tokens"] - cached) / 1000 * state.profile["prefill_s_per_1k"])
+        if payload.get("stream"):
+            state.count("streamed")
+            return self._stream(payload, text, usage, state.profile["token_interval_s"])
+
+        state.count("ok")
+        self._send_json(200, {
+            "id": "mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    def _stream(self, payload: dict, text: str, usage: dict, token_interval_s: float):
+        """
+        Server-sent events, one chunk per word, then the usage chunk (if asked for) and [DONE].
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(choices, **extra):
+            chunk = {"id": "mock", "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": payload["model"], "choices": choices, **extra}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            piece = word if i == 0 else " " + word
+            event([{"index": 0, "delta": {"role": "assistant", "content": piece}, "finish_reason": None}])
+            if token_interval_s:
+                time.sleep(token_interval_s)
+        event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            event([], usage=usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class MockProvider:
+    """
+    Local OpenAI / DeepSeek-compatible chat-completions server with configurable latency,
+    rate limits, 5xx bursts and SSE streaming. `url` is the base URL to point clients at
+    (`env()` gives the OPENAI_BASE_URL / DEEPSEEK_BASE_URL overrides); use as a context manager.
+    """
+
+    def __init__(self, profile: str = "ideal", port: int = 0, seed: int = 0, **overrides):
+        self.profile = {**PROFILES[profile], **overrides}
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.server.daemon_threads = True
+        self.server.state = MockState(self.profile, seed)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def env(self) -> dict:
+        return {
+            "OPENAI_BASE_URL": self.url,
+            "DEEPSEEK_BASE_URL": self.url,
+            "OPENAI_API_KEY": "mock",
+            "DEEPSEEK_API_KEY": "mock",
+        }
+
+    @property
+    def stats(self) -> dict:
+        return dict(self.server.state.stats)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI / DeepSeek-compatible mock provider.")
+    parser.add_argument("--profile", default="realistic", choices=sorted(PROFILES))
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--seed", type=int, default=0)
+    for key, value in PROFILES["ideal"].items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=type(value), help="overrides the profile")
+    args = parser.parse_args()
+    overrides = {key: getattr(args, key) for key in PROFILES["ideal"] if getattr(args, key) is not None}
+
+    mock = MockProvider(args.profile, port=args.port, seed=args.seed, **overrides)
+    print(mock.url, flush=True)
+    for name, value in mock.env().items():
+        print(f"export {name}={value}", file=sys.stderr)
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.server.server_close()
+        print(json.dumps(mock.stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import resource
+import subprocess
+from pathlib import Path
+from contextlib import redirect_stdout
+
+from mock_provider import PROFILES, MockProvider
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "pipelines" / "lm_model_classes"))
+sys.path.append(str(ROOT / "pipelines" / "baseline"))
+sys.path.append(str(ROOT / "preprocessing"))
+
+DEFAULT_PAIRS = ROOT / "data" / "500_pairs.json"
+DEFAULT_HISTORY = Path(__file__).resolve().parent / "history.json"
+TINY_MODELS_DIR = ROOT / ".cache" / "bench_models"
+
+API_TARGETS = ("gpt4o", "deepseek", "baseline", "baseline_fused")
+TARGETS = API_TARGETS + ("t5", "bart")
+STAGES = ("lexical_simplification", "syntactic_simplification", "format_summarization", "simplify")
+# the stage methods of the fused baseline are the staged ones, so only simplify() is measured
+TARGET_STAGES = {"baseline_fused": ("simplify",)}
+
+# relative change against the previous comparable run that counts as a regression
+THRESHOLDS = {
+    "p50_latency_s": 0.15,
+    "p95_latency_s": 0.25,
+    "throughput_per_s": 0.15,
+    "tokens_per_s": 0.15,
+    "peak_rss_mb": 0.10,
+}
+HIGHER_IS_BETTER = ("throughput_per_s", "tokens_per_s")
+
+
+def load_sources(pairs_path) -> list:
+    """
+    Source texts of a pairs JSON file or of an .arrow / .parquet store from preprocessing/data_loader.py
+    (only its source column is read).
+    """
+    from data_loader import load_pairs
+    return [pair["source"] for pair in load_pairs(pairs_path, columns=("source",))]
+
+
+def load_sample(pairs_path, n: int, seed: int) -> list:
+    """
+    Fixed sample of source texts: the same (pairs file, n, seed) always gives the same reports.
+    """
+    sources = load_sources(pairs_path)
+    return random.Random(seed).sample(sources, min(n, len(sources)))
+
+
+def make_model(target: str, tiny_models: dict):
+    if target == "gpt4o":
+        from GPT4oAPI import GPT4oAPI
+        return GPT4oAPI()
+    if target == "deepseek":
+        from DeepSeekChatAPI import DeepSeekChatAPI
+        return DeepSeekChatAPI()
+    if target == "baseline":
+        from BaselineSimplificationPipeline import BaselineSimplificationPipeline
+        return BaselineSimplificationPipeline()
+    if target == "baseline_fused":
+        from BaselineSimplificationPipeline import BaselineSimplificationPipeline
+        return BaselineSimplificationPipeline(mode="fused")
+    if target == "t5":
+        from T5LargeLocal import T5LargeLocal
+        return T5LargeLocal(model_name=tiny_models["t5"], device="cpu")
+    if target == "bart":
+        from BartLargeCNNLocal import BartLargeCNNLocal
+        return BartLargeCNNLocal(model_name=tiny_models["bart"])
+    raise ValueError(f"unknown target {target}")
+
+
+def bench(fn, texts: list, warmup: int = 1) -> dict:
+    """
+    Latency percentiles, throughput and generated tokens/s of `fn` over `texts`, one call at a time.
+    """
+    from call_metrics import get_sink, percentile
+    sink = get_sink()
+    for text in texts[:warmup]:
+        fn(text)
+    sink.records.clear()
+
+    latencies = []
+    started = time.perf_counter()
+    for text in texts:
+        start = time.perf_counter()
+        fn(text)
+        latencies.append(time.perf_counter() - start)
+    wall = time.perf_counter() - started
+
+    completion_tokens = sum(r["completion_tokens"] for r in sink.records)
+    prompt_tokens = sum(r["prompt_tokens"] for r in sink.records)
+    return {
+        "n": len(texts),
+        "mean_latency_s": sum(latencies) / len(latencies),
+        "p50_latency_s": percentile(latencies, 50),
+        "p95_latency_s": percentile(latencies, 95),
+        "p99_latency_s": percentile(latencies, 99),
+        "throughput_per_s": len(texts) / wall,
+        "tokens_per_s": completion_tokens / wall,
+        "calls": len(sink.records),
+        "prompt_cache_hit_rate": sum(r["cached_tokens"] for r in sink.records) / prompt_tokens if prompt_tokens else 0.0,
+    }
+
+
+def run_target(target: str, texts: list, tiny_models: dict, stages=None) -> dict:
+    """
+    Benchmarks every stage and simplify() of one model class. Runs inside a fresh child
+    process so peak RSS belongs to this target alone; API targets reach the mock provider
+    through the OPENAI_BASE_URL / DEEPSEEK_BASE_URL the parent sets.
+    """
+    start = time.perf_counter()
+    model = make_model(target, tiny_models)
+    stages = stages or TARGET_STAGES.get(target, STAGES)
+    results = {"load_s": time.perf_counter() - start}
+    with redirect_stdout(io.StringIO()):
+        for stage in stages:
+            results[stage] = bench(getattr(model, stage), texts)
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident memory of this process. On Linux VmHWM is used because ru_maxrss
+    carries over the parent's peak across fork + exec.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is KB on Linux, bytes on macOS
+    scale = 1024 ** 2 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def flatten(results: dict) -> dict:
+    """
+    {(target, stage, metric): value} over one run's results.
+    """
+    flat = {}
+    for target, target_results in results.items():
+        flat[(target, "", "peak_rss_mb")] = target_results["peak_rss_mb"]
+        for stage in STAGES:
+            for metric, value in target_results.get(stage, {}).items():
+                flat[(target, stage, metric)] = value
+    return flat
+
+
+def find_regressions(run: dict, history: list, thresholds: dict = THRESHOLDS) -> list:
+    """
+    Compares a run with the latest earlier run that used the same sample and mock provider settings.
+    """
+    previous = [r for r in history if r["params"] == run["params"] and r is not run]
+    if not previous:
+        return []
+    before, after = flatten(previous[-1]["results"]), flatten(run["results"])
+    regressions = []
+    for (target, stage, metric), value in after.items():
+        if metric not in thresholds or (target, stage, metric) not in before:
+            continue
+        old = before[(target, stage, metric)]
+        if not old:
+            continue
+        change = (value - old) / old
+        worse = -change if metric in HIGHER_IS_BETTER else change
+        if worse > thresholds[metric]:
+            regressions.append({
+                "target": target, "stage": stage, "metric": metric,
+                "before": old, "after": value, "change": change,
+            })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of every model class and stage.")
+    parser.add_argument("--targets", nargs="+", default=list(TARGETS), choices=TARGETS)
+    parser.add_argument("--pairs", default=str(DEFAULT_PAIRS))
+    parser.add_argument("-n", type=int, default=20, help="reports in the fixed sample")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", default="ideal", choices=sorted(PROFILES), help="mock provider fault profile")
+    parser.add_argument("--stub-latency-ms", type=float, default=50.0, help="median mock provider latency")
+    parser.add_argument("--history", default=str(DEFAULT_HISTORY))
+    parser.add_argument("--no-record", action="store_true", help="do not append this run to the history")
+    parser.add_argument("--check", action="store_true", help="exit 1 when a metric regressed past its threshold")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    texts = load_sample(args.pairs, args.n, args.seed)
+    from tiny_models import build_tiny_models
+    tiny_models = build_tiny_models(load_sources(args.pairs), TINY_MODELS_DIR)
+
+    if args.child:
+        print(json.dumps(run_target(args.child, texts, tiny_models)))
+        return
+
+    env = {
+        **os.environ,
+        "MEDEASE_CACHE_DISABLE": "1",
+        "MEDEASE_METRICS_PATH": "",
+        "HF_HUB_OFFLINE": "1",
+        "TOKENIZERS_PARALLELISM": "false",
+    }
+    results = {}
+    with MockProvider(args.profile, seed=args.seed, latency_s=args.stub_latency_ms / 1000) as mock:
+        env.update(mock.env())
+        for target in args.targets:
+            print(f"[Bench] {target}")
+            child = subprocess.run(
+                [sys.executable, __file__, "--child", target,
+                 "--pairs", args.pairs, "-n", str(args.n), "--seed", str(args.seed)],
+                env=env, capture_output=True, text=True,
+            )
+            if child.returncode != 0:
+                print(f"[Bench ERROR] {target}\n{child.stderr[-2000:]}")
+                continue
+            results[target] = json.loads(child.stdout.strip().splitlines()[-1])
+
+    run = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "host": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "params": {"pairs": Path(args.pairs).name, "n": args.n, "seed": args.seed, "stub_latency_ms": args.stub_latency_ms,
+                   "profile": args.profile},
+        "mock_provider": mock.stats,
+        "results": results,
+    }
+
+    history_path = Path(args.history)
+    history = json.loads(history_path.read_text(encoding="utf-8")) if history_path.exists() else []
+    regressions = find_regressions(run, history)
+    run["regressions"] = regressions
+    if not args.no_record:
+        history.append(run)
+        history_path.write_text(json.dumps(history, indent=1), encoding="utf-8")
+
+    for target, target_results in results.items():
+        for stage in STAGES:
+            if stage not in target_results:
+                continue
+            r = target_results[stage]
+            print(f"{target:9s} {stage:25s} p50 {r['p50_latency_s'] * 1000:8.1f} ms  p95 {r['p95_latency_s'] * 1000:8.1f} ms  "
+                  f"{r['throughput_per_s']:7.2f} reports/s  {r['tokens_per_s']:8.1f} tok/s")
+        print(f"{target:9s} peak RSS {target_results['peak_rss_mb']:.0f} MB")
+    for r in regressions:
+        print(f"[REGRESSION] {r['target']} {r['stage']} {r['metric']}: {r['before']:.4g} -> {r['after']:.4g} ({r['change']:+.0%})")
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
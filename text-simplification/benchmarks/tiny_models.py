@@ -0,0 +1,75 @@
+from pathlib import Path
+
+
+def _train_bpe(texts: list, vocab_size: int):
+    from tokenizers import ByteLevelBPETokenizer
+    tokenizer = ByteLevelBPETokenizer()
+    tokenizer.train_from_iterator(texts, vocab_size=vocab_size, special_tokens=["<s>", "<pad>", "</s>", "<unk>", "<mask>"])
+    return tokenizer
+
+
+def build_tiny_t5(texts: list, out_dir, vocab_size: int = 2000, seed: int = 0) -> Path:
+    """
+    Randomly initialised 2-layer T5 with a BPE tokenizer trained on `texts`.
+    Same architecture and generate() path as t5-large, a few MB on disk.
+    """
+    out_dir = Path(out_dir)
+    if (out_dir / "config.json").exists():
+        return out_dir
+    import torch
+    from transformers import PreTrainedTokenizerFast, T5Config, T5ForConditionalGeneration
+
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=_train_bpe(texts, vocab_size)._tokenizer,
+        pad_token="<pad>", eos_token="</s>", unk_token="<unk>",
+        model_max_length=512, model_input_names=["input_ids", "attention_mask"],
+    )
+    config = T5Config(
+        vocab_size=len(tokenizer), d_model=64, d_ff=128, d_kv=32, num_layers=2, num_heads=2,
+        pad_token_id=tokenizer.pad_token_id, eos_token_id=tokenizer.eos_token_id,
+        decoder_start_token_id=tokenizer.pad_token_id,
+    )
+    torch.manual_seed(seed)
+    model = T5ForConditionalGeneration(config)
+    # T5 decodes from the pad token; an untrained model would otherwise keep emitting it
+    model.generation_config.suppress_tokens = [tokenizer.pad_token_id]
+    model.save_pretrained(out_dir)
+    tokenizer.save_pretrained(out_dir)
+    return out_dir
+
+
+def build_tiny_bart(texts: list, out_dir, vocab_size: int = 2000, seed: int = 0) -> Path:
+    """
+    Randomly initialised 2-layer BART with a byte-level BPE vocab (loadable by BartTokenizer).
+    """
+    out_dir = Path(out_dir)
+    if (out_dir / "config.json").exists():
+        return out_dir
+    import torch
+    from transformers import BartConfig, BartForConditionalGeneration, BartTokenizer
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    _train_bpe(texts, vocab_size).save_model(str(out_dir))
+    tokenizer = BartTokenizer(str(out_dir / "vocab.json"), str(out_dir / "merges.txt"), model_max_length=1024)
+    config = BartConfig(
+        vocab_size=len(tokenizer), d_model=64, encoder_layers=2, decoder_layers=2,
+        encoder_attention_heads=2, decoder_attention_heads=2, encoder_ffn_dim=128, decoder_ffn_dim=128,
+        max_position_embeddings=1024, pad_token_id=tokenizer.pad_token_id, bos_token_id=tokenizer.bos_token_id,
+        eos_token_id=tokenizer.eos_token_id, decoder_start_token_id=tokenizer.eos_token_id,
+        forced_eos_token_id=tokenizer.eos_token_id,
+    )
+    torch.manual_seed(seed)
+    BartForConditionalGeneration(config).save_pretrained(out_dir)
+    tokenizer.save_pretrained(out_dir)
+    return out_dir
+
+
+def build_tiny_models(texts: list, root) -> dict:
+    """
+    Builds (once) the tiny stand-ins for T5LargeLocal / BartLargeCNNLocal under `root`.
+    """
+    root = Path(root)
+    return {
+        "t5": str(build_tiny_t5(texts, root / "tiny-t5")),
+        "bart": str(build_tiny_bart(texts, root / "tiny-bart")),
+    }
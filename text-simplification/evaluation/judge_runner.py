@@ -0,0 +1,194 @@
+import sys
+import json
+import time
+import asyncio
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "pipelines" / "lm_model_classes"))
+from api_transport import chat_payload, get_transport
+from response_cache import ResponseCache, DEFAULT_CACHE_PATH, make_key
+from call_metrics import get_sink
+from resilience import call_with_retry_async
+
+
+# bump whenever build_prompt or the criteria change, so cached verdicts are not reused
+JUDGE_PROMPT_VERSION = "v1"
+
+CRITERIA = (
+    "lexical_simplicity",
+    "syntactic_simplicity",
+    "loss_of_information",
+    "distortion_of_information",
+)
+
+
+def build_prompt(source, target, outputs_dict):
+    lines = [
+        "You are an expert medical reviewer trained to evaluate simplified clinical texts.",
+        "You will evaluate each output based on the following four criteria, each scored 0–10:",
+        "1. Lexical Simplicity (easy vocabulary)",
+        "2. Syntactic Simplicity (simple sentence structure)",
+        "3. Loss of Information (missing facts)",
+        "4. Distortion of Information (wrong or misleading facts — 0 if severe)",
+        "Output your scores in JSON like so: {\"pipeline_name\": {\"lexical_simplicity\": x, ...}}",
+        "\nSource:\n" + source,
+        "\nTarget:\n" + target,
+        "\nModel Outputs:"
+    ]
+    for k, v in outputs_dict.items():
+        lines.append(f"{k}: {v}")
+    lines.append("\nPlease return your scores in the specified JSON format.")
+    return "\n\n".join(lines)
+
+
+def parse_reply(content: str):
+    content = content.strip()
+    # Strip triple backticks if present
+    if content.startswith("```"):
+        content = content.strip("`").split("json")[-1].strip()
+    return json.loads(content)
+
+
+def validate_scores(scores, expected_keys) -> tuple:
+    """
+    Splits a judge reply into valid per-pipeline verdicts and a list of problems
+    (missing pipelines, missing criteria, non-numeric or out-of-range scores).
+    """
+    if not isinstance(scores, dict):
+        return {}, ["the reply is not a JSON object keyed by pipeline name"]
+    valid, errors = {}, []
+    for key in expected_keys:
+        verdict = scores.get(key)
+        if not isinstance(verdict, dict):
+            errors.append(f"missing scores for pipeline '{key}'")
+            continue
+        cleaned = {}
+        for criterion in CRITERIA:
+            try:
+                value = float(verdict[criterion])
+            except (KeyError, TypeError, ValueError):
+                errors.append(f"'{key}' has no numeric '{criterion}'")
+                continue
+            if not 0 <= value <= 10:
+                errors.append(f"'{key}' {criterion} = {value} is outside 0–10")
+                continue
+            cleaned[criterion] = value
+        if len(cleaned) == len(CRITERIA):
+            valid[key] = cleaned
+    return valid, errors
+
+
+def repair_prompt(errors, pending_keys) -> str:
+    return (
+        "Your previous reply could not be used:\n- " + "\n- ".join(errors) + "\n\n"
+        "Return only a JSON object with scores for these pipelines: " + ", ".join(pending_keys) + ". "
+        "Each must contain numeric " + ", ".join(CRITERIA) + " between 0 and 10."
+    )
+
+
+class JudgeRunner:
+    """
+    LLM-as-judge over the whole grid with a bounded pool of concurrent requests.
+
+    Replies are validated against the score schema; when some pipelines are missing or
+    malformed, the judge is re-asked in the same conversation for just those pipelines
+    instead of rerunning the entry. Valid verdicts are cached per
+    (source, target, output, judge prompt version), so reruns only pay for new outputs.
+    """
+
+    def __init__(self, model="gpt-4o", max_concurrency: int = 8, max_repairs: int = 2, cache=None):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_repairs = max_repairs
+        self.cache = cache or ResponseCache(path=DEFAULT_CACHE_PATH.with_name("judge_verdicts.sqlite"))
+
+    def _verdict_key(self, source, target, output):
+        return make_key(kind="judge", version=JUDGE_PROMPT_VERSION, model=self.model, source=source, target=target, output=output)
+
+    async def _ask(self, messages):
+        payload = chat_payload(self.model, messages, 0.0)
+        payload["response_format"] = {"type": "json_object"}
+        start = time.perf_counter()
+        body, retries = await call_with_retry_async("openai", lambda: get_transport().chat("openai", payload))
+        get_sink().record("openai", self.model, "judge", time.perf_counter() - start, usage=body.get("usage"), retries=retries)
+        return body["choices"][0]["message"]["content"]
+
+    async def judge_entry(self, source: str, target: str, outputs_dict: dict) -> tuple:
+        """
+        Returns ({pipeline: {criterion: score}}, [pipelines that never got a valid verdict]).
+        """
+        verdicts, pending = {}, {}
+        for key, output in outputs_dict.items():
+            cached = self.cache.lookup(self._verdict_key(source, target, output))
+            if cached is not None:
+                verdicts[key] = json.loads(cached)
+            else:
+                pending[key] = output
+        if not pending:
+            return verdicts, []
+
+        messages = [
+            {"role": "system", "content": "You are a precise evaluator."},
+            {"role": "user", "content": build_prompt(source, target, pending)},
+        ]
+        for attempt in range(self.max_repairs + 1):
+            try:
+                content = await self._ask(messages)
+                valid, errors = validate_scores(parse_reply(content), list(pending))
+            except json.JSONDecodeError as e:
+                valid, errors = {}, [f"the reply is not valid JSON ({e})"]
+            except Exception as e:
+                print(f"[Judge ERROR] {e}")
+                break
+
+            for key, scores in valid.items():
+                verdicts[key] = scores
+                self.cache.store(self._verdict_key(source, target, pending.pop(key)), self.model, json.dumps(scores))
+            if not pending:
+                break
+            messages += [
+                {"role": "assistant", "content": content},
+                {"role": "user", "content": repair_prompt(errors, list(pending))},
+            ]
+        return verdicts, list(pending)
+
+    async def run(self, formatted_outputs: list, gold_data: list, pipeline_keys: list) -> tuple:
+        """
+        Judges every entry concurrently. Returns (results_per_pipeline, failures) where
+        results_per_pipeline has the {pipeline: {criterion: [scores]}} layout of pipeline_eval.
+        """
+        pool = asyncio.Semaphore(self.max_concurrency)
+
+        async def judge(i):
+            async with pool:
+                entry = formatted_outputs[i]
+                outputs_dict = {k: entry[k] for k in pipeline_keys}
+                return await self.judge_entry(gold_data[i]["source"], gold_data[i]["target"], outputs_dict)
+
+        judged = await asyncio.gather(*(judge(i) for i in range(len(gold_data))))
+
+        results_per_pipeline = {k: {c: [] for c in CRITERIA} for k in pipeline_keys}
+        failures = []
+        for i, (verdicts, failed) in enumerate(judged):
+            for key, scores in verdicts.items():
+                for criterion in CRITERIA:
+                    results_per_pipeline[key][criterion].append(scores[criterion])
+            failures += [(i, key) for key in failed]
+        if failures:
+            print(f"{len(failures)} (entry, pipeline) verdicts still missing after {self.max_repairs} repairs")
+        return results_per_pipeline, failures
+
+    def run_sync(self, formatted_outputs: list, gold_data: list, pipeline_keys: list) -> tuple:
+        return asyncio.run(self.run(formatted_outputs, gold_data, pipeline_keys))
+
+
+def summarize(results_per_pipeline: dict):
+    """
+    Average score per pipeline and criterion, indexed by Pipeline as in pipeline_eval.
+    """
+    import pandas as pd
+    rows = [
+        {"Pipeline": k, **{c: sum(v) / len(v) if v else float("nan") for c, v in metrics.items()}}
+        for k, metrics in results_per_pipeline.items()
+    ]
+    return pd.DataFrame(rows).set_index("Pipeline")
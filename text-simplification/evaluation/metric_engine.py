@@ -0,0 +1,248 @@
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+METRICS = ("ROUGE-2", "ROUGE-L", "SARI")
+
+# sacrebleu "13a" tokenizer rules, as used by evaluate's SARI
+_13A_RULES = [
+    (re.compile(r"([\{-\~\[-\` -\&\(-\+\:-\@\/])"), r" \1 "),
+    (re.compile(r"([^0-9])([\.,])"), r"\1 \2 "),
+    (re.compile(r"([\.,])([^0-9])"), r" \1 \2"),
+    (re.compile(r"([0-9])(-)"), r"\1 \2 "),
+]
+
+_HASH_PRIME = np.uint64(1_000_003)
+
+
+def rouge_tokenize(text: str) -> list:
+    """
+    rouge_score's default tokenizer: lowercase, alphanumeric runs only, no stemming.
+    """
+    return re.sub(r"[^a-z0-9]+", " ", text.lower()).split()
+
+
+def sari_tokenize(text: str) -> list:
+    """
+    Lowercase + 13a tokenization, matching evaluate's SARI normalize().
+    """
+    line = text.lower().replace("<skipped>", "").replace("-\n", "").replace("\n", " ")
+    if "&" in line:
+        line = line.replace("&quot;", '"').replace("&amp;", "&").replace("&lt;", "<").replace("&gt;", ">")
+    line = f" {line} "
+    for pattern, replacement in _13A_RULES:
+        line = pattern.sub(replacement, line)
+    # evaluate splits the normalized string on " ", so empty text is one empty token
+    return line.split() or [""]
+
+
+class Vocabulary:
+    def __init__(self):
+        self.ids = {}
+
+    def encode(self, tokens: list) -> np.ndarray:
+        return np.fromiter((self.ids.setdefault(t, len(self.ids) + 1) for t in tokens), dtype=np.uint64, count=len(tokens))
+
+
+def ngram_counts(ids: np.ndarray, n: int):
+    """
+    Sorted unique n-gram keys and their counts. N-grams are folded into one uint64 key
+    with a polynomial hash so counting and matching are plain array operations.
+    """
+    if len(ids) < n:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+    keys = ids[: len(ids) - n + 1].copy()
+    with np.errstate(over="ignore"):
+        for offset in range(1, n):
+            keys = keys * _HASH_PRIME + ids[offset: len(ids) - n + 1 + offset]
+    return np.unique(keys, return_counts=True)
+
+
+def lookup(keys: np.ndarray, table_keys: np.ndarray, table_counts: np.ndarray) -> np.ndarray:
+    """
+    Counts of `keys` in a (sorted keys, counts) table, 0 where absent.
+    """
+    if len(table_keys) == 0:
+        return np.zeros(len(keys), dtype=np.int64)
+    idx = np.minimum(np.searchsorted(table_keys, keys), len(table_keys) - 1)
+    return np.where(table_keys[idx] == keys, table_counts[idx], 0)
+
+
+def lcs_length(a: np.ndarray, b: np.ndarray) -> int:
+    """
+    Bit-parallel LCS length (Hyyro 2004): one big-int update per token of `b`.
+    """
+    if len(a) == 0 or len(b) == 0:
+        return 0
+    masks = {}
+    for i, token in enumerate(a.tolist()):
+        masks[token] = masks.get(token, 0) | (1 << i)
+    full = (1 << len(a)) - 1
+    v = full
+    for token in b.tolist():
+        u = v & masks.get(token, 0)
+        v = ((v + u) | (v - u)) & full
+    return len(a) - bin(v).count("1")
+
+
+def _f1(precision, recall):
+    return 2 * precision * recall / (precision + recall) if precision + recall > 0 else 0.0
+
+
+def rouge_n(pred, ref) -> float:
+    pred_keys, pred_counts = pred
+    ref_keys, ref_counts = ref
+    overlap = np.minimum(pred_counts, lookup(pred_keys, ref_keys, ref_counts)).sum()
+    return _f1(overlap / max(pred_counts.sum(), 1), overlap / max(ref_counts.sum(), 1))
+
+
+def rouge_l(pred_ids, ref_ids) -> float:
+    if len(pred_ids) == 0 or len(ref_ids) == 0:
+        return 0.0
+    lcs = lcs_length(ref_ids, pred_ids)
+    return _f1(lcs / len(pred_ids), lcs / len(ref_ids))
+
+
+def sari_ngram(source, pred, refs, num_refs) -> tuple:
+    """
+    Keep F1, delete precision and add F1 for one n-gram order, following evaluate's SARIngram.
+    Each argument is a (sorted keys, counts) table; `refs` already pools all references.
+    """
+    s_keys, s_counts = source
+    c_keys, c_counts = pred
+    r_keys, r_counts = refs
+    s_rep, c_rep = s_counts * num_refs, c_counts * num_refs
+
+    # KEEP
+    keep_keys = np.intersect1d(s_keys, c_keys, assume_unique=True)
+    keep = np.minimum(lookup(keep_keys, s_keys, s_rep), lookup(keep_keys, c_keys, c_rep))
+    keep_good = np.minimum(keep, lookup(keep_keys, r_keys, r_counts))
+    keep_all = np.minimum(s_rep, lookup(s_keys, r_keys, r_counts))
+    keep_precision = (keep_good / keep).sum() / len(keep_keys) if len(keep_keys) else 1.0
+    keep_recall = keep_good.sum() / keep_all.sum() if np.count_nonzero(keep_all) else 1.0
+    keep_score = _f1(keep_precision, keep_recall)
+
+    # DELETION
+    deleted = s_rep - lookup(s_keys, c_keys, c_rep)
+    mask = deleted > 0
+    deleted = deleted[mask]
+    deleted_good = np.maximum(deleted - lookup(s_keys[mask], r_keys, r_counts), 0)
+    del_precision = (deleted_good / deleted).sum() / len(deleted) if len(deleted) else 1.0
+
+    # ADDITION
+    added = np.setdiff1d(c_keys, s_keys, assume_unique=True)
+    added_good = np.count_nonzero(lookup(added, r_keys, r_counts))
+    added_all = len(np.setdiff1d(r_keys, s_keys, assume_unique=True))
+    add_precision = added_good / len(added) if len(added) else 1.0
+    add_recall = added_good / added_all if added_all else 1.0
+    add_score = _f1(add_precision, add_recall)
+
+    return keep_score, del_precision, add_score
+
+
+def sari(source_grams, pred_grams, ref_grams, num_refs=1) -> float:
+    scores = np.array([sari_ngram(source_grams[n], pred_grams[n], ref_grams[n], num_refs) for n in range(4)])
+    return 100 * scores.mean(axis=0).mean()
+
+
+def _pooled(tables: list):
+    """
+    Merges several (keys, counts) tables into one, summing counts (the reference multiset).
+    """
+    keys = np.concatenate([k for k, _ in tables])
+    counts = np.concatenate([c for _, c in tables])
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return unique, np.bincount(inverse, weights=counts, minlength=len(unique)).astype(np.int64)
+
+
+def score_entry(source: str, references: list, predictions: list) -> list:
+    """
+    Scores every prediction for one entry. The source and references are tokenized
+    and counted once and shared across all predictions.
+    """
+    vocab = Vocabulary()
+    ref_rouge = [vocab.encode(rouge_tokenize(r)) for r in references]
+    ref_rouge_bigrams = [ngram_counts(ids, 2) for ids in ref_rouge]
+    source_sari = vocab.encode(sari_tokenize(source))
+    source_grams = [ngram_counts(source_sari, n) for n in range(1, 5)]
+    ref_sari = [vocab.encode(sari_tokenize(r)) for r in references]
+    ref_grams = [_pooled([ngram_counts(ids, n) for ids in ref_sari]) for n in range(1, 5)]
+
+    scores = []
+    for prediction in predictions:
+        pred_rouge = vocab.encode(rouge_tokenize(prediction))
+        pred_bigrams = ngram_counts(pred_rouge, 2)
+        pred_sari = vocab.encode(sari_tokenize(prediction))
+        pred_grams = [ngram_counts(pred_sari, n) for n in range(1, 5)]
+        # multi-reference ROUGE keeps the best reference, as rouge_score does
+        scores.append({
+            "ROUGE-2": max(rouge_n(pred_bigrams, ref) for ref in ref_rouge_bigrams),
+            "ROUGE-L": max(rouge_l(pred_rouge, ref) for ref in ref_rouge),
+            "SARI": sari(source_grams, pred_grams, ref_grams, len(references)),
+        })
+    return scores
+
+
+def _score_chunk(chunk):
+    return [score_entry(*item) for item in chunk]
+
+
+class MetricEngine:
+    """
+    Scores many pipeline variants against the same sources and references in bulk:
+    ROUGE-2, ROUGE-L and SARI on the same scales as evaluate's rouge / sari.
+
+    Each entry's source and reference are tokenized once; n-gram counts are numpy
+    arrays. With n_jobs > 1, entries are spread across worker processes.
+    """
+
+    def __init__(self, n_jobs: int = 1, chunk_size: int = 25):
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+
+    def score(self, sources: list, references: list, predictions: dict) -> dict:
+        """
+        `references` holds one target string (or a list of them) per entry and
+        `predictions` maps pipeline name -> list of outputs aligned with `sources`.
+        Returns {pipeline: {"ROUGE-2": [...], "ROUGE-L": [...], "SARI": [...]}}.
+        """
+        names = list(predictions)
+        items = [
+            (source, [refs] if isinstance(refs, str) else refs, [(predictions[k][i] or "").strip() for k in names])
+            for i, (source, refs) in enumerate(zip(sources, references))
+        ]
+        chunks = [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+
+        if self.n_jobs > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=self.n_jobs) as pool:
+                per_entry = [scores for chunk in pool.map(_score_chunk, chunks) for scores in chunk]
+        else:
+            per_entry = [scores for chunk in chunks for scores in _score_chunk(chunk)]
+
+        results = {k: {m: [] for m in METRICS} for k in names}
+        for scores in per_entry:
+            for name, entry_scores in zip(names, scores):
+                for metric in METRICS:
+                    results[name][metric].append(float(entry_scores[metric]))
+        return results
+
+    def score_entries(self, entries: list, targets: list, pipeline_keys: list, source_key: str = "source") -> dict:
+        """
+        Convenience wrapper for the formatter_results.json layout used in pipeline_eval.
+        """
+        return self.score(
+            [entry[source_key] for entry in entries],
+            targets,
+            {k: [entry.get(k, "") for entry in entries] for k in pipeline_keys},
+        )
+
+
+def summarize(results: dict):
+    """
+    Averages per-entry scores into the Pipeline / ROUGE-2 / ROUGE-L / SARI frame of pipeline_eval.
+    """
+    import pandas as pd
+    rows = [{"Pipeline": k, **{m: float(np.mean(v[m])) for m in METRICS}} for k, v in results.items()]
+    return pd.DataFrame(rows, columns=["Pipeline", *METRICS])
@@ -0,0 +1,232 @@
+import sys
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "pipelines" / "orchestration"))
+from tree_executor import LAYERS, MODEL_CLASSES, path_key
+from batch_runner import read_journal
+
+
+DEFAULT_RESULTS_PATH = Path(__file__).resolve().parent / "results" / "results.sqlite"
+
+# entry fields of the legacy result files that are not model outputs
+ENTRY_FIELDS = ("index", "source", "target")
+
+
+def parse_path(path) -> tuple:
+    """
+    Model path as a tuple of model names, from a tuple / list, "gpt4o/deepseek" or a legacy
+    result key ("gpt4o_deepseek", "gpt4o_formatter_on_gpt4o_deepseek"). None when it is not one.
+    """
+    if isinstance(path, (tuple, list)):
+        names = tuple(path)
+    elif "/" in path:
+        names = tuple(path.split("/"))
+    elif "_formatter_on_" in path:
+        formatter, rest = path.split("_formatter_on_", 1)
+        names = tuple(rest.split("_")) + (formatter,)
+    else:
+        names = tuple(path.split("_"))
+    if not 0 < len(names) <= len(LAYERS) or any(name not in MODEL_CLASSES for name in names):
+        return None
+    return names
+
+
+class ResultsStore:
+    """
+    Pipeline outputs in SQLite, one row per (report_id, stage, model_path, prompt_version).
+
+    Rows are appended (or replaced) individually, so a new variant adds its rows without
+    rewriting or rereading earlier ones. The primary key serves lookups by report and
+    idx_results_path lookups by model path. `model_path` is stored as "gpt4o/deepseek/gpt4o";
+    frames also carry the legacy key ("gpt4o_formatter_on_gpt4o_deepseek") as `pipeline`.
+    """
+
+    def __init__(self, path=DEFAULT_RESULTS_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "report_id INTEGER NOT NULL, stage TEXT NOT NULL, model_path TEXT NOT NULL, "
+                "prompt_version TEXT NOT NULL DEFAULT '', output TEXT, created_at REAL, "
+                "PRIMARY KEY (report_id, stage, model_path, prompt_version))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_path ON results(model_path, prompt_version)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS reports (report_id INTEGER PRIMARY KEY, source TEXT, target TEXT)")
+            self._conn.commit()
+        return self._conn
+
+    def append_many(self, rows) -> int:
+        """
+        Writes (report_id, model_path, output[, prompt_version]) rows in one transaction;
+        an existing row with the same key is replaced. Returns the number of rows written.
+        """
+        now = time.time()
+        values = []
+        for row in rows:
+            report_id, path, output = row[:3]
+            prompt_version = row[3] if len(row) > 3 else ""
+            names = parse_path(path)
+            if names is None:
+                raise ValueError(f"not a model path: {path!r}")
+            values.append((int(report_id), LAYERS[len(names) - 1], "/".join(names), prompt_version, output, now))
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO results (report_id, stage, model_path, prompt_version, output, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                values,
+            )
+            conn.commit()
+        return len(values)
+
+    def append(self, report_id, path, output, prompt_version: str = ""):
+        self.append_many([(report_id, path, output, prompt_version)])
+
+    def add_reports(self, entries: list, index_key: str = "index"):
+        """
+        Stores source (and target, when present) of each entry under its report id.
+        """
+        values = [
+            (int(entry.get(index_key, position)), entry.get("source"), entry.get("target"))
+            for position, entry in enumerate(entries)
+        ]
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT INTO reports (report_id, source, target) VALUES (?, ?, ?) ON CONFLICT(report_id) DO UPDATE SET "
+                "source = COALESCE(excluded.source, source), target = COALESCE(excluded.target, target)",
+                values,
+            )
+            conn.commit()
+
+    def get(self, report_id, path, prompt_version: str = ""):
+        """
+        Output of one model path for one report, or None.
+        """
+        names = parse_path(path)
+        if names is None:
+            return None
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT output FROM results WHERE report_id = ? AND stage = ? AND model_path = ? AND prompt_version = ?",
+                (int(report_id), LAYERS[len(names) - 1], "/".join(names), prompt_version),
+            ).fetchone()
+        return row[0] if row else None
+
+    def for_report(self, report_id, prompt_version: str = "") -> dict:
+        """
+        {legacy key: output} of every path stored for a report.
+        """
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT model_path, output FROM results WHERE report_id = ? AND prompt_version = ?",
+                (int(report_id), prompt_version),
+            ).fetchall()
+        return {path_key(tuple(model_path.split("/"))): output for model_path, output in rows}
+
+    def _select(self, paths=None, stage=None, report_ids=None, prompt_version=None) -> list:
+        clauses, params = [], []
+        if paths is not None:
+            model_paths = ["/".join(parse_path(p) or ()) for p in paths]
+            clauses.append(f"r.model_path IN ({', '.join('?' * len(model_paths))})")
+            params += model_paths
+        if stage is not None:
+            clauses.append("r.stage = ?")
+            params.append(stage)
+        if report_ids is not None:
+            report_ids = [int(i) for i in report_ids]
+            clauses.append(f"r.report_id IN ({', '.join('?' * len(report_ids))})")
+            params += report_ids
+        if prompt_version is not None:
+            clauses.append("r.prompt_version = ?")
+            params.append(prompt_version)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            return self._connect().execute(
+                "SELECT r.report_id, r.stage, r.model_path, r.prompt_version, r.output, p.source, p.target "
+                f"FROM results r LEFT JOIN reports p ON p.report_id = r.report_id {where} "
+                "ORDER BY r.report_id, r.model_path",
+                params,
+            ).fetchall()
+
+    def query(self, paths=None, stage=None, report_ids=None, prompt_version=None):
+        """
+        Long pandas frame (one row per stored output) filtered by paths, stage, reports and prompt version.
+        """
+        import pandas as pd
+        columns = ["report_id", "stage", "model_path", "prompt_version", "output", "source", "target"]
+        df = pd.DataFrame(self._select(paths, stage, report_ids, prompt_version), columns=columns)
+        df.insert(3, "pipeline", [path_key(tuple(p.split("/"))) for p in df["model_path"]])
+        return df
+
+    def wide(self, paths=None, stage=None, prompt_version: str = ""):
+        """
+        One row per report with source, target and one column per pipeline key, i.e. the
+        layout of formatter_results.json as a frame.
+        """
+        df = self.query(paths, stage, prompt_version=prompt_version)
+        wide = df.pivot(index="report_id", columns="pipeline", values="output")
+        wide.columns.name = None
+        texts = df.drop_duplicates("report_id").set_index("report_id")[["source", "target"]]
+        return texts.join(wide)
+
+    def entries(self, paths=None, stage=None, prompt_version: str = "") -> list:
+        """
+        The wide frame as a list of {"index", "source", <pipeline key>: output} dicts, the input
+        MetricEngine.score_entries and JudgeRunner.run take in pipeline_eval.
+        """
+        entries = []
+        for report_id, row in self.wide(paths, stage, prompt_version).iterrows():
+            entry = {"index": int(report_id)}
+            entry.update({k: v for k, v in row.items() if isinstance(v, str)})
+            entries.append(entry)
+        return entries
+
+    def paths(self) -> list:
+        with self._lock:
+            return [row[0] for row in self._connect().execute(
+                "SELECT DISTINCT model_path FROM results ORDER BY model_path").fetchall()]
+
+    def import_json(self, path, prompt_version: str = "", index_key: str = "index") -> int:
+        """
+        Imports a legacy result file (a list of entries with output columns such as "gpt4o",
+        "gpt4o_deepseek" or "gpt4o_formatter_on_gpt4o_deepseek"). Returns the rows written.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        self.add_reports(entries, index_key)
+        rows = []
+        for position, entry in enumerate(entries):
+            report_id = entry.get(index_key, position)
+            for key, output in entry.items():
+                if key not in ENTRY_FIELDS and isinstance(output, str) and parse_path(key):
+                    rows.append((report_id, key, output, prompt_version))
+        return self.append_many(rows)
+
+    def import_journal(self, path, prompt_version: str = "") -> int:
+        """
+        Imports a batch_runner / tree_executor journal (JSONL of {"index", "variant", "output"}).
+        """
+        rows = [
+            (record["index"], record["variant"], record["output"], prompt_version)
+            for record in read_journal(path)
+            if parse_path(record["variant"])
+        ]
+        return self.append_many(rows)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,4 +1,8 @@
 import os
+import sys
+import json
+import time
+import asyncio
 from dotenv import load_dotenv
 from dotenv import find_dotenv
 from openai import OpenAI
@@ -6,27 +10,82 @@ import openai
 from pathlib import Path
 import pprint
 
+sys.path.append(str(Path(__file__).resolve().parent.parent / "lm_model_classes"))
+from response_cache import get_cache, make_key, should_cache
+from call_metrics import get_sink
+from streaming import stream_completion, stream_stages
+from resilience import call_with_retry
+
 
 load_dotenv(find_dotenv())
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
 openai.api_key = OPENAI_API_KEY
 
-client = OpenAI(api_key=OPENAI_API_KEY)
-
-def gpt_simplify(prompt, model="gpt-4o", temperature=0.7, max_tokens=800):
+# retries are done by resilience.call_with_retry so they show up in the call metrics
+client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL, max_retries=0, timeout=120.0)
+
+SECTIONS = ("Diagnosis", "Treatment", "Next Steps", "Other Information")
+
+# structured output of the fused mode: every stage of simplify() in one JSON object, in stage
+# order, so each field is generated after (and from) the one before it
+FUSED_SCHEMA = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "staged_simplification",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "lexical": {"type": "string"},
+                "syntactic": {"type": "string"},
+                "formatted": {"type": "string"},
+                "sections": {
+                    "type": "object",
+                    "properties": {name: {"type": "string"} for name in SECTIONS},
+                    "required": list(SECTIONS),
+                    "additionalProperties": False,
+                },
+            },
+            "required": ["lexical", "syntactic", "formatted", "sections"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+MODES = ("staged", "fused")
+
+
+def gpt_simplify(prompt, model="gpt-4o", temperature=0.7, max_tokens=800, stage=None, response_format=None, cache=None):
     """
     Calls the OpenAI GPT API with a user-defined prompt using the new >=1.0.0 API.
+    `response_format` (e.g. FUSED_SCHEMA) is passed through and is part of the cache key.
+    At the default temperature 0.7 responses are only cached with cache=True.
     """
     messages = [{"role": "user", "content": prompt}]
+    start = time.perf_counter()
+    extra = {"response_format": response_format} if response_format else {}
+    key = make_key(model=model, messages=messages, temperature=temperature, max_tokens=max_tokens, **extra)
+    cache = should_cache(temperature, cache)
+    cached = get_cache().lookup(key) if cache else None
+    if cached is not None:
+        get_sink().record("openai", model, stage, time.perf_counter() - start, response_cache_hit=True)
+        return cached
     try:
-        response = client.chat.completions.create(
+        response, retries = call_with_retry("openai", lambda: client.chat.completions.create(
             model=model,
             messages=messages,
             temperature=temperature,
-            max_tokens=max_tokens
-        )
-        return response.choices[0].message.content.strip()
+            max_tokens=max_tokens,
+            **extra
+        ))
+        content = response.choices[0].message.content.strip()
+        get_sink().record("openai", model, stage, time.perf_counter() - start, usage=response.usage, retries=retries)
+        if cache:
+            get_cache().store(key, model, content)
+        return content
     except Exception as e:
+        get_sink().record("openai", model, stage, time.perf_counter() - start, retries=getattr(e, "retries", 0), error=str(e))
         print(f"[GPT ERROR] {e}")
         return ""
 
@@ -38,34 +97,46 @@ class BaselineSimplificationPipeline:
     2. Syntactic simplification
     3. Format summarization
     4. Dynamic summarization
+
+    mode="fused" produces all four in a single structured-output call instead of four
+    sequential round trips; simplify(text, mode=...) overrides it per request.
     """
 
-    def __init__(self, model="gpt-4o"):
+    def __init__(self, model="gpt-4o", mode="staged"):
+        if mode not in MODES:
+            raise ValueError(f"unknown mode {mode}, expected one of {MODES}")
         self.model = model
+        self.mode = mode
 
-    def lexical_simplification(self, text: str) -> str:
-        prompt = (
+    def _lexical_prompt(self, text: str) -> str:
+        return (
             f"You are a medical language simplification assistant. Your task is to replace all complex medical jargon "
             f"in the following text with plain, layman-friendly language, without changing the meaning.\n\n"
             f"Text:\n{text}"
         )
-        return gpt_simplify(prompt, model=self.model)
 
-    def syntactic_simplification(self, text: str) -> str:
-        prompt = (
+    def _syntactic_prompt(self, text: str) -> str:
+        return (
             f"You are a text simplifier. Break the following medical text into shorter, simpler, and more readable sentences. "
             f"Avoid unnecessary repetition, and keep the meaning intact.\n\n"
             f"Text:\n{text}"
         )
-        return gpt_simplify(prompt, model=self.model)
 
-    def format_summarization(self, text: str) -> str:
-        prompt = (
+    def _format_prompt(self, text: str) -> str:
+        return (
             f"You are a summarization assistant. Improve the paragraph structure and logical flow of the following simplified medical text. "
             f"Group related ideas together and ensure the output is clean and easy to read.\n\n"
             f"Text:\n{text}"
         )
-        return gpt_simplify(prompt, model=self.model)
+
+    def lexical_simplification(self, text: str) -> str:
+        return gpt_simplify(self._lexical_prompt(text), model=self.model, stage="lexical")
+
+    def syntactic_simplification(self, text: str) -> str:
+        return gpt_simplify(self._syntactic_prompt(text), model=self.model, stage="syntactic")
+
+    def format_summarization(self, text: str) -> str:
+        return gpt_simplify(self._format_prompt(text), model=self.model, stage="format")
 
     def dynamic_summarization(self, text: str) -> dict:
         prompt = (
@@ -73,25 +144,64 @@ class BaselineSimplificationPipeline:
             f"'Diagnosis', 'Treatment', 'Next Steps', and 'Other Information'. Return the result as a JSON object with clear labels.\n\n"
             f"Text:\n{text}"
         )
-        response = gpt_simplify(prompt, model=self.model)
+        response = gpt_simplify(prompt, model=self.model, stage="dynamic")
         try:
-            import json
             return json.loads(response)
         except json.JSONDecodeError:
             return {"raw_output": response, "error": "Could not parse JSON"}
 
-    def simplify(self, text: str) -> dict:
+    def _fused_prompt(self, text: str) -> str:
+        return (
+            f"You are a medical language simplification assistant for patients. Simplify the medical text below in four "
+            f"steps and return every step in the JSON fields given:\n"
+            f"lexical: replace all complex medical jargon with plain, layman-friendly language, without changing the meaning.\n"
+            f"syntactic: break the lexical version into shorter, simpler, and more readable sentences. Avoid unnecessary "
+            f"repetition, and keep the meaning intact.\n"
+            f"formatted: improve the paragraph structure and logical flow of the syntactic version. Group related ideas "
+            f"together and ensure the output is clean and easy to read.\n"
+            f"sections: from the formatted version, the 'Diagnosis', 'Treatment', 'Next Steps', and 'Other Information' "
+            f"for the patient (an empty string when the text has none).\n\n"
+            f"Text:\n{text}"
+        )
+
+    def fused_simplification(self, text: str) -> dict:
+        """
+        All stages in one call. The output has the shape of the staged simplify(); on an unparseable
+        reply (e.g. cut off at max_tokens) the stages are "" and final_output carries the raw text.
+        """
+        response = gpt_simplify(self._fused_prompt(text), model=self.model, max_tokens=3200, stage="fused",
+                                response_format=FUSED_SCHEMA)
+        try:
+            result = json.loads(response)
+        except json.JSONDecodeError:
+            return {"lexical": "", "syntactic": "", "formatted": "",
+                    "final_output": {"raw_output": response, "error": "Could not parse JSON"}}
+        return {
+            "lexical": result["lexical"],
+            "syntactic": result["syntactic"],
+            "formatted": result["formatted"],
+            "final_output": result["sections"],
+        }
+
+    def simplify(self, text: str, mode: str = None) -> dict:
+        mode = mode or self.mode
+        if mode not in MODES:
+            raise ValueError(f"unknown mode {mode}, expected one of {MODES}")
+        if mode == "fused":
+            print("[Fused] Lexical + Syntactic + Format + Dynamic Summarization")
+            return self.fused_simplification(text)
+
         print("[Stage 1] Lexical Simplification")
         lex = self.lexical_simplification(text)
 
         print("[Stage 2] Syntactic Simplification")
-        synt = self.syntactic_simplification(lex)
+        synt = self.syntactic_simplification(lex) if lex else ""
 
         print("[Stage 3] Format Summarization")
-        formatted = self.format_summarization(synt)
+        formatted = self.format_summarization(synt) if synt else ""
 
         print("[Stage 4] Dynamic Summarization")
-        dynamic = self.dynamic_summarization(formatted)
+        dynamic = self.dynamic_summarization(formatted) if formatted else {}
 
         return {
             "lexical": lex,
@@ -99,6 +209,31 @@ class BaselineSimplificationPipeline:
             "formatted": formatted,
             "final_output": dynamic
         }
+
+    async def simplify_stream(self, text: str, min_chars: int = 200):
+        """
+        Streaming simplify(): yields {"stage", "delta"} events as tokens arrive and
+        {"stage", "text"} when a stage finishes; the syntactic stage starts on completed
+        sentences of the lexical output. Formatting and the JSON sections need the whole
+        text, so the formatter runs once on the complete syntactic text and dynamic
+        summarization runs last, arriving as the "final_output" event.
+        """
+        def stage(prompt_fn, name):
+            messages = lambda t: [{"role": "user", "content": prompt_fn(t)}]
+            return lambda t: stream_completion("openai", self.model, messages(t), temperature=0.7, max_tokens=800, stage=name)
+
+        stages = [
+            ("lexical", stage(self._lexical_prompt, "lexical")),
+            ("syntactic", stage(self._syntactic_prompt, "syntactic")),
+            ("formatted", stage(self._format_prompt, "format")),
+        ]
+        formatted = ""
+        async for event in stream_stages(text, stages, min_chars, whole_input=("formatted",)):
+            yield event
+            if event["stage"] == "formatted" and "text" in event:
+                formatted = event["text"]
+        dynamic = await asyncio.to_thread(self.dynamic_summarization, formatted) if formatted else {}
+        yield {"stage": "final_output", "text": dynamic}
         
 if __name__ == "__main__":
     pipeline = BaselineSimplificationPipeline()
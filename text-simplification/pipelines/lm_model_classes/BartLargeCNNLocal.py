@@ -1,4 +1,7 @@
-from transformers import BartTokenizer, BartForConditionalGeneration
+import time
+from batching import length_buckets
+from model_registry import get_registry, no_grad
+from call_metrics import get_sink, generation_usage
 
 class BartLargeCNNLocal:
     """
@@ -8,36 +11,80 @@ class BartLargeCNNLocal:
     3. Format summarization
     """
 
-    def __init__(self, model_name="facebook/bart-large-cnn"):
+    def __init__(self, model_name="facebook/bart-large-cnn", backend="torch"):
+        """
+        Weights come from the process-wide model registry, so constructing the class again
+        reuses the loaded model. backend="onnx" runs an int8-quantized ONNX export on
+        ONNX Runtime CPU (see onnx_backend.py).
+        """
         self.model_name = model_name
-        self.tokenizer = BartTokenizer.from_pretrained(model_name)
-        self.model = BartForConditionalGeneration.from_pretrained(model_name)
+        self.backend = backend
+        self.tokenizer, self.model = get_registry().get(
+            model_name, device="cpu", backend=backend,
+            tokenizer_class="BartTokenizer", model_class="BartForConditionalGeneration",
+        )
 
-    def _generate(self, prompt: str, max_new_tokens: int = 256) -> str:
+    def _generate(self, prompt: str, max_new_tokens: int = 256, stage: str = None) -> str:
+        start = time.perf_counter()
         inputs = self.tokenizer(prompt, return_tensors="pt", truncation=True, max_length=1024)
         outputs = self.model.generate(**inputs, max_new_tokens=max_new_tokens)
+        get_sink().record("local", self.model_name, stage, time.perf_counter() - start,
+                          usage=generation_usage(inputs, outputs, self.tokenizer.pad_token_id))
         return self.tokenizer.decode(outputs[0], skip_special_tokens=True)
 
-    def lexical_simplification(self, text: str) -> str:
-        prompt = (
+    def _generate_batch(self, prompts: list, max_new_tokens: int = 256, batch_size: int = 8, max_batch_tokens: int = None, stage: str = None) -> list:
+        """
+        Batched _generate. Sorting by token length keeps padding per batch small;
+        results are returned in the order of `prompts`.
+        """
+        lengths = [len(ids) for ids in self.tokenizer(prompts, truncation=True, max_length=1024)["input_ids"]]
+        outputs = [None] * len(prompts)
+        for batch in length_buckets(lengths, batch_size, max_batch_tokens):
+            start = time.perf_counter()
+            inputs = self.tokenizer([prompts[i] for i in batch], return_tensors="pt", truncation=True, max_length=1024, padding=True)
+            with no_grad():
+                generated = self.model.generate(**inputs, max_new_tokens=max_new_tokens)
+            get_sink().record("local", self.model_name, stage, time.perf_counter() - start,
+                              usage=generation_usage(inputs, generated, self.tokenizer.pad_token_id), batch_size=len(batch))
+            for i, text in zip(batch, self.tokenizer.batch_decode(generated, skip_special_tokens=True)):
+                outputs[i] = text
+        return outputs
+
+    def _lexical_prompt(self, text: str) -> str:
+        return (
             f"Simplify the medical jargon in the following text using layman-friendly terms:\n\n{text}"
         )
-        return self._generate(prompt)
 
-    def syntactic_simplification(self, text: str) -> str:
-        prompt = (
+    def _syntactic_prompt(self, text: str) -> str:
+        return (
             "Rewrite the following medical passage into multiple shorter sentences. "
             "Make each sentence clear and easy to read, without changing any medical information. "
             "Keep the vocabulary as is — do not use simpler terms.\n\n"
             f"{text}"
         )
-        return self._generate(prompt)
 
-    def format_summarization(self, text: str) -> str:
-        prompt = (
+    def _format_prompt(self, text: str) -> str:
+        return (
             f"Restructure and summarize the following medical text into clean, readable paragraphs:\n\n{text}"
         )
-        return self._generate(prompt)
+
+    def lexical_simplification(self, text: str) -> str:
+        return self._generate(self._lexical_prompt(text), stage="lexical")
+
+    def syntactic_simplification(self, text: str) -> str:
+        return self._generate(self._syntactic_prompt(text), stage="syntactic")
+
+    def format_summarization(self, text: str) -> str:
+        return self._generate(self._format_prompt(text), stage="format")
+
+    def lexical_simplification_batch(self, texts: list, batch_size: int = 8) -> list:
+        return self._generate_batch([self._lexical_prompt(t) for t in texts], batch_size=batch_size, stage="lexical")
+
+    def syntactic_simplification_batch(self, texts: list, batch_size: int = 8) -> list:
+        return self._generate_batch([self._syntactic_prompt(t) for t in texts], batch_size=batch_size, stage="syntactic")
+
+    def format_summarization_batch(self, texts: list, batch_size: int = 8) -> list:
+        return self._generate_batch([self._format_prompt(t) for t in texts], batch_size=batch_size, stage="format")
 
     def simplify(self, text: str) -> dict:
         print("[Stage 1] Lexical Simplification")
@@ -55,6 +102,18 @@ class BartLargeCNNLocal:
             "formatted": formatted,
         }
 
+    def simplify_batch(self, texts: list, batch_size: int = 8) -> list:
+        """
+        simplify() over many reports with one batched generate pass per stage.
+        """
+        lex = self.lexical_simplification_batch(texts, batch_size)
+        synt = self.syntactic_simplification_batch(lex, batch_size)
+        formatted = self.format_summarization_batch(synt, batch_size)
+        return [
+            {"lexical": l, "syntactic": s, "formatted": f}
+            for l, s, f in zip(lex, synt, formatted)
+        ]
+
 if __name__ == "__main__":
     model = BartLargeCNNLocal()
     # input_text = "The patient experienced a myocardial infarction and was prescribed acetylsalicylic acid."
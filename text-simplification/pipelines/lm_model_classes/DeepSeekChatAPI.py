@@ -5,31 +5,94 @@ from pathlib import Path
 import pprint
 import requests
 import json
+import time
+from api_transport import chat_payload, few_shot_messages, get_transport
+from response_cache import get_cache
+from prompts import LEXICAL_SYSTEM, LEXICAL_EXAMPLES, SYNTACTIC_SYSTEM, SYNTACTIC_EXAMPLES
+from call_metrics import get_sink
+from streaming import stream_completion, stream_stages
+from resilience import call_with_retry, call_with_retry_async
 
 
 load_dotenv(find_dotenv())
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
+DEEPSEEK_BASE_URL = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com/v1")
+DEEPSEEK_API_URL = f"{DEEPSEEK_BASE_URL.rstrip('/')}/chat/completions"
+
+# one keep-alive session for every call instead of a fresh connection per request
+session = requests.Session()
+session.headers.update({
+    "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
+    "Content-Type": "application/json"
+})
+
+def _as_messages(prompt) -> list:
+    return [{"role": "user", "content": prompt}] if isinstance(prompt, str) else prompt
+
+def _post(payload) -> dict:
+    response = session.post(DEEPSEEK_API_URL, data=json.dumps(payload), timeout=(10, 120))
+    response.raise_for_status()
+    return response.json()
+
+# Format prompt (the lexical and syntactic ones are in prompts.py). DeepSeek caches every repeated
+# prompt prefix (64-token units) on its own, so the system prompt and few-shot turns come first and
+# stay byte-stable; the report is the last turn.
+FORMAT_SYSTEM = (
+    "You are a professional medical editor specializing in patient education materials.\n"
+    "Your task is to take simplified clinical text and polish it into clear, coherent, and fluent English suitable for patients.\n"
+    "Keep all medical facts accurate — do not add or remove any factual content.\n"
+    "Make the text smooth, grammatically correct, and supportive in tone.\n"
+    "Return plain text only. No titles, markdown, or extra commentary."
+)
+FORMAT_EXAMPLES = [
+    ("The meta-analysis included 894 men. No studies reported live birth. The combined fixed-effect odds ratio (OR) of the 10 studies for the outcome of pregnancy was 1.47 (95% CI 1.05 to 2.05), favouring the intervention. [...]",
+     "This review analysed 10 studies (894 participants) and found evidence (combined odds ratio was 1.47 (95% CI 1.05 to 2.05)) to suggest an increase in pregnancy rates after varicocele treatment compared to no treatment in subfertile couples. [...]"),
+    ("Six studies comprising nearly 450 patients were included. In general the quality of the studies was good. [...]",
+     "The review authors included five randomised and one controlled clinical trial involving a total of nearly 450 patients. In general the quality of the studies was good. [...]"),
+    ("Only two eligible trials were included (593 patients), both of reasonable quality although one was unblinded. [...]",
+     "We reviewed the trials that compared giving MAO-B inhibitors with other types of medication in people with early Parkinson's disease. However, only two trials were found (593 patients), so the evidence is limited. [...]"),
+]
+
+def deepseek_simplify(prompt, model="deepseek-chat", temperature=0.0, max_tokens=500, stage=None, cache=None):
+    """
+    Calls the DeepSeek API with a user-defined prompt (a string, sent as one user message,
+    or a list of chat messages).
+    """
+    payload = chat_payload(model, _as_messages(prompt), temperature, max_tokens)
+    start = time.perf_counter()
+    cached = get_cache().get(model, payload["messages"], temperature, max_tokens, cache=cache)
+    if cached is not None:
+        get_sink().record("deepseek", model, stage, time.perf_counter() - start, response_cache_hit=True)
+        return cached
+    try:
+        body, retries = call_with_retry("deepseek", lambda: _post(payload))
+        content = body["choices"][0]["message"]["content"].strip()
+        get_sink().record("deepseek", model, stage, time.perf_counter() - start, usage=body.get("usage"), retries=retries)
+        get_cache().put(model, payload["messages"], temperature, max_tokens, content, cache=cache)
+        return content
+    except Exception as e:
+        get_sink().record("deepseek", model, stage, time.perf_counter() - start, retries=getattr(e, "retries", 0), error=str(e))
+        print(f"[DeepSeek ERROR] {e}")
+        return ""
 
-def deepseek_simplify(prompt, model="deepseek-chat", temperature=0.0, max_tokens=500):
+async def deepseek_simplify_async(prompt, model="deepseek-chat", temperature=0.0, max_tokens=500, stage=None, cache=None):
     """
-    Calls the DeepSeek API with a user-defined prompt.
+    Async variant of deepseek_simplify over the shared pooled transport.
     """
-    url = "https://api.deepseek.com/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "model": model,
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": temperature,
-        "max_tokens": max_tokens
-    }
+    payload = chat_payload(model, _as_messages(prompt), temperature, max_tokens)
+    start = time.perf_counter()
+    cached = get_cache().get(model, payload["messages"], temperature, max_tokens, cache=cache)
+    if cached is not None:
+        get_sink().record("deepseek", model, stage, time.perf_counter() - start, response_cache_hit=True)
+        return cached
     try:
-        response = requests.post(url, headers=headers, data=json.dumps(payload))
-        response.raise_for_status()
-        return response.json()["choices"][0]["message"]["content"].strip()
+        body, retries = await call_with_retry_async("deepseek", lambda: get_transport().chat("deepseek", payload))
+        content = body["choices"][0]["message"]["content"].strip()
+        get_sink().record("deepseek", model, stage, time.perf_counter() - start, usage=body.get("usage"), retries=retries)
+        get_cache().put(model, payload["messages"], temperature, max_tokens, content, cache=cache)
+        return content
     except Exception as e:
+        get_sink().record("deepseek", model, stage, time.perf_counter() - start, retries=getattr(e, "retries", 0), error=str(e))
         print(f"[DeepSeek ERROR] {e}")
         return ""
 
@@ -41,65 +104,32 @@ class DeepSeekChatAPI:
     def __init__(self, model="deepseek-chat"):
         self.model = model
 
-    def lexical_simplification(self, text: str) -> str:
-        prompt = (
-    "You are a medical language simplification assistant. Your task is to rewrite complex medical sentences "
-    "using simpler vocabulary without changing the original meaning. Do not explain or remove information—only "
-    "replace terms with simpler equivalents. Break up long sentences where needed. Return plain text only.\n\n"
-    "Original: The patient presented with dyspnea and required supplemental oxygen.\n"
-    "Simplified: The patient had trouble breathing and needed extra oxygen.\n\n"
-    "Original: Administer acetaminophen PRN for febrile episodes exceeding 38°C.\n"
-    "Simplified: Give acetaminophen when needed if the fever goes above 38°C.\n\n"
-    "Original: Hypertension was managed conservatively without pharmacological intervention.\n"
-    "Simplified: High blood pressure was controlled without using medicine.\n\n"
-    "Original: A colonoscopy was recommended to rule out neoplastic changes.\n"
-    "Simplified: A colonoscopy was suggested to check for signs of cancer.\n\n"
-    f"Original: {text}\nSimplified:"
-)
+    def _lexical_messages(self, text: str) -> list:
+        return few_shot_messages(LEXICAL_SYSTEM, LEXICAL_EXAMPLES, text)
 
-        return deepseek_simplify(prompt, model=self.model)
+    def _syntactic_messages(self, text: str) -> list:
+        return few_shot_messages(SYNTACTIC_SYSTEM, SYNTACTIC_EXAMPLES, text)
 
-    def syntactic_simplification(self, text: str) -> str:
-        prompt = (
-            "You are a syntactic simplifier specializing in medical text. Your task is to break down long or complex sentences "
-            "into multiple shorter, simpler sentences while keeping the meaning exactly the same. "
-            "Do not remove or add any information. Do not summarize or simplify vocabulary. Only modify sentence structure for clarity.\n\n"
-            "Output plain text only. No bullet points, no markdown, no extra formatting.\n\n"
-
-            "Original: The patient was admitted for chest pain, which started three hours prior and was accompanied by shortness of breath and sweating.\n"
-            "Simplified: The patient was admitted for chest pain. The pain started three hours earlier. It was accompanied by shortness of breath and sweating.\n\n"
-            
-            "Original: Follow-up imaging was performed to evaluate the effectiveness of the prescribed antibiotics in resolving the patient's pneumonia.\n"
-            "Simplified: Follow-up imaging was performed. It was done to evaluate whether the antibiotics were helping to resolve the patient’s pneumonia.\n\n"
-            
-            "Original: The patient denied experiencing any nausea, vomiting, or changes in bowel habits but reported increased fatigue and occasional dizziness.\n"
-            "Simplified: The patient did not experience nausea, vomiting, or changes in bowel habits. However, they reported feeling more tired. They also experienced occasional dizziness.\n\n"
-
-            f"Original: {text}\nSimplified:"
-        )
-        return deepseek_simplify(prompt, model=self.model)
+    def _format_messages(self, text: str) -> list:
+        return few_shot_messages(FORMAT_SYSTEM, FORMAT_EXAMPLES, text, input_label="Input")
+
+    def lexical_simplification(self, text: str) -> str:
+        return deepseek_simplify(self._lexical_messages(text), model=self.model, stage="lexical")
 
+    def syntactic_simplification(self, text: str) -> str:
+        return deepseek_simplify(self._syntactic_messages(text), model=self.model, stage="syntactic")
 
     def format_summarization(self, text: str) -> str:
-        prompt = (
-            "You are a professional medical editor specializing in patient education materials.\n"
-            "Your task is to take simplified clinical text and polish it into clear, coherent, and fluent English suitable for patients.\n"
-            "Keep all medical facts accurate — do not add or remove any factual content.\n"
-            "Make the text smooth, grammatically correct, and supportive in tone.\n"
-            "Return plain text only. No titles, markdown, or extra commentary.\n\n"
-
-            "Input: The meta-analysis included 894 men. No studies reported live birth. The combined fixed-effect odds ratio (OR) of the 10 studies for the outcome of pregnancy was 1.47 (95% CI 1.05 to 2.05), favouring the intervention. [...] \n"
-            "Polished: This review analysed 10 studies (894 participants) and found evidence (combined odds ratio was 1.47 (95% CI 1.05 to 2.05)) to suggest an increase in pregnancy rates after varicocele treatment compared to no treatment in subfertile couples. [...]\n\n"
+        return deepseek_simplify(self._format_messages(text), model=self.model, stage="format")
 
-            "Input: Six studies comprising nearly 450 patients were included. In general the quality of the studies was good. [...] \n"
-            "Polished: The review authors included five randomised and one controlled clinical trial involving a total of nearly 450 patients. In general the quality of the studies was good. [...]\n\n"
+    async def lexical_simplification_async(self, text: str) -> str:
+        return await deepseek_simplify_async(self._lexical_messages(text), model=self.model, stage="lexical")
 
-            "Input: Only two eligible trials were included (593 patients), both of reasonable quality although one was unblinded. [...] \n"
-            "Polished: We reviewed the trials that compared giving MAO-B inhibitors with other types of medication in people with early Parkinson's disease. However, only two trials were found (593 patients), so the evidence is limited. [...]\n\n"
+    async def syntactic_simplification_async(self, text: str) -> str:
+        return await deepseek_simplify_async(self._syntactic_messages(text), model=self.model, stage="syntactic")
 
-            f"Input: {text}\nPolished:"
-        )
-        return deepseek_simplify(prompt, model=self.model)
+    async def format_summarization_async(self, text: str) -> str:
+        return await deepseek_simplify_async(self._format_messages(text), model=self.model, stage="format")
 
 
 
@@ -108,10 +138,10 @@ class DeepSeekChatAPI:
         lex = self.lexical_simplification(text)
 
         print("[Stage 2] Syntactic Simplification")
-        synt = self.syntactic_simplification(lex)
+        synt = self.syntactic_simplification(lex) if lex else ""
 
         print("[Stage 3] Format Summarization")
-        formatted = self.format_summarization(synt)
+        formatted = self.format_summarization(synt) if synt else ""
 
         return {
             "lexical": lex,
@@ -119,6 +149,35 @@ class DeepSeekChatAPI:
             "formatted": formatted,
         }
 
+    async def simplify_async(self, text: str) -> dict:
+        """
+        Async counterpart of simplify() for fanning out over many reports.
+        """
+        lex = await self.lexical_simplification_async(text)
+        synt = await self.syntactic_simplification_async(lex) if lex else ""
+        formatted = await self.format_summarization_async(synt) if synt else ""
+
+        return {
+            "lexical": lex,
+            "syntactic": synt,
+            "formatted": formatted,
+        }
+
+    async def simplify_stream(self, text: str, min_chars: int = 200):
+        """
+        Streaming simplify(); see GPT4oAPI.simplify_stream for the event format.
+        """
+        def stage(messages_fn, name):
+            return lambda t: stream_completion("deepseek", self.model, messages_fn(t), stage=name)
+
+        stages = [
+            ("lexical", stage(self._lexical_messages, "lexical")),
+            ("syntactic", stage(self._syntactic_messages, "syntactic")),
+            ("formatted", stage(self._format_messages, "format")),
+        ]
+        async for event in stream_stages(text, stages, min_chars, whole_input=("formatted",)):
+            yield event
+
 
 if __name__ == "__main__":
     pipeline = DeepSeekChatAPI()
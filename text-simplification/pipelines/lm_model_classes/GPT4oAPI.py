@@ -1,27 +1,84 @@
 import os
+import time
 from dotenv import load_dotenv, find_dotenv
 from pathlib import Path
 import pprint
 from openai import OpenAI  # ✅ THIS is new in SDK 1.0+
+from api_transport import chat_payload, few_shot_messages, get_transport, prompt_cache_key
+from response_cache import get_cache
+from prompts import LEXICAL_SYSTEM, LEXICAL_EXAMPLES, SYNTACTIC_SYSTEM, SYNTACTIC_EXAMPLES
+from call_metrics import get_sink
+from streaming import stream_completion, stream_stages
+from resilience import call_with_retry, call_with_retry_async
 load_dotenv(find_dotenv())
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# retries are done by resilience.call_with_retry so they show up in the call metrics
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=os.getenv("OPENAI_BASE_URL"), max_retries=0, timeout=120.0)
 
 
-def gpt_4o_simplify(messages: list, model="gpt-4o", temperature=0.0, max_tokens=500):
+def gpt_4o_simplify(messages: list, model="gpt-4o", temperature=0.0, max_tokens=500, stage=None, cache=None):
+    start = time.perf_counter()
+    cached = get_cache().get(model, messages, temperature, max_tokens, cache=cache)
+    if cached is not None:
+        get_sink().record("openai", model, stage, time.perf_counter() - start, response_cache_hit=True)
+        return cached
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens
-        )
-        return response.choices[0].message.content.strip()
+        payload = chat_payload(model, messages, temperature, max_tokens)
+        # prompt_cache_key goes through extra_body so older SDKs without the argument still work
+        extra_body = {"prompt_cache_key": prompt_cache_key("openai", stage)} if stage else None
+        response, retries = call_with_retry("openai", lambda: client.chat.completions.create(**payload, extra_body=extra_body))
+        content = response.choices[0].message.content.strip()
+        get_sink().record("openai", model, stage, time.perf_counter() - start, usage=response.usage, retries=retries)
+        get_cache().put(model, messages, temperature, max_tokens, content, cache=cache)
+        return content
     except Exception as e:
+        get_sink().record("openai", model, stage, time.perf_counter() - start, retries=getattr(e, "retries", 0), error=str(e))
         print(f"[GPT ERROR] {e}")
         return ""
 
 
+async def gpt_4o_simplify_async(messages: list, model="gpt-4o", temperature=0.0, max_tokens=500, stage=None, cache=None):
+    """
+    Async variant of gpt_4o_simplify over the shared pooled transport.
+    """
+    start = time.perf_counter()
+    cached = get_cache().get(model, messages, temperature, max_tokens, cache=cache)
+    if cached is not None:
+        get_sink().record("openai", model, stage, time.perf_counter() - start, response_cache_hit=True)
+        return cached
+    try:
+        payload = chat_payload(model, messages, temperature, max_tokens, cache_key=prompt_cache_key("openai", stage))
+        body, retries = await call_with_retry_async("openai", lambda: get_transport().chat("openai", payload))
+        content = body["choices"][0]["message"]["content"].strip()
+        get_sink().record("openai", model, stage, time.perf_counter() - start, usage=body.get("usage"), retries=retries)
+        get_cache().put(model, messages, temperature, max_tokens, content, cache=cache)
+        return content
+    except Exception as e:
+        get_sink().record("openai", model, stage, time.perf_counter() - start, retries=getattr(e, "retries", 0), error=str(e))
+        print(f"[GPT ERROR] {e}")
+        return ""
+
+
+# Format prompt; the lexical and syntactic ones are shared with DeepSeekChatAPI (prompts.py).
+# The system prompt and few-shot turns are the static prefix of every format call and are cached
+# by the provider; keep them byte-stable (no per-call content in here).
+FORMAT_SYSTEM = (
+    "You are a professional medical editor specializing in patient education materials. "
+    "Your task is to take simplified clinical text and polish it into clear, coherent, and fluent English suitable for patients. "
+    "Keep all medical facts accurate — do not add or remove any factual content. "
+    "Make the text smooth, grammatically correct, and supportive in tone. "
+    "Return plain text only. No titles, markdown, or extra commentary."
+)
+FORMAT_EXAMPLES = [
+    ("The meta-analysis included 894 men. No studies reported live birth. The combined fixed-effect odds ratio (OR) of the 10 studies for the outcome of pregnancy was 1.47 (95% CI 1.05 to 2.05), favouring the intervention. [...]",
+     "This review analysed 10 studies (894 participants) and found evidence (combined odds ratio was 1.47 (95% CI 1.05 to 2.05)) to suggest an increase in pregnancy rates after varicocele treatment compared to no treatment in subfertile couples. [...]"),
+    ("Six studies comprising nearly 450 patients were included. In general the quality of the studies was good. [...]",
+     "The review authors included five randomised and one controlled clinical trial involving a total of nearly 450 patients. In general the quality of the studies was good. [...]"),
+    ("Only two eligible trials were included (593 patients), both of reasonable quality although one was unblinded. [...]",
+     "We reviewed the trials that compared giving MAO-B inhibitors with other types of medication in people with early Parkinson's disease. However, only two trials were found (593 patients), so the evidence is limited. [...]"),
+]
+
+
 class GPT4oAPI:
     """
     A GPT-based baseline pipeline with four simplification stages:
@@ -34,129 +91,83 @@ class GPT4oAPI:
         self.model = model
 
     
+    def _lexical_messages(self, text: str) -> list:
+        return few_shot_messages(LEXICAL_SYSTEM, LEXICAL_EXAMPLES, text)
+
+    def _syntactic_messages(self, text: str) -> list:
+        return few_shot_messages(SYNTACTIC_SYSTEM, SYNTACTIC_EXAMPLES, text)
+
+    def _format_messages(self, text: str) -> list:
+        return few_shot_messages(FORMAT_SYSTEM, FORMAT_EXAMPLES, text, input_label="Input")
+
     def lexical_simplification(self, text: str) -> str:
         """
         Lexical simplification with full prompt engineering.
         """
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    "You are a medical language simplification assistant. Your task is to rewrite complex medical sentences "
-                    "using simpler vocabulary without changing the original meaning. Do not explain or remove information—only "
-                    "replace terms with simpler equivalents. Break up long sentences where needed. Return plain text only."
-                )
-            },
-            {
-                "role": "user",
-                "content": (
-                    "Original: The patient presented with dyspnea and required supplemental oxygen.\n"
-                    "Simplified: The patient had trouble breathing and needed extra oxygen.\n\n"
-                    "Original: Administer acetaminophen PRN for febrile episodes exceeding 38°C.\n"
-                    "Simplified: Give acetaminophen when needed if the fever goes above 38°C.\n\n"
-                    "Original: Hypertension was managed conservatively without pharmacological intervention.\n"
-                    "Simplified: High blood pressure was controlled without using medicine.\n\n"
-                    "Original: A colonoscopy was recommended to rule out neoplastic changes.\n"
-                    "Simplified: A colonoscopy was suggested to check for signs of cancer.\n\n"
-                    f"Original: {text}\nSimplified:"
-                )
-            }
-        ]
-        return gpt_4o_simplify(messages, model=self.model)
+        return gpt_4o_simplify(self._lexical_messages(text), model=self.model, stage="lexical")
 
     def syntactic_simplification(self, text: str) -> str:
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    "You are a syntactic simplifier specializing in medical text. Your task is to break down long or complex sentences "
-                    "into multiple shorter, simpler sentences while keeping the meaning exactly the same. "
-                    "Do not remove or add any information. Do not summarize or simplify vocabulary. Only modify sentence structure for clarity.\n\n"
-                    "Output plain text only. No bullet points, no markdown, no extra formatting."
-                )
-            },
-            {
-                "role": "user",
-                "content": (
-                    "Original: The patient was admitted for chest pain, which started three hours prior and was accompanied by shortness of breath and sweating.\n"
-                    "Simplified: The patient was admitted for chest pain. The pain started three hours earlier. It was accompanied by shortness of breath and sweating.\n\n"
-                    
-                    "Original: Follow-up imaging was performed to evaluate the effectiveness of the prescribed antibiotics in resolving the patient's pneumonia.\n"
-                    "Simplified: Follow-up imaging was performed. It was done to evaluate whether the antibiotics were helping to resolve the patient’s pneumonia.\n\n"
-                    
-                    "Original: The patient denied experiencing any nausea, vomiting, or changes in bowel habits but reported increased fatigue and occasional dizziness.\n"
-                    "Simplified: The patient did not experience nausea, vomiting, or changes in bowel habits. However, they reported feeling more tired. They also experienced occasional dizziness.\n\n"
-
-                    f"Original: {text}\nSimplified:"
-                )
-            }
-        ]
-        return gpt_4o_simplify(messages, model=self.model)
-    
-   
-
-
+        return gpt_4o_simplify(self._syntactic_messages(text), model=self.model, stage="syntactic")
 
     def format_summarization(self, text: str) -> str:
-        def gpt_4o_format(messages, model="gpt-4o"):
-            from openai import OpenAI
-            client = OpenAI()
-            response = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=0.3
-            )
-            return response.choices[0].message.content.strip()
-
-
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    "You are a professional medical editor specializing in patient education materials. "
-                    "Your task is to take simplified clinical text and polish it into clear, coherent, and fluent English suitable for patients. "
-                    "Keep all medical facts accurate — do not add or remove any factual content. "
-                    "Make the text smooth, grammatically correct, and supportive in tone. "
-                    "Return plain text only. No titles, markdown, or extra commentary."
-                )
-            },
-            {
-                "role": "user",
-                "content": (
-                    "Input: The meta-analysis included 894 men. No studies reported live birth. The combined fixed-effect odds ratio (OR) of the 10 studies for the outcome of pregnancy was 1.47 (95% CI 1.05 to 2.05), favouring the intervention. [...] \n"
-                    "Polished: This review analysed 10 studies (894 participants) and found evidence (combined odds ratio was 1.47 (95% CI 1.05 to 2.05)) to suggest an increase in pregnancy rates after varicocele treatment compared to no treatment in subfertile couples. [...]\n\n"
-
-                    "Input: Six studies comprising nearly 450 patients were included. In general the quality of the studies was good. [...] \n"
-                    "Polished: The review authors included five randomised and one controlled clinical trial involving a total of nearly 450 patients. In general the quality of the studies was good. [...]\n\n"
-
-                    "Input: Only two eligible trials were included (593 patients), both of reasonable quality although one was unblinded. [...] \n"
-                    "Polished: We reviewed the trials that compared giving MAO-B inhibitors with other types of medication in people with early Parkinson's disease. However, only two trials were found (593 patients), so the evidence is limited. [...]\n\n"
-
-                    f"Input: {text}\nPolished:"
-                )
-            }
-        ]
-        return gpt_4o_format(messages)
+        # formatter runs warmer and without an output cap, on the shared client
+        return gpt_4o_simplify(self._format_messages(text), model=self.model, temperature=0.3, max_tokens=None, stage="format")
 
+    async def lexical_simplification_async(self, text: str) -> str:
+        return await gpt_4o_simplify_async(self._lexical_messages(text), model=self.model, stage="lexical")
 
+    async def syntactic_simplification_async(self, text: str) -> str:
+        return await gpt_4o_simplify_async(self._syntactic_messages(text), model=self.model, stage="syntactic")
 
+    async def format_summarization_async(self, text: str) -> str:
+        return await gpt_4o_simplify_async(self._format_messages(text), model=self.model, temperature=0.3, max_tokens=None, stage="format")
 
     def simplify(self, text: str) -> dict:
         print("[Stage 1] Lexical Simplification")
         lex = self.lexical_simplification(text)
 
         print("[Stage 2] Syntactic Simplification")
-        synt = self.syntactic_simplification(lex)
+        synt = self.syntactic_simplification(lex) if lex else ""
 
         print("[Stage 3] Format Summarization")
-        formatted = self.format_summarization(synt)
+        formatted = self.format_summarization(synt) if synt else ""
+
+
+        return {
+            "lexical": lex,
+            "syntactic": synt,
+            "formatted": formatted,
+        }
 
+    async def simplify_async(self, text: str) -> dict:
+        """
+        Same three stages as simplify(); run many reports at once with asyncio.gather
+        and the shared transport keeps them within the provider limits.
+        """
+        lex = await self.lexical_simplification_async(text)
+        synt = await self.syntactic_simplification_async(lex) if lex else ""
+        formatted = await self.format_summarization_async(synt) if synt else ""
 
         return {
             "lexical": lex,
             "syntactic": synt,
             "formatted": formatted,
         }
+
+    async def simplify_stream(self, text: str, min_chars: int = 200):
+        """
+        Streaming simplify(): yields {"stage", "delta"} events as tokens arrive and
+        {"stage", "text"} when a stage finishes. The syntactic stage starts on completed
+        sentences of the lexical output; the formatter needs the whole report to group
+        related ideas, so it runs once on the complete syntactic text, as in simplify().
+        """
+        stages = [
+            ("lexical", lambda t: stream_completion("openai", self.model, self._lexical_messages(t), stage="lexical")),
+            ("syntactic", lambda t: stream_completion("openai", self.model, self._syntactic_messages(t), stage="syntactic")),
+            ("formatted", lambda t: stream_completion("openai", self.model, self._format_messages(t), temperature=0.3, max_tokens=None, stage="format")),
+        ]
+        async for event in stream_stages(text, stages, min_chars, whole_input=("formatted",)):
+            yield event
         
 if __name__ == "__main__":
     # pipeline = GPT4oAPI()
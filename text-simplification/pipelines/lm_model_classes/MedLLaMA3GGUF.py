@@ -0,0 +1,166 @@
+# huggingface-cli download tensorblock/medllama3-v20-GGUF \
+#   --include "medllama3-v20-Q2_K.gguf" \
+#   --local-dir ./model_weights \
+#   --local-dir-use-symlinks False
+
+# above cell downloads the test run model weights. smallest, significant quality loss - not recommended for most purposes
+
+# reference: https://huggingface.co/tensorblock/medllama3-v20-GGUF
+# next step: medllama3-v20-Q5_K_S.gguf
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from call_metrics import get_sink
+
+
+# Every stage prompt is "Human: <instruction>\n<report><|eot_id|>\nAssistant:". Everything up to
+# the report is fixed per stage, so its KV state is computed once and restored on later calls.
+PROMPT_PREFIX = "Human: "
+PROMPT_SUFFIX = "<|eot_id|>\nAssistant:"
+
+LEXICAL_INSTRUCTION = "Rewrite the following medical text in simple language for a patient, explaining every medical term:\n"
+SYNTACTIC_INSTRUCTION = "Rewrite the following explanation using shorter, simpler sentences:\n"
+FORMAT_INSTRUCTION = "Summarize and organize the explanation clearly and concisely:\n"
+
+
+class PrefixStateCache:
+    """
+    LRU of llama.cpp states (KV cache + logits) keyed on the prefix token ids that produced them.
+    Evicts the least recently used state past `max_states` entries or `max_mb` of state data.
+    """
+
+    def __init__(self, max_states: int = 8, max_mb: float = None):
+        self.max_states = max_states
+        self.max_bytes = max_mb * 1024 * 1024 if max_mb else None
+        self.hits = 0
+        self.misses = 0
+        self._states = OrderedDict()
+
+    def get(self, key):
+        state = self._states.get(key)
+        if state is None:
+            self.misses += 1
+            return None
+        self._states.move_to_end(key)
+        self.hits += 1
+        return state
+
+    def put(self, key, state):
+        self._states[key] = state
+        self._states.move_to_end(key)
+        while len(self._states) > 1 and (len(self._states) > self.max_states
+                                         or (self.max_bytes and self.size_bytes() > self.max_bytes)):
+            self._states.popitem(last=False)
+
+    def size_bytes(self) -> int:
+        return sum(state.llama_state_size for state in self._states.values())
+
+    def stats(self) -> dict:
+        return {"states": len(self._states), "size_mb": self.size_bytes() / 1024 / 1024,
+                "hits": self.hits, "misses": self.misses}
+
+
+class MedLLaMA3GGUF:
+    """
+    A wrapper for tensorblock/medllama3-v20 GGUF model running via llama-cpp-python.
+
+    Prompt processing of the 8B model dominates a CPU-only call, so each stage's fixed prefix
+    (template + instruction) is evaluated once and its state kept in `prefix_states`; a call
+    restores that state and evaluates only the report tokens and the closing template.
+    llama.cpp on its own only reuses the prefix of the immediately preceding prompt, which
+    is a different stage's prompt inside simplify().
+    """
+
+    def __init__(self, model_path="./model_weights/medllama3-v20-Q2_K.gguf", n_ctx=2048, n_threads=None,
+                 max_prefix_states=8, max_prefix_state_mb=None, warm_prefixes=True):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model file not found: {model_path}")
+        from llama_cpp import Llama
+
+        print(f"Loading model from {model_path}...")
+        self.model_name = os.path.basename(model_path)
+        self.llm = Llama(model_path=model_path, n_ctx=n_ctx, n_threads=n_threads, verbose=False)
+        self.prefix_states = PrefixStateCache(max_prefix_states, max_prefix_state_mb)
+        # one llama.cpp context: calls from several threads take turns
+        self._lock = threading.Lock()
+        if warm_prefixes:
+            for instruction in (LEXICAL_INSTRUCTION, SYNTACTIC_INSTRUCTION, FORMAT_INSTRUCTION):
+                with self._lock:
+                    self._restore_prefix(self._tokenize(PROMPT_PREFIX + instruction, add_bos=True))
+            self.prefix_states.misses = 0
+
+    def _tokenize(self, text: str, add_bos=False) -> list:
+        return self.llm.tokenize(text.encode("utf-8"), add_bos=add_bos, special=True)
+
+    def _restore_prefix(self, prefix_tokens: list) -> bool:
+        """
+        Leaves the context holding exactly `prefix_tokens`, from the LRU when possible.
+        Returns whether the saved state was used.
+        """
+        key = tuple(prefix_tokens)
+        state = self.prefix_states.get(key)
+        if state is not None:
+            self.llm.load_state(state)
+            return True
+        self.llm.reset()
+        self.llm.eval(prefix_tokens)
+        self.prefix_states.put(key, self.llm.save_state())
+        return False
+
+    def _generate(self, instruction: str, text: str, max_tokens=256, stage=None) -> str:
+        start = time.perf_counter()
+        # prefix and suffix are tokenized separately so the prefix ids never depend on the report
+        prefix_tokens = self._tokenize(PROMPT_PREFIX + instruction, add_bos=True)
+        tokens = prefix_tokens + self._tokenize(f"{text}{PROMPT_SUFFIX}")
+        pieces = []
+        ttft = None
+        with self._lock:
+            hit = self._restore_prefix(prefix_tokens)
+            # generate() keeps the longest common prefix with the loaded state, so only the
+            # report tokens are evaluated here
+            for chunk in self.llm.create_completion(tokens, max_tokens=max_tokens, stop=["<|eot_id|>"], stream=True):
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                pieces.append(chunk["choices"][0]["text"])
+        usage = {
+            "prompt_tokens": len(tokens),
+            "completion_tokens": len(pieces),
+            "prompt_tokens_details": {"cached_tokens": len(prefix_tokens) if hit else 0},
+        }
+        get_sink().record("local", self.model_name, stage, time.perf_counter() - start,
+                          usage=usage, ttft_s=ttft, prefix_state_hit=hit)
+        return "".join(pieces).strip()
+
+    def lexical_simplification(self, text: str) -> str:
+        return self._generate(LEXICAL_INSTRUCTION, text, stage="lexical")
+
+    def syntactic_simplification(self, text: str) -> str:
+        return self._generate(SYNTACTIC_INSTRUCTION, text, stage="syntactic")
+
+    def format_summarization(self, text: str) -> str:
+        return self._generate(FORMAT_INSTRUCTION, text, stage="format")
+
+    def simplify(self, text: str) -> dict:
+        print("[Stage 1] Lexical Simplification")
+        lex = self.lexical_simplification(text)
+
+        print("[Stage 2] Syntactic Simplification")
+        synt = self.syntactic_simplification(lex)
+
+        print("[Stage 3] Format Summarization")
+        formatted = self.format_summarization(synt)
+
+        return {
+            "lexical": lex,
+            "syntactic": synt,
+            "formatted": formatted,
+        }
+
+# Example usage
+if __name__ == "__main__":
+    model = MedLLaMA3GGUF()
+    result = model.lexical_simplification("The patient presented with acute myocardial infarction.")
+    print(result)
+    print(model.prefix_states.stats())
@@ -1,5 +1,7 @@
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-import torch
+import time
+from batching import length_buckets
+from model_registry import get_registry, no_grad
+from call_metrics import get_sink, generation_usage
 
 
 class T5LargeLocal:
@@ -10,28 +12,69 @@ class T5LargeLocal:
     3. Format summarization
     """
 
-    def __init__(self, model_name="t5-large", device=None):
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
-        self.device = device if device else ("cuda" if torch.cuda.is_available() else "cpu")
-        self.model.to(self.device)
+    def __init__(self, model_name="t5-large", device=None, backend="torch"):
+        """
+        Weights come from the process-wide model registry, so constructing the class again
+        reuses the loaded model. backend="onnx" runs an int8-quantized ONNX export on
+        ONNX Runtime CPU (see onnx_backend.py).
+        """
+        self.model_name = model_name
+        self.backend = backend
+        self.tokenizer, self.model = get_registry().get(model_name, device=device, backend=backend)
+        self.device = self.model.device
 
-    def _generate(self, prompt, max_new_tokens=256):
+    def _generate(self, prompt, max_new_tokens=256, stage=None):
+        start = time.perf_counter()
         inputs = self.tokenizer(prompt, return_tensors="pt", truncation=True, padding=True).to(self.device)
         outputs = self.model.generate(**inputs, max_new_tokens=max_new_tokens)
+        get_sink().record("local", self.model_name, stage, time.perf_counter() - start,
+                          usage=generation_usage(inputs, outputs, self.tokenizer.pad_token_id))
         return self.tokenizer.decode(outputs[0], skip_special_tokens=True)
 
+    def _generate_batch(self, prompts, max_new_tokens=256, batch_size=8, max_batch_tokens=None, stage=None):
+        """
+        Batched _generate: prompts are bucketed by token length, padded per batch only,
+        and the outputs are returned in the original order.
+        """
+        lengths = [len(ids) for ids in self.tokenizer(prompts, truncation=True)["input_ids"]]
+        outputs = [None] * len(prompts)
+        for batch in length_buckets(lengths, batch_size, max_batch_tokens):
+            start = time.perf_counter()
+            inputs = self.tokenizer([prompts[i] for i in batch], return_tensors="pt", truncation=True, padding=True).to(self.device)
+            with no_grad():
+                generated = self.model.generate(**inputs, max_new_tokens=max_new_tokens)
+            get_sink().record("local", self.model_name, stage, time.perf_counter() - start,
+                              usage=generation_usage(inputs, generated, self.tokenizer.pad_token_id), batch_size=len(batch))
+            for i, text in zip(batch, self.tokenizer.batch_decode(generated, skip_special_tokens=True)):
+                outputs[i] = text
+        return outputs
+
+    def _lexical_prompt(self, text: str) -> str:
+        return f"simplify the vocabulary in this medical text: {text}"
+
+    def _syntactic_prompt(self, text: str) -> str:
+        return f"simplify the sentence structure of this text: {text}"
+
+    def _format_prompt(self, text: str) -> str:
+        return f"improve formatting and clarity of the following: {text}"
+
     def lexical_simplification(self, text: str) -> str:
-        prompt = f"simplify the vocabulary in this medical text: {text}"
-        return self._generate(prompt)
+        return self._generate(self._lexical_prompt(text), stage="lexical")
 
     def syntactic_simplification(self, text: str) -> str:
-        prompt = f"simplify the sentence structure of this text: {text}"
-        return self._generate(prompt)
+        return self._generate(self._syntactic_prompt(text), stage="syntactic")
 
     def format_summarization(self, text: str) -> str:
-        prompt = f"improve formatting and clarity of the following: {text}"
-        return self._generate(prompt)
+        return self._generate(self._format_prompt(text), stage="format")
+
+    def lexical_simplification_batch(self, texts: list, batch_size=8) -> list:
+        return self._generate_batch([self._lexical_prompt(t) for t in texts], batch_size=batch_size, stage="lexical")
+
+    def syntactic_simplification_batch(self, texts: list, batch_size=8) -> list:
+        return self._generate_batch([self._syntactic_prompt(t) for t in texts], batch_size=batch_size, stage="syntactic")
+
+    def format_summarization_batch(self, texts: list, batch_size=8) -> list:
+        return self._generate_batch([self._format_prompt(t) for t in texts], batch_size=batch_size, stage="format")
 
     def simplify(self, text: str) -> dict:
         print("[Stage 1] Lexical Simplification")
@@ -49,6 +92,18 @@ class T5LargeLocal:
             "formatted": formatted,
         }
 
+    def simplify_batch(self, texts: list, batch_size=8) -> list:
+        """
+        Runs the three stages over many reports, one batched pass per stage.
+        """
+        lex = self.lexical_simplification_batch(texts, batch_size)
+        synt = self.syntactic_simplification_batch(lex, batch_size)
+        formatted = self.format_summarization_batch(synt, batch_size)
+        return [
+            {"lexical": l, "syntactic": s, "formatted": f}
+            for l, s, f in zip(lex, synt, formatted)
+        ]
+
 
 if __name__ == "__main__":
     model = T5LargeLocal()
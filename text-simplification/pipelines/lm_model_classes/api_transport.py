@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import asyncio
+import weakref
+import httpx
+from dotenv import load_dotenv, find_dotenv
+
+
+load_dotenv(find_dotenv())
+
+# Per-provider connection settings. Concurrency and tokens-per-minute budgets can be
+# tuned from .env to match the account tier; a TPM of 0 disables throttling.
+# OPENAI_BASE_URL / DEEPSEEK_BASE_URL point a provider elsewhere, e.g. at benchmarks/mock_provider.py.
+PROVIDERS = {
+    "openai": {
+        "base_url": os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+        "api_key": os.getenv("OPENAI_API_KEY"),
+        "max_concurrency": int(os.getenv("OPENAI_MAX_CONCURRENCY", "16")),
+        "tokens_per_minute": int(os.getenv("OPENAI_TPM", "30000")),
+    },
+    "deepseek": {
+        "base_url": os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com/v1"),
+        "api_key": os.getenv("DEEPSEEK_API_KEY"),
+        "max_concurrency": int(os.getenv("DEEPSEEK_MAX_CONCURRENCY", "16")),
+        "tokens_per_minute": int(os.getenv("DEEPSEEK_TPM", "0")),
+    },
+}
+
+
+def chat_payload(model, messages, temperature, max_tokens=None, cache_key=None):
+    """
+    Builds a chat-completions request body. Both providers speak the same dialect.
+    `cache_key` is OpenAI's prompt_cache_key (see prompt_cache_key below).
+    """
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+    }
+    if max_tokens is not None:
+        payload["max_tokens"] = max_tokens
+    if cache_key is not None:
+        payload["prompt_cache_key"] = cache_key
+    return payload
+
+
+def few_shot_messages(system: str, examples: list, text: str, input_label: str = "Original") -> list:
+    """
+    Stage prompt laid out for provider-side prompt caching: the system prompt and the
+    (input, output) examples as user / assistant turns are rebuilt from constants, so every
+    call of a stage starts with the same bytes; only the last user turn carries the report.
+    """
+    messages = [{"role": "system", "content": system}]
+    for source, target in examples:
+        messages.append({"role": "user", "content": f"{input_label}: {source}"})
+        messages.append({"role": "assistant", "content": target})
+    messages.append({"role": "user", "content": f"{input_label}: {text}"})
+    return messages
+
+
+def prompt_cache_key(provider, stage):
+    """
+    OpenAI routes requests with the same prompt_cache_key (and prefix) to the same cache;
+    one key per stage keeps each stage's prefix warm. DeepSeek caches every prefix on its own.
+    """
+    if provider != "openai" or stage is None:
+        return None
+    return f"medease-{stage}"
+
+
+def estimate_tokens(payload):
+    """
+    Rough upper bound of the tokens a request will consume (~4 chars per token),
+    used to reserve budget before the real usage block is known.
+    """
+    prompt_chars = sum(len(m["content"]) for m in payload["messages"])
+    return prompt_chars // 4 + 4 * len(payload["messages"]) + payload.get("max_tokens", 1024)
+
+
+class TokenBucket:
+    """
+    Tokens-per-minute limiter. Requests reserve their estimated size up front and
+    settle against the provider-reported usage once the response arrives.
+    """
+
+    def __init__(self, tokens_per_minute):
+        self.capacity = tokens_per_minute
+        self.tokens = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return amount
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def settle(self, reserved, used):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + reserved - used)
+
+
+class AsyncChatTransport:
+    """
+    Shared async transport for chat-completions providers.
+    One keep-alive connection pool per provider, bounded concurrency and TPM throttling.
+    """
+
+    def __init__(self, providers=None):
+        self.providers = providers or PROVIDERS
+        self._clients = {}
+        self._semaphores = {}
+        self._buckets = {}
+
+    def _client(self, provider):
+        if provider not in self._clients:
+            config = self.providers[provider]
+            limit = config["max_concurrency"]
+            self._clients[provider] = httpx.AsyncClient(
+                base_url=config["base_url"],
+                headers={"Authorization": f"Bearer {config['api_key']}"},
+                timeout=httpx.Timeout(120.0, connect=10.0),
+                limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit),
+            )
+            self._semaphores[provider] = asyncio.Semaphore(limit)
+            if config["tokens_per_minute"] > 0:
+                self._buckets[provider] = TokenBucket(config["tokens_per_minute"])
+        return self._clients[provider]
+
+    async def chat(self, provider, payload) -> dict:
+        """
+        Sends one chat-completions request and returns the decoded response body.
+        """
+        client = self._client(provider)
+        bucket = self._buckets.get(provider)
+        reserved = await bucket.acquire(estimate_tokens(payload)) if bucket else 0
+
+        try:
+            async with self._semaphores[provider]:
+                response = await client.post("/chat/completions", json=payload)
+            response.raise_for_status()
+            body = response.json()
+        except BaseException:
+            # give the reservation back so a retried request does not pay for it twice
+            if bucket:
+                bucket.settle(reserved, 0)
+            raise
+
+        if bucket:
+            bucket.settle(reserved, body.get("usage", {}).get("total_tokens", reserved))
+        return body
+
+    async def stream_chat(self, provider, payload, usage=None):
+        """
+        Streams one chat-completions request over SSE and yields content deltas as they
+        arrive. If `usage` is a dict it is filled from the final usage chunk.
+        """
+        client = self._client(provider)
+        bucket = self._buckets.get(provider)
+        reserved = await bucket.acquire(estimate_tokens(payload)) if bucket else 0
+        payload = {**payload, "stream": True, "stream_options": {"include_usage": True}}
+        reported = {}
+
+        try:
+            async with self._semaphores[provider]:
+                async with client.stream("POST", "/chat/completions", json=payload) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        chunk = json.loads(data)
+                        if chunk.get("usage"):
+                            reported = chunk["usage"]
+                        for choice in chunk.get("choices", []):
+                            delta = (choice.get("delta") or {}).get("content")
+                            if delta:
+                                yield delta
+        except BaseException:
+            # a failed, cancelled or abandoned stream gives its reservation back, as chat() does
+            if bucket:
+                bucket.settle(reserved, 0)
+            raise
+
+        if usage is not None:
+            usage.update(reported)
+        if bucket:
+            bucket.settle(reserved, reported.get("total_tokens", reserved))
+
+    async def aclose(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+# httpx clients and asyncio primitives are bound to the loop they are first used on,
+# so keep one transport per running event loop.
+_transports = weakref.WeakKeyDictionary()
+
+
+def get_transport() -> AsyncChatTransport:
+    loop = asyncio.get_running_loop()
+    if loop not in _transports:
+        _transports[loop] = AsyncChatTransport()
+    return _transports[loop]
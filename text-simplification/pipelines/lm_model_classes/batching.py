@@ -0,0 +1,19 @@
+def length_buckets(lengths: list, batch_size: int = 8, max_batch_tokens: int = None) -> list:
+    """
+    Groups item indices into batches of similar token length.
+
+    Indices are sorted by length so each batch pads only up to its own longest item.
+    A batch closes at `batch_size` items, or earlier once padded size
+    (items x longest) would exceed `max_batch_tokens`.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches, current = [], []
+    for i in order:
+        padded = (len(current) + 1) * lengths[i]
+        if current and (len(current) == batch_size or (max_batch_tokens and padded > max_batch_tokens)):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import threading
+import contextvars
+from pathlib import Path
+from contextlib import contextmanager
+
+
+DEFAULT_METRICS_PATH = Path(__file__).resolve().parents[2] / ".cache" / "call_metrics.jsonl"
+
+# USD per 1M tokens
+# https://platform.openai.com/docs/pricing
+# https://api-docs.deepseek.com/quick_start/pricing
+PRICING = {
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.0},
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.6},
+    "deepseek-chat": {"input": 0.27, "cached_input": 0.07, "output": 1.10},
+}
+
+# model path of the node being computed, set by the orchestration layer
+current_path = contextvars.ContextVar("current_path", default=None)
+
+
+@contextmanager
+def metrics_path(path):
+    token = current_path.set(path)
+    try:
+        yield
+    finally:
+        current_path.reset(token)
+
+
+# list that also receives the records of calls made under recorded_calls()
+_recording = contextvars.ContextVar("recording", default=None)
+
+
+@contextmanager
+def recorded_calls():
+    """
+    Collects the records of the model calls made in this context (threads started with
+    asyncio.to_thread or a copied context included), e.g. to measure one wrapper's tokens.
+    """
+    records = []
+    token = _recording.set(records)
+    try:
+        yield records
+    finally:
+        _recording.reset(token)
+
+
+def usage_fields(usage) -> dict:
+    """
+    Normalizes an OpenAI or DeepSeek usage block (dict or SDK object) into token counts.
+    OpenAI reports cached prompt tokens under prompt_tokens_details, DeepSeek as prompt_cache_hit_tokens.
+    """
+    if usage is None:
+        return {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+    if not isinstance(usage, dict):
+        usage = usage.model_dump()
+    details = usage.get("prompt_tokens_details") or {}
+    return {
+        "prompt_tokens": usage.get("prompt_tokens") or 0,
+        "completion_tokens": usage.get("completion_tokens") or 0,
+        "cached_tokens": details.get("cached_tokens") or usage.get("prompt_cache_hit_tokens") or 0,
+    }
+
+
+def generation_usage(inputs, generated, pad_token_id) -> dict:
+    """
+    Token counts for a local model.generate call (padding excluded).
+    """
+    return {
+        "prompt_tokens": int(inputs["attention_mask"].sum()),
+        "completion_tokens": int((generated != pad_token_id).sum()),
+    }
+
+
+def call_cost(record: dict) -> float:
+    price = PRICING.get(record["model"])
+    if price is None:
+        return 0.0
+    uncached = record["prompt_tokens"] - record["cached_tokens"]
+    return (
+        uncached * price["input"]
+        + record["cached_tokens"] * price["cached_input"]
+        + record["completion_tokens"] * price["output"]
+    ) / 1_000_000
+
+
+def prompt_cache_savings(record: dict) -> float:
+    """
+    Dollars the provider's prompt cache saved on this call versus paying full input price.
+    """
+    price = PRICING.get(record["model"])
+    if price is None:
+        return 0.0
+    return record["cached_tokens"] * (price["input"] - price["cached_input"]) / 1_000_000
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+class MetricsSink:
+    """
+    Collects one record per model call: tokens, cached tokens, wall latency, retries and
+    whether the response cache answered it. Records are kept in memory and appended to
+    a JSONL file so runs across notebooks can be aggregated later.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self.records = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        sink = cls()
+        with open(path, "r", encoding="utf-8") as f:
+            sink.records = [json.loads(line) for line in f if line.strip()]
+        return sink
+
+    def record(self, provider, model, stage, latency_s, usage=None, retries=0, response_cache_hit=False, error=None, **extra):
+        record = {
+            "ts": time.time(),
+            "provider": provider,
+            "model": model,
+            "stage": stage,
+            "path": current_path.get(),
+            **usage_fields(usage),
+            "latency_s": latency_s,
+            "retries": retries,
+            "response_cache_hit": response_cache_hit,
+            "error": error,
+            **extra,
+        }
+        record["cost_usd"] = call_cost(record)
+        recording = _recording.get()
+        if recording is not None:
+            recording.append(record)
+        with self._lock:
+            self.records.append(record)
+            if self.path:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+        return record
+
+    def report(self, by=("stage", "model")) -> list:
+        """
+        Aggregates records by the given fields (e.g. ("stage",), ("path",), ("stage", "model"))
+        with token totals, latency percentiles and dollars from PRICING.
+        """
+        groups = {}
+        for record in self.records:
+            groups.setdefault(tuple(record.get(field) for field in by), []).append(record)
+
+        rows = []
+        for key, records in sorted(groups.items(), key=lambda item: str(item[0])):
+            # response-cache hits cost nothing and would flatten the latency distribution
+            latencies = [r["latency_s"] for r in records if not r["response_cache_hit"]]
+            ttfts = [r["ttft_s"] for r in records if r.get("ttft_s") is not None]
+            prompt_tokens = sum(r["prompt_tokens"] for r in records)
+            cached_tokens = sum(r["cached_tokens"] for r in records)
+            rows.append({
+                **dict(zip(by, key)),
+                "calls": len(records),
+                "response_cache_hits": sum(r["response_cache_hit"] for r in records),
+                "errors": sum(r["error"] is not None for r in records),
+                "retries": sum(r["retries"] for r in records),
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": sum(r["completion_tokens"] for r in records),
+                "cached_tokens": cached_tokens,
+                # share of prompt tokens served from the provider's prompt cache
+                "prompt_cache_hit_rate": cached_tokens / prompt_tokens if prompt_tokens else 0.0,
+                "p50_latency_s": percentile(latencies, 50),
+                "p95_latency_s": percentile(latencies, 95),
+                "p99_latency_s": percentile(latencies, 99),
+                "p50_ttft_s": percentile(ttfts, 50),
+                "cost_usd": sum(r["cost_usd"] for r in records),
+                "prompt_cache_savings_usd": sum(prompt_cache_savings(r) for r in records),
+            })
+        return rows
+
+    def to_frame(self, by=("stage", "model")):
+        import pandas as pd
+        return pd.DataFrame(self.report(by))
+
+
+_sink = None
+
+
+def get_sink() -> MetricsSink:
+    """
+    Process-wide metrics sink; MEDEASE_METRICS_PATH overrides the JSONL location
+    (an empty value keeps records in memory only).
+    """
+    global _sink
+    if _sink is None:
+        _sink = MetricsSink(os.getenv("MEDEASE_METRICS_PATH", str(DEFAULT_METRICS_PATH)) or None)
+    return _sink
@@ -0,0 +1,135 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded (tokenizer, model) pairs keyed by (model name, device, backend).
+
+    transformers / torch are only imported when a model is first requested, torch weights
+    are read from safetensors (memory-mapped) when the checkpoint ships them, and every
+    later construction of the same model gets the already-loaded instance. With a memory
+    budget, the least recently used models are evicted to make room.
+    """
+
+    def __init__(self, max_bytes: int = None):
+        self.max_bytes = max_bytes if max_bytes is not None else int(float(os.getenv("MEDEASE_MODEL_MEMORY_MB", "0")) * 1024 ** 2)
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self._loading = {}
+
+    def _load(self, model_name, device, backend, tokenizer_class, model_class):
+        if backend == "onnx":
+            from onnx_backend import load_seq2seq
+            return load_seq2seq(model_name)
+
+        import transformers
+        tokenizer = getattr(transformers, tokenizer_class).from_pretrained(model_name)
+        loader = getattr(transformers, model_class)
+        try:
+            model = loader.from_pretrained(model_name, use_safetensors=True)
+        except (OSError, EnvironmentError):
+            # older checkpoints only have pytorch_model.bin
+            model = loader.from_pretrained(model_name)
+        model.to(device)
+        model.eval()
+        return tokenizer, model
+
+    def get(self, model_name: str, device: str = None, backend: str = "torch",
+            tokenizer_class: str = "AutoTokenizer", model_class: str = "AutoModelForSeq2SeqLM") -> tuple:
+        """
+        (tokenizer, model) for `model_name`, loading it on first use.
+        `tokenizer_class` / `model_class` name the transformers classes to load with.
+        """
+        device = device or default_device(backend)
+        key = (model_name, device, backend)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]["pair"]
+            # one loader per key; other threads asking for the same model wait for it
+            event = self._loading.get(key)
+            if event is None:
+                event = self._loading[key] = threading.Event()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            event.wait()
+            return self.get(model_name, device, backend, tokenizer_class, model_class)
+        try:
+            pair = self._load(model_name, device, backend, tokenizer_class, model_class)
+            self.register(model_name, *pair, device=device, backend=backend)
+            return pair
+        finally:
+            with self._lock:
+                self._loading.pop(key).set()
+
+    def register(self, model_name: str, tokenizer, model, device: str = "cpu", backend: str = "torch"):
+        """
+        Adds an already-loaded model, e.g. one preloaded in a parent process before forking workers.
+        """
+        with self._lock:
+            self._entries[(model_name, device, backend)] = {"pair": (tokenizer, model), "bytes": model_bytes(model)}
+            self._evict_to_budget()
+
+    def _evict_to_budget(self):
+        # the newest entry always stays, even when it alone exceeds the budget
+        while self.max_bytes and len(self._entries) > 1 and self.total_bytes() > self.max_bytes:
+            self._entries.popitem(last=False)
+
+    def evict(self, model_name: str = None):
+        """
+        Drops one model (all devices / backends) or, without a name, everything.
+        Instances still referencing the weights keep them alive until they are deleted.
+        """
+        with self._lock:
+            for key in [k for k in self._entries if model_name is None or k[0] == model_name]:
+                del self._entries[key]
+        import gc
+        gc.collect()
+
+    def total_bytes(self) -> int:
+        return sum(entry["bytes"] for entry in self._entries.values())
+
+    def loaded(self) -> list:
+        return [{"model": k[0], "device": k[1], "backend": k[2], "mb": v["bytes"] / 1024 ** 2} for k, v in self._entries.items()]
+
+
+def default_device(backend: str = "torch") -> str:
+    if backend != "torch":
+        return "cpu"
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def no_grad():
+    import torch
+    return torch.no_grad()
+
+
+def model_bytes(model) -> int:
+    """
+    Parameter + buffer memory of a torch model; for ONNX Runtime models, the size of the exported graphs.
+    """
+    if not hasattr(model, "parameters"):
+        from pathlib import Path
+        export_dir = getattr(model, "model_save_dir", None)
+        return sum(f.stat().st_size for f in Path(export_dir).glob("*.onnx")) if export_dir else 0
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+_registry = None
+
+
+def get_registry() -> ModelRegistry:
+    """
+    Process-wide registry; MEDEASE_MODEL_MEMORY_MB sets its budget (0 = unlimited).
+    """
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry()
+    return _registry
@@ -0,0 +1,141 @@
+import os
+import json
+import time
+import argparse
+from difflib import SequenceMatcher
+from pathlib import Path
+
+
+ONNX_CACHE_DIR = Path(__file__).resolve().parents[2] / ".cache" / "onnx"
+
+
+def _export_dir(model_name: str, quantize: bool) -> Path:
+    return ONNX_CACHE_DIR / model_name.replace("/", "__") / ("int8" if quantize else "fp32")
+
+
+def _quantize_dir(source: Path, target: Path):
+    """
+    Dynamic int8 quantization of every .onnx graph in `source` (weights int8, activations
+    quantized on the fly), written to `target` under the original file names so the
+    ORTModel classes load them without extra arguments.
+    """
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    config = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    for graph in sorted(source.glob("*.onnx")):
+        quantizer = ORTQuantizer.from_pretrained(source, file_name=graph.name)
+        quantizer.quantize(save_dir=target, quantization_config=config)
+        quantized = target / f"{graph.stem}_quantized.onnx"
+        if quantized.exists():
+            quantized.replace(target / graph.name)
+    for extra in source.iterdir():
+        if extra.suffix != ".onnx" and extra.is_file() and not (target / extra.name).exists():
+            (target / extra.name).write_bytes(extra.read_bytes())
+
+
+def _export(ort_class, model_name: str, quantize: bool, **kwargs) -> Path:
+    """
+    Exports `model_name` to ONNX once (int8 when `quantize`) and returns the directory.
+    """
+    target = _export_dir(model_name, quantize)
+    if target.exists() and any(target.glob("*.onnx")):
+        return target
+    fp32 = _export_dir(model_name, False)
+    if not any(fp32.glob("*.onnx")):
+        from transformers import AutoTokenizer
+        ort_class.from_pretrained(model_name, export=True, **kwargs).save_pretrained(fp32)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(fp32)
+    if quantize:
+        _quantize_dir(fp32, target)
+    return target
+
+
+def load_seq2seq(model_name: str, quantize: bool = True):
+    """
+    (tokenizer, ORTModelForSeq2SeqLM) for a T5/BART checkpoint on ONNX Runtime CPU.
+    The decoder keeps past key/values between steps (use_cache), and the returned
+    model has the same .generate() as the torch one.
+    """
+    from transformers import AutoTokenizer
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    path = _export(ORTModelForSeq2SeqLM, model_name, quantize, use_cache=True)
+    model = ORTModelForSeq2SeqLM.from_pretrained(path, use_cache=True, provider="CPUExecutionProvider")
+    return AutoTokenizer.from_pretrained(path), model
+
+
+def load_zero_shot_pipeline(model_name: str, quantize: bool = True):
+    """
+    zero-shot-classification pipeline over an (int8) ONNX export of an NLI model.
+    """
+    from transformers import AutoTokenizer, pipeline
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    path = _export(ORTModelForSequenceClassification, model_name, quantize)
+    model = ORTModelForSequenceClassification.from_pretrained(path, provider="CPUExecutionProvider")
+    return pipeline("zero-shot-classification", model=model, tokenizer=AutoTokenizer.from_pretrained(path))
+
+
+def rss_mb() -> float:
+    """
+    Current resident set size of this process in MB.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def compare_backends(model_class, texts: list, method: str = "lexical_simplification", **kwargs) -> dict:
+    """
+    Runs one stage with backend="torch" and backend="onnx" on the same texts and reports
+    load time, resident memory added by the model, mean / max latency per text and
+    output parity (exact matches and mean character similarity against torch).
+    """
+    report, outputs = {}, {}
+    for backend in ("torch", "onnx"):
+        before = rss_mb()
+        start = time.perf_counter()
+        model = model_class(backend=backend, **kwargs)
+        load_s = time.perf_counter() - start
+        latencies, results = [], []
+        for text in texts:
+            start = time.perf_counter()
+            results.append(getattr(model, method)(text))
+            latencies.append(time.perf_counter() - start)
+        outputs[backend] = results
+        report[backend] = {
+            "load_s": load_s,
+            "model_rss_mb": rss_mb() - before,
+            "mean_latency_s": sum(latencies) / len(latencies),
+            "max_latency_s": max(latencies),
+        }
+        del model
+
+    pairs = list(zip(outputs["torch"], outputs["onnx"]))
+    report["parity"] = {
+        "exact_match": sum(a == b for a, b in pairs) / len(pairs),
+        "mean_similarity": sum(SequenceMatcher(None, a, b).ratio() for a, b in pairs) / len(pairs),
+    }
+    report["speedup"] = report["torch"]["mean_latency_s"] / report["onnx"]["mean_latency_s"]
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export local models to int8 ONNX and compare against torch.")
+    parser.add_argument("--model", choices=["t5", "bart"], default="t5")
+    parser.add_argument("--pairs", default=str(Path(__file__).resolve().parents[2] / "data" / "500_pairs.json"))
+    parser.add_argument("-n", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.model == "t5":
+        from T5LargeLocal import T5LargeLocal as model_class
+    else:
+        from BartLargeCNNLocal import BartLargeCNNLocal as model_class
+
+    with open(args.pairs, "r", encoding="utf-8") as f:
+        texts = [pair["source"] for pair in json.load(f)[:args.n]]
+    print(json.dumps(compare_backends(model_class, texts), indent=2))
@@ -0,0 +1,34 @@
+# Lexical and syntactic stage prompts shared by GPT4oAPI and DeepSeekChatAPI, so the cross-model
+# trees compare models on the same prompts. The system prompt and few-shot turns are the static
+# prefix of every call of a stage and are cached by both providers; keep them byte-stable
+# (no per-call content in here).
+LEXICAL_SYSTEM = (
+    "You are a medical language simplification assistant. Your task is to rewrite complex medical sentences "
+    "using simpler vocabulary without changing the original meaning. Do not explain or remove information—only "
+    "replace terms with simpler equivalents. Break up long sentences where needed. Return plain text only."
+)
+LEXICAL_EXAMPLES = [
+    ("The patient presented with dyspnea and required supplemental oxygen.",
+     "The patient had trouble breathing and needed extra oxygen."),
+    ("Administer acetaminophen PRN for febrile episodes exceeding 38°C.",
+     "Give acetaminophen when needed if the fever goes above 38°C."),
+    ("Hypertension was managed conservatively without pharmacological intervention.",
+     "High blood pressure was controlled without using medicine."),
+    ("A colonoscopy was recommended to rule out neoplastic changes.",
+     "A colonoscopy was suggested to check for signs of cancer."),
+]
+
+SYNTACTIC_SYSTEM = (
+    "You are a syntactic simplifier specializing in medical text. Your task is to break down long or complex sentences "
+    "into multiple shorter, simpler sentences while keeping the meaning exactly the same. "
+    "Do not remove or add any information. Do not summarize or simplify vocabulary. Only modify sentence structure for clarity.\n\n"
+    "Output plain text only. No bullet points, no markdown, no extra formatting."
+)
+SYNTACTIC_EXAMPLES = [
+    ("The patient was admitted for chest pain, which started three hours prior and was accompanied by shortness of breath and sweating.",
+     "The patient was admitted for chest pain. The pain started three hours earlier. It was accompanied by shortness of breath and sweating."),
+    ("Follow-up imaging was performed to evaluate the effectiveness of the prescribed antibiotics in resolving the patient's pneumonia.",
+     "Follow-up imaging was performed. It was done to evaluate whether the antibiotics were helping to resolve the patient’s pneumonia."),
+    ("The patient denied experiencing any nausea, vomiting, or changes in bowel habits but reported increased fatigue and occasional dizziness.",
+     "The patient did not experience nausea, vomiting, or changes in bowel habits. However, they reported feeling more tired. They also experienced occasional dizziness."),
+]
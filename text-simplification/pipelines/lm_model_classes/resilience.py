@@ -0,0 +1,234 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+import httpx
+
+
+# 429 and 5xx are worth another attempt; other 4xx (bad request, auth, context length) are not
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a provider whose circuit breaker is open.
+    """
+
+
+class ProviderCallError(Exception):
+    """
+    The final error of a call, after `retries` retries. The original exception is `__cause__`.
+    """
+
+    def __init__(self, provider, retries, error):
+        super().__init__(f"{provider}: {error} (after {retries} retries)")
+        self.provider = provider
+        self.retries = retries
+        self.status_code = status_code(error)
+
+
+def status_code(error):
+    """
+    HTTP status of an httpx / requests / openai error, None for transport errors.
+    """
+    code = getattr(error, "status_code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    return code
+
+
+def _transient_errors() -> tuple:
+    errors = [TimeoutError, ConnectionError, httpx.TransportError]
+    try:
+        import requests
+        errors += [requests.ConnectionError, requests.Timeout]
+    except ImportError:
+        pass
+    try:
+        import openai
+        errors.append(openai.APIConnectionError)
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+def is_retryable(error) -> bool:
+    if isinstance(error, CircuitOpenError):
+        return False
+    code = status_code(error)
+    if code is not None:
+        return code in RETRYABLE_STATUS
+    return isinstance(error, _transient_errors())
+
+
+def retry_after_s(error):
+    """
+    Seconds the provider asked us to wait (retry-after-ms or Retry-After, in seconds or as an HTTP date).
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter: attempt n waits uniform(0, min(max_delay_s, base_delay_s * 2**n)).
+    A Retry-After from the provider is honoured instead (plus a little jitter so waiting
+    clients do not return in lockstep); when it asks for more than max_delay_s we give up.
+    """
+
+    def __init__(self, max_attempts: int = None, base_delay_s: float = 0.5, max_delay_s: float = 30.0):
+        self.max_attempts = max_attempts if max_attempts is not None else int(os.getenv("MEDEASE_RETRY_ATTEMPTS", "4"))
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+
+    def delay(self, attempt: int, error=None):
+        """
+        Seconds to wait before retry number `attempt` (0-based), or None to stop retrying.
+        """
+        if attempt + 1 >= self.max_attempts or not is_retryable(error):
+            return None
+        wait = retry_after_s(error)
+        if wait is not None:
+            return wait + random.uniform(0, self.base_delay_s) if wait <= self.max_delay_s else None
+        return random.uniform(0, min(self.max_delay_s, self.base_delay_s * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Per-provider breaker. After `failure_threshold` consecutive failed attempts it opens and
+    calls fail fast for `reset_timeout_s`; then one probe is let through (half-open) and its
+    outcome closes or re-opens the circuit.
+
+    Only server errors, timeouts and connection failures count: a 429 means the provider is
+    up but busy, which Retry-After already handles.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_s: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout_s:
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self, error=None):
+        if error is not None and (status_code(error) == 429 or not is_retryable(error)):
+            # the provider answered, so it is up
+            self.record_success()
+            return
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self):
+        """
+        Frees the half-open probe slot of a call that was cancelled before it got an answer.
+        """
+        with self._lock:
+            self._probing = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if provider not in _breakers:
+            _breakers[provider] = CircuitBreaker()
+        return _breakers[provider]
+
+
+DEFAULT_POLICY = RetryPolicy()
+
+
+def call_with_retry(provider: str, fn, policy: RetryPolicy = None) -> tuple:
+    """
+    Calls `fn()` through the provider's circuit breaker, retrying transient failures.
+    Returns (result, retries); raises ProviderCallError once the attempts are exhausted.
+    """
+    policy = policy or DEFAULT_POLICY
+    breaker = get_breaker(provider)
+    attempt = 0
+    while True:
+        try:
+            if not breaker.allow():
+                raise CircuitOpenError(f"circuit open for {provider}")
+            result = fn()
+        except Exception as e:
+            if not isinstance(e, CircuitOpenError):
+                breaker.record_failure(e)
+            wait = policy.delay(attempt, e)
+            if wait is None:
+                raise ProviderCallError(provider, attempt, e) from e
+            time.sleep(wait)
+            attempt += 1
+            continue
+        breaker.record_success()
+        return result, attempt
+
+
+async def call_with_retry_async(provider: str, fn, policy: RetryPolicy = None) -> tuple:
+    """
+    Async variant of call_with_retry; `fn()` returns a fresh awaitable per attempt.
+    """
+    policy = policy or DEFAULT_POLICY
+    breaker = get_breaker(provider)
+    attempt = 0
+    while True:
+        try:
+            if not breaker.allow():
+                raise CircuitOpenError(f"circuit open for {provider}")
+            result = await fn()
+        except asyncio.CancelledError:
+            # e.g. the losing side of a hedged request
+            breaker.release()
+            raise
+        except Exception as e:
+            if not isinstance(e, CircuitOpenError):
+                breaker.record_failure(e)
+            wait = policy.delay(attempt, e)
+            if wait is None:
+                raise ProviderCallError(provider, attempt, e) from e
+            await asyncio.sleep(wait)
+            attempt += 1
+            continue
+        breaker.record_success()
+        return result, attempt
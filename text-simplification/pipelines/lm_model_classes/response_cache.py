@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parents[2] / ".cache" / "llm_responses.sqlite"
+
+
+def make_key(**parts) -> str:
+    """
+    Content address for a request: sha256 over the canonical JSON of its parts.
+    """
+    canonical = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def should_cache(temperature, cache=None) -> bool:
+    """
+    Only deterministic (temperature 0) responses are cached by default: caching a sampled
+    response would replay its first draw on every rerun. cache=True / False overrides this per call.
+    """
+    return bool(cache) if cache is not None else not temperature
+
+
+class ResponseCache:
+    """
+    On-disk LLM response cache backed by SQLite.
+
+    Entries are keyed on a hash of (model, messages, temperature, max_tokens) and evicted
+    by age and by total size (least recently used first). Set enabled=False, or
+    MEDEASE_CACHE_DISABLE=1 in .env, to bypass it.
+    """
+
+    def __init__(self, path=None, max_bytes=None, max_age_seconds=None, enabled=None):
+        self.path = Path(path or os.getenv("MEDEASE_CACHE_PATH", DEFAULT_CACHE_PATH))
+        self.max_bytes = max_bytes if max_bytes is not None else int(float(os.getenv("MEDEASE_CACHE_MAX_MB", "512")) * 1024 ** 2)
+        self.max_age_seconds = max_age_seconds if max_age_seconds is not None else float(os.getenv("MEDEASE_CACHE_MAX_AGE_DAYS", "90")) * 86400
+        self.enabled = enabled if enabled is not None else os.getenv("MEDEASE_CACHE_DISABLE", "0") != "1"
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, response TEXT, size INTEGER, "
+                "created_at REAL, last_access REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+            self._conn.commit()
+        return self._conn
+
+    def lookup(self, key):
+        """
+        Returns the stored value for a key, or None on a miss or an expired entry.
+        """
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.max_age_seconds:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def store(self, key, model, value):
+        if not self.enabled or not value:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, value, len(value.encode("utf-8")), now, now),
+            )
+            conn.commit()
+            self._writes += 1
+            if self._writes % 100 == 1:
+                self._evict(conn)
+
+    def get(self, model, messages, temperature, max_tokens, cache=None):
+        if not should_cache(temperature, cache):
+            return None
+        return self.lookup(make_key(model=model, messages=messages, temperature=temperature, max_tokens=max_tokens))
+
+    def put(self, model, messages, temperature, max_tokens, response, cache=None):
+        if not should_cache(temperature, cache):
+            return
+        self.store(make_key(model=model, messages=messages, temperature=temperature, max_tokens=max_tokens), model, response)
+
+    def _evict(self, conn):
+        conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.max_age_seconds,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_bytes:
+            # drop least recently used entries until we are back under budget
+            excess = total - self.max_bytes
+            dropped = 0
+            for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+                if dropped >= excess:
+                    break
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                dropped += size
+        conn.commit()
+
+    def evict(self):
+        with self._lock:
+            self._evict(self._connect())
+
+    def clear(self):
+        with self._lock:
+            self._connect().execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": total,
+        }
+
+
+_cache = None
+
+
+def get_cache() -> ResponseCache:
+    """
+    Process-wide response cache shared by every LLM call site.
+    """
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
@@ -0,0 +1,152 @@
+import re
+import time
+import asyncio
+from api_transport import chat_payload, get_transport, prompt_cache_key
+from response_cache import get_cache
+from call_metrics import get_sink
+from resilience import DEFAULT_POLICY, CircuitOpenError, get_breaker
+
+
+# a boundary only counts once the next sentence has started arriving, or at a blank line
+SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]?\s+(?=[\"'(\[]?[A-Z0-9])|\n\s*\n")
+ABBREVIATIONS = ("e.g.", "i.e.", "et al.", "vs.", "approx.", "Fig.", "No.", "Dr.", "cf.", "ca.")
+
+
+async def stream_completion(provider, model, messages, temperature=0.0, max_tokens=500, stage=None, cache=None):
+    """
+    Yields the completion for `messages` as content deltas arrive over SSE.
+    A response-cache hit is yielded whole; the finished text is cached like a regular call
+    (temperature 0 only, unless `cache` says otherwise).
+    """
+    start = time.perf_counter()
+    cached = get_cache().get(model, messages, temperature, max_tokens, cache=cache)
+    if cached is not None:
+        get_sink().record(provider, model, stage, time.perf_counter() - start, response_cache_hit=True, streamed=True)
+        yield cached
+        return
+
+    usage, parts, first_token = {}, [], None
+    payload = chat_payload(model, messages, temperature, max_tokens, cache_key=prompt_cache_key(provider, stage))
+    breaker = get_breaker(provider)
+    retries = 0
+    while True:
+        try:
+            if not breaker.allow():
+                raise CircuitOpenError(f"circuit open for {provider}")
+            async for delta in get_transport().stream_chat(provider, payload, usage=usage):
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                parts.append(delta)
+                yield delta
+            breaker.record_success()
+            break
+        except (asyncio.CancelledError, GeneratorExit):
+            breaker.release()
+            raise
+        except Exception as e:
+            if not isinstance(e, CircuitOpenError):
+                breaker.record_failure(e)
+            # only retry before the first delta; afterwards the consumer already has part of the text
+            wait = None if parts else DEFAULT_POLICY.delay(retries, e)
+            if wait is None:
+                get_sink().record(provider, model, stage, time.perf_counter() - start, retries=retries, error=str(e), streamed=True)
+                print(f"[Stream ERROR] {e}")
+                return
+            await asyncio.sleep(wait)
+            retries += 1
+
+    get_sink().record(provider, model, stage, time.perf_counter() - start, usage=usage, retries=retries, streamed=True, ttft_s=first_token)
+    get_cache().put(model, messages, temperature, max_tokens, "".join(parts).strip(), cache=cache)
+
+
+class SentenceBuffer:
+    """
+    Accumulates streamed text and releases it in groups of complete sentences of at
+    least `min_chars`, so the next stage is never fed half a sentence.
+    """
+
+    def __init__(self, min_chars: int = 200):
+        self.min_chars = min_chars
+        self.pending = ""
+        self.ready = ""
+
+    def feed(self, delta: str) -> list:
+        self.pending += delta
+        end = 0
+        for match in SENTENCE_END.finditer(self.pending):
+            if not self.pending[:match.start()].rstrip().endswith(ABBREVIATIONS):
+                end = match.end()
+        if end:
+            self.ready += self.pending[:end]
+            self.pending = self.pending[end:]
+        if self.ready.strip() and len(self.ready) >= self.min_chars:
+            group, self.ready = self.ready.strip(), ""
+            return [group]
+        return []
+
+    def flush(self) -> str:
+        rest = (self.ready + self.pending).strip()
+        self.ready = self.pending = ""
+        return rest
+
+
+async def stream_stages(text: str, stages: list, min_chars: int = 200, whole_input: tuple = ()):
+    """
+    Runs a chain of streaming stages with overlap. `stages` is a list of
+    (name, fn) where fn(text) is an async iterator of deltas. Each stage starts on the
+    first complete sentences of its upstream output instead of waiting for all of it;
+    stages named in `whole_input` (e.g. a formatter that regroups the whole report)
+    wait for the complete upstream text and run on it once.
+
+    Yields {"stage": name, "delta": str} as text arrives and {"stage": name, "text": str}
+    once a stage has finished.
+    """
+    events = asyncio.Queue()
+    inputs = [asyncio.Queue() for _ in stages]
+    await inputs[0].put(text)
+    await inputs[0].put(None)
+
+    async def run_stage(i):
+        name, stream = stages[i]
+        downstream = inputs[i + 1] if i + 1 < len(stages) else None
+        overlap = downstream is not None and stages[i + 1][0] not in whole_input
+        segments = []
+        try:
+            while (segment := await inputs[i].get()) is not None:
+                buffer, parts = SentenceBuffer(min_chars), []
+                if segments:
+                    await events.put({"stage": name, "delta": " "})
+                async for delta in stream(segment):
+                    parts.append(delta)
+                    await events.put({"stage": name, "delta": delta})
+                    if overlap:
+                        for group in buffer.feed(delta):
+                            await downstream.put(group)
+                segments.append("".join(parts).strip())
+                if overlap and (rest := buffer.flush()):
+                    await downstream.put(rest)
+            if downstream is not None and not overlap and (whole := " ".join(s for s in segments if s)):
+                await downstream.put(whole)
+        finally:
+            if downstream is not None:
+                await downstream.put(None)
+            await events.put({"stage": name, "text": " ".join(s for s in segments if s)})
+
+    tasks = [asyncio.create_task(run_stage(i)) for i in range(len(stages))]
+    try:
+        finished = 0
+        while finished < len(stages):
+            event = await events.get()
+            finished += "text" in event
+            yield event
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def collect(events) -> dict:
+    """
+    Drains a simplify_stream() generator into the {stage: text} dict simplify() returns.
+    """
+    return {event["stage"]: event["text"] async for event in events if "text" in event}
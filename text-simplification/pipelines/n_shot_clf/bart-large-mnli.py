@@ -1,12 +1,44 @@
-from transformers import pipeline
+import re
+import sys
+from pathlib import Path
+from collections import OrderedDict
+
+# lexicon for the cheap prefilter in front of the MNLI model
+MEDICAL_TERMS = {
+    "patient", "patients", "participants", "diagnosis", "diagnosed", "treatment", "treated", "therapy",
+    "clinical", "trial", "trials", "randomised", "randomized", "placebo", "dose", "doses", "mg", "symptoms",
+    "disease", "infection", "surgery", "hospital", "admitted", "prescribed", "medication", "chronic",
+    "acute", "adverse", "outcome", "outcomes", "mortality", "blood", "pressure", "pain", "cancer",
+    "tumour", "tumor", "ulcer", "ulcers", "fever", "oxygen", "cardiac", "pulmonary", "renal",
+    "certainty", "meta-analysis", "cohort", "intervention", "healing", "pregnancy", "antibiotics",
+}
+MEDICAL_SUFFIXES = ("itis", "osis", "emia", "aemia", "ectomy", "otomy", "algia", "pathy", "oma", "uria")
+NON_MEDICAL_MARKERS = re.compile(r"```|\bdef |\bimport |\bclass \w+\s*[(:]|\breturn\b|https?://|[{};]\s*$|\bprompt\b", re.M)
+WORD = re.compile(r"[a-z][a-z'-]*")
+SENTENCE = re.compile(r"[^.!?\n]+")
+
 
 class NShotMedicalClassifier:
     """
     Wrapper around a zero-shot classification model to distinguish medical reports from other text.
+
+    is_medical runs as a cascade: a keyword prefilter settles only texts that are unambiguous
+    on both the lexicon and the non-medical markers, and everything else reaches bart-large-mnli.
+    MNLI results are memoized per (text, labels).
     """
 
-    def __init__(self, model_name="facebook/bart-large-mnli", candidate_labels=None):
-        self.classifier = pipeline("zero-shot-classification", model=model_name)
+    def __init__(self, model_name="facebook/bart-large-mnli", candidate_labels=None,
+                 batch_size=8, cache_size=1024, prefilter=True, accept_hits=4, accept_density=0.05,
+                 accept_min_words=40, accept_sentence_share=0.6, backend="torch"):
+        if backend == "onnx":
+            # int8 ONNX Runtime export, shared with the local seq2seq models
+            sys.path.append(str(Path(__file__).resolve().parent.parent / "lm_model_classes"))
+            from onnx_backend import load_zero_shot_pipeline
+            self.classifier = load_zero_shot_pipeline(model_name)
+        else:
+            # imported here so importing the module stays cheap for API-only processes
+            from transformers import pipeline
+            self.classifier = pipeline("zero-shot-classification", model=model_name)
         self.labels = candidate_labels or ["medical report",
                                             "technical documentation",
                                             "news article",
@@ -17,29 +49,106 @@ class NShotMedicalClassifier:
                                             "educational content",
                                             "code or programming request",
                                             "AI prompt engineering"]
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.prefilter = prefilter
+        self.accept_hits = accept_hits
+        self.accept_density = accept_density
+        self.accept_min_words = accept_min_words
+        self.accept_sentence_share = accept_sentence_share
+        self._cache = OrderedDict()
+        self.stats = {"prefilter_accept": 0, "prefilter_reject": 0, "mnli_texts": 0, "cache_hits": 0}
+
+    def _remember(self, key, scores):
+        self._cache[key] = scores
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def classify_many(self, texts: list, labels=None) -> list:
+        """
+        Classify many texts at once. Uncached texts go through the MNLI pipeline in
+        batches of (text, label) pairs; returns one {label: score} dict per text, best first.
+        """
+        used_labels = tuple(labels if labels else self.labels)
+        results = [None] * len(texts)
+        pending = {}
+        for i, text in enumerate(texts):
+            key = (text, used_labels)
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                results[i] = self._cache[key]
+            else:
+                pending.setdefault(text, []).append(i)
+
+        if pending:
+            unique = list(pending)
+            outputs = self.classifier(unique, list(used_labels), batch_size=self.batch_size)
+            if isinstance(outputs, dict):
+                outputs = [outputs]
+            self.stats["mnli_texts"] += len(unique)
+            for text, result in zip(unique, outputs):
+                scores = dict(zip(result["labels"], result["scores"]))
+                self._remember((text, used_labels), scores)
+                for i in pending[text]:
+                    results[i] = scores
+        return results
 
     def classify(self, text: str, labels=None) -> dict:
         """
         Classify a given text into one of the predefined or user-provided labels.
         Returns a dict with label scores.
         """
-        used_labels = labels if labels else self.labels
-        result = self.classifier(text, used_labels)
-        return dict(zip(result["labels"], result["scores"]))
+        return self.classify_many([text], labels)[0]
+
+    def prefilter_decision(self, text: str):
+        """
+        True / False only when both signals agree, None (ask MNLI) otherwise.
+
+        Accepted: no non-medical markers, at least `accept_hits` distinct lexicon terms, a report-sized
+        text (`accept_min_words`) with lexicon terms at `accept_density` per word, spread over at least
+        `accept_sentence_share` of its sentences (and at least two), so a handful of terms appended to
+        other text is not enough.
+        Rejected: non-medical markers (code, URLs, prompt talk) and no lexicon term at all, or no words
+        at all (empty input). The lexicon is small, so its absence alone never rejects a text.
+        """
+        is_term = lambda w: w in MEDICAL_TERMS or (len(w) >= 6 and w.endswith(MEDICAL_SUFFIXES))
+        words = WORD.findall(text.lower())
+        hits = [w for w in words if is_term(w)]
+        if not words:
+            return False
+        markers = NON_MEDICAL_MARKERS.search(text)
+        if markers:
+            return False if not hits else None
+        if len(set(hits)) < self.accept_hits or len(words) < self.accept_min_words:
+            return None
+        sentences = [WORD.findall(s) for s in SENTENCE.findall(text.lower())]
+        sentences = [s for s in sentences if s]
+        with_hits = sum(any(is_term(w) for w in s) for s in sentences)
+        if len(hits) / len(words) >= self.accept_density and with_hits >= max(2, self.accept_sentence_share * len(sentences)):
+            return True
+        return None
+
+    def is_medical_many(self, texts: list) -> list:
+        decisions = [self.prefilter_decision(t) if self.prefilter else None for t in texts]
+        self.stats["prefilter_accept"] += sum(d is True for d in decisions)
+        self.stats["prefilter_reject"] += sum(d is False for d in decisions)
+        ambiguous = [i for i, d in enumerate(decisions) if d is None]
+        for i, scores in zip(ambiguous, self.classify_many([texts[i] for i in ambiguous])):
+            decisions[i] = "medical report" in list(scores)[:3]
+        return decisions
 
     def is_medical(self, text: str) -> bool:
         """
         Check if 'medical report' appears in the top 3 predicted labels.
         """
-        used_labels = self.labels
-        result = self.classifier(text, used_labels)
-        top_labels = result["labels"][:3]
-        return "medical report" in top_labels
+        return self.is_medical_many([text])[0]
 
 
 if __name__ == "__main__":
     clf = NShotMedicalClassifier()
     sample_text = "This class is actually torturing and it is bad for my mental health. It is causing my head ache and my blood pressure is actually going up."
-    
+
     print("Classification Results:\n", clf.classify(sample_text))
     print("\nIs medical report:", clf.is_medical(sample_text))
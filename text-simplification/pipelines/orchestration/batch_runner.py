@@ -0,0 +1,135 @@
+import os
+import glob
+import json
+import time
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class Journal:
+    """
+    Append-only JSONL record of finished (entry, variant) outputs.
+
+    Each record is flushed and fsynced as soon as it is written, so a crash or a killed
+    kernel loses at most the call that was in flight.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.records = {}
+        for record in read_journal(self.path):
+            self.records[(record["index"], record["variant"])] = record["output"]
+        # end a torn last line so the next record does not get appended to it
+        if self.path.exists() and self.path.stat().st_size:
+            with open(self.path, "rb+") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+
+    def completed(self) -> set:
+        return set(self.records)
+
+    def get(self, index, variant):
+        return self.records.get((index, variant))
+
+    def record(self, index, variant, output):
+        line = json.dumps({"index": index, "variant": variant, "output": output, "ts": time.time()}, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.records[(index, variant)] = output
+
+
+def read_journal(path):
+    """
+    Yields journal records, skipping a torn last line left by an interrupted write.
+    """
+    if not Path(path).exists():
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def merge_shards(entries: list, journal_paths, index_key: str = "index") -> list:
+    """
+    Merges one or more journals (paths or glob patterns, e.g. "results/syntactic.*.jsonl")
+    into the entries, giving the same layout as the old hand-merged batch JSON files.
+    """
+    if isinstance(journal_paths, (str, Path)):
+        journal_paths = [journal_paths]
+    outputs = {}
+    for pattern in journal_paths:
+        for path in sorted(glob.glob(str(pattern))):
+            for record in read_journal(path):
+                outputs.setdefault(record["index"], {})[record["variant"]] = record["output"]
+
+    merged = []
+    for position, entry in enumerate(entries):
+        index = entry.get(index_key, position)
+        merged.append({**entry, **outputs.get(index, {})})
+    return merged
+
+
+class JournaledBatchRunner:
+    """
+    Runs variant functions over entries with a thread pool, journaling every finished
+    (entry, variant) pair and skipping pairs that are already in the journal.
+
+    `variants` maps a variant name to a function of the entry, e.g.
+    {"gpt4o_deepseek": lambda e: deepseek.syntactic_simplification(e["gpt4o"])}.
+    Empty outputs (the clients' error fallback) are not journaled, so they are retried
+    on the next run instead of being treated as done.
+    """
+
+    def __init__(self, journal_path, n_jobs: int = 4, index_key: str = "index"):
+        self.journal = Journal(journal_path)
+        self.n_jobs = n_jobs
+        self.index_key = index_key
+
+    def pending(self, entries: list, variants: dict) -> list:
+        done = self.journal.completed()
+        return [
+            (position, name)
+            for position, entry in enumerate(entries)
+            for name in variants
+            if (entry.get(self.index_key, position), name) not in done
+        ]
+
+    def run(self, entries: list, variants: dict) -> list:
+        todo = self.pending(entries, variants)
+        total = len(entries) * len(variants)
+        print(f"{total - len(todo)}/{total} pairs already journaled, running {len(todo)}")
+
+        def run_pair(position, name):
+            entry = entries[position]
+            output = variants[name](entry)
+            if output:
+                self.journal.record(entry.get(self.index_key, position), name, output)
+            return output
+
+        failed = 0
+        with ThreadPoolExecutor(max_workers=self.n_jobs) as pool:
+            futures = {pool.submit(run_pair, position, name): (position, name) for position, name in todo}
+            for future in as_completed(futures):
+                try:
+                    if not future.result():
+                        failed += 1
+                except Exception as e:
+                    failed += 1
+                    print(f"[Batch ERROR] entry {futures[future][0]} / {futures[future][1]}: {e}")
+
+        if failed:
+            print(f"{failed} pairs failed and will be retried on the next run")
+        return self.results(entries)
+
+    def results(self, entries: list) -> list:
+        return merge_shards(entries, self.journal.path, self.index_key)
@@ -0,0 +1,156 @@
+import re
+import asyncio
+from difflib import SequenceMatcher
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+
+NLTK_DATA = Path(__file__).resolve().parents[2] / "preprocessing" / "nltk_data"
+
+# abbreviations common in Cochrane abstracts that must not end a sentence
+ABBREVIATIONS = ("e.g.", "i.e.", "et al.", "vs.", "approx.", "Fig.", "No.", "Dr.", "cf.", "ca.")
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])[\"')\]]?\s+(?=[\"'(\[]?[A-Z0-9])")
+
+
+def split_sentences(text: str) -> list:
+    """
+    Splits text at sentence boundaries with nltk punkt when available (preprocessing/nltk_data),
+    otherwise with a regex that respects decimals and common abbreviations.
+    """
+    try:
+        import nltk
+        if str(NLTK_DATA) not in nltk.data.path:
+            nltk.data.path.append(str(NLTK_DATA))
+        return [s for s in nltk.sent_tokenize(text) if s.strip()]
+    except (ImportError, LookupError):
+        pass
+
+    sentences, start = [], 0
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        candidate = text[start:match.start()].rstrip()
+        if candidate.endswith(ABBREVIATIONS):
+            continue
+        sentences.append(text[start:match.end()].strip())
+        start = match.end()
+    if text[start:].strip():
+        sentences.append(text[start:].strip())
+    return sentences
+
+
+def approx_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def chunk_sentences(sentences: list, max_tokens: int, overlap: int = 0, count_tokens=approx_tokens) -> list:
+    """
+    Packs consecutive sentences into chunks of at most `max_tokens`.
+    Each chunk after the first repeats the last `overlap` sentences of its predecessor
+    as context. A single sentence longer than the budget becomes its own chunk.
+    """
+    sizes = [count_tokens(s) for s in sentences]
+    chunks, current, used = [], [], 0
+    for i, size in enumerate(sizes):
+        if current and used + size > max_tokens:
+            chunks.append(current)
+            current = current[-overlap:] if overlap else []
+            used = sum(sizes[j] for j in current)
+            # overlap never gets to crowd out a new sentence
+            while current and used + size > max_tokens:
+                used -= sizes[current.pop(0)]
+        current.append(i)
+        used += size
+    if current:
+        chunks.append(current)
+    return [" ".join(sentences[i] for i in chunk) for chunk in chunks]
+
+
+def _normalize(sentence: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", sentence.lower()).strip()
+
+
+def reassemble(outputs: list, overlap: int = 0, similarity: float = 0.8) -> str:
+    """
+    Joins chunk outputs in order. With overlap, leading sentences of a chunk output that
+    repeat the tail of the previous output are dropped.
+    """
+    merged = []
+    for output in outputs:
+        sentences = split_sentences(output)
+        if overlap and merged:
+            tail = [_normalize(s) for s in merged[-2 * overlap:]]
+            while sentences and any(
+                SequenceMatcher(None, _normalize(sentences[0]), t).ratio() >= similarity for t in tail
+            ):
+                sentences.pop(0)
+        merged.extend(sentences)
+    return " ".join(merged)
+
+
+class ChunkedModel:
+    """
+    Wraps any model class so each stage sees the whole report in sentence-aligned chunks
+    instead of a truncated prefix. Chunks are simplified in parallel (through the model's
+    *_batch methods when it has them) and reassembled in order.
+    """
+
+    def __init__(self, model, max_tokens: int = 300, overlap: int = 0, max_workers: int = 4):
+        self.model = model
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+        self.max_workers = max_workers
+
+    def _count_tokens(self, text: str) -> int:
+        tokenizer = getattr(self.model, "tokenizer", None)
+        if tokenizer is None:
+            return approx_tokens(text)
+        return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def chunks(self, text: str) -> list:
+        return chunk_sentences(split_sentences(text), self.max_tokens, self.overlap, self._count_tokens)
+
+    def _run_stage(self, method: str, text: str) -> str:
+        chunks = self.chunks(text)
+        if len(chunks) <= 1:
+            return getattr(self.model, method)(text)
+        if hasattr(self.model, f"{method}_batch"):
+            outputs = getattr(self.model, f"{method}_batch")(chunks)
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                outputs = list(pool.map(getattr(self.model, method), chunks))
+        return reassemble(outputs, self.overlap)
+
+    async def _run_stage_async(self, method: str, text: str) -> str:
+        if not hasattr(self.model, f"{method}_async"):
+            return await asyncio.get_running_loop().run_in_executor(None, self._run_stage, method, text)
+        stage = getattr(self.model, f"{method}_async")
+        outputs = await asyncio.gather(*(stage(chunk) for chunk in self.chunks(text)))
+        return reassemble(outputs, self.overlap)
+
+    def lexical_simplification(self, text: str) -> str:
+        return self._run_stage("lexical_simplification", text)
+
+    def syntactic_simplification(self, text: str) -> str:
+        return self._run_stage("syntactic_simplification", text)
+
+    def format_summarization(self, text: str) -> str:
+        return self._run_stage("format_summarization", text)
+
+    async def lexical_simplification_async(self, text: str) -> str:
+        return await self._run_stage_async("lexical_simplification", text)
+
+    async def syntactic_simplification_async(self, text: str) -> str:
+        return await self._run_stage_async("syntactic_simplification", text)
+
+    async def format_summarization_async(self, text: str) -> str:
+        return await self._run_stage_async("format_summarization", text)
+
+    def simplify(self, text: str) -> dict:
+        lex = self.lexical_simplification(text)
+        synt = self.syntactic_simplification(lex)
+        formatted = self.format_summarization(synt)
+        return {
+            "lexical": lex,
+            "syntactic": synt,
+            "formatted": formatted,
+        }
@@ -0,0 +1,205 @@
+import sys
+import time
+import asyncio
+import threading
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "lm_model_classes"))
+from call_metrics import percentile
+
+
+STAGE_METHODS = ("lexical_simplification", "syntactic_simplification", "format_summarization")
+
+
+async def _call_async(model, method, text):
+    if hasattr(model, f"{method}_async"):
+        return await getattr(model, f"{method}_async")(text)
+    return await asyncio.to_thread(getattr(model, method), text)
+
+
+class FailoverModel:
+    """
+    Wraps an API model (e.g. GPT4oAPI) with hedged requests and failover to a second one
+    (e.g. DeepSeekChatAPI).
+
+    When a stage call is still running after the `hedge_percentile` latency of recent
+    primary calls of that stage (a primary that lost to a hedge counts too: with its latency,
+    or with the time until it was cancelled), a duplicate is sent to `fallback` (to `primary`
+    again without one) and the first usable output wins; the other call is cancelled (async) or
+    left to finish in the background (sync). A primary call that fails outright, i.e. returns
+    "" after its retries or hits an open circuit breaker, fails over to `fallback` at once.
+
+    Until `min_samples` latencies of a stage are known, hedging waits `initial_hedge_s`
+    (None: no hedging yet). simplify() stops at the first stage no provider answered instead
+    of passing "" to the next one. `.stats` counts hedges, hedge wins, failovers and failures.
+    """
+
+    def __init__(self, primary, fallback=None, hedge_percentile: float = 95, min_samples: int = 20,
+                 window: int = 200, initial_hedge_s: float = None, max_workers: int = 16):
+        self.primary = primary
+        self.fallback = fallback
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.initial_hedge_s = initial_hedge_s
+        self.max_workers = max_workers
+        self.stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "failovers": 0, "failures": 0}
+        self._latencies = {method: deque(maxlen=window) for method in STAGE_METHODS}
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def __getattr__(self, name):
+        if "primary" not in self.__dict__:
+            raise AttributeError(name)
+        # batch / stream variants of the stages would bypass hedging and failover
+        if any(name.startswith(method) for method in STAGE_METHODS) or name.startswith("simplify"):
+            raise AttributeError(name)
+        return getattr(self.primary, name)
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def hedge_delay(self, method: str):
+        """
+        Seconds to wait on the primary before hedging, from its recent latencies of this stage.
+        """
+        with self._lock:
+            latencies = list(self._latencies[method])
+        if len(latencies) < self.min_samples:
+            return self.initial_hedge_s
+        return percentile(latencies, self.hedge_percentile)
+
+    def _sample(self, method, start):
+        with self._lock:
+            self._latencies[method].append(time.perf_counter() - start)
+
+    def _sample_answered(self, method, future, start):
+        if not future.exception() and future.result():
+            self._sample(method, start)
+
+    def _settle(self, method, role, output, start):
+        if role == "primary":
+            self._sample(method, start)
+        elif role == "hedge":
+            self._count("hedge_wins")
+        return output
+
+    def _backup(self, roles):
+        """
+        Role of the next backup call to launch, or None when none is left.
+        """
+        if "hedge" in roles or "failover" in roles:
+            return None
+        return "failover" if self.fallback is not None else None
+
+    def _failed(self, method):
+        self._count("failures")
+        print(f"[Failover ERROR] {method}: no provider returned an output")
+        return ""
+
+    async def _run_async(self, method: str, text: str) -> str:
+        self._count("calls")
+        start = time.perf_counter()
+        backup_model = self.fallback or self.primary
+        tasks = {asyncio.ensure_future(_call_async(self.primary, method, text)): "primary"}
+        launched = set()
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay(method))
+            if not done:
+                self._count("hedged")
+                launched.add("hedge")
+                tasks[asyncio.ensure_future(_call_async(backup_model, method, text))] = "hedge"
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=FIRST_COMPLETED)
+                for task in done:
+                    role = tasks.pop(task)
+                    output = "" if task.exception() else task.result()
+                    if output:
+                        if "primary" in tasks.values():
+                            # the primary is cancelled below; it would have taken at least this long,
+                            # and leaving it out would let the hedge threshold only ever fall
+                            self._sample(method, start)
+                        return self._settle(method, role, output, start)
+                    if role == "primary" and self._backup(launched):
+                        self._count("failovers")
+                        launched.add("failover")
+                        tasks[asyncio.ensure_future(_call_async(self.fallback, method, text))] = "failover"
+        finally:
+            for task in tasks:
+                task.cancel()
+        return self._failed(method)
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def _run(self, method: str, text: str) -> str:
+        self._count("calls")
+        start = time.perf_counter()
+        pool = self._executor()
+        backup_model = self.fallback or self.primary
+        futures = {pool.submit(getattr(self.primary, method), text): "primary"}
+        launched = set()
+        done, _ = wait(futures, timeout=self.hedge_delay(method))
+        if not done:
+            self._count("hedged")
+            launched.add("hedge")
+            futures[pool.submit(getattr(backup_model, method), text)] = "hedge"
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                role = futures.pop(future)
+                output = "" if future.exception() else future.result()
+                if output:
+                    # a losing call cannot be interrupted; it finishes in the pool and is discarded,
+                    # but a primary that loses to a hedge still adds its latency once it answers
+                    for pending, other in futures.items():
+                        if other == "primary":
+                            pending.add_done_callback(lambda f: self._sample_answered(method, f, start))
+                    return self._settle(method, role, output, start)
+                if role == "primary" and self._backup(launched):
+                    self._count("failovers")
+                    launched.add("failover")
+                    futures[pool.submit(getattr(self.fallback, method), text)] = "failover"
+        return self._failed(method)
+
+    def lexical_simplification(self, text: str) -> str:
+        return self._run("lexical_simplification", text)
+
+    def syntactic_simplification(self, text: str) -> str:
+        return self._run("syntactic_simplification", text)
+
+    def format_summarization(self, text: str) -> str:
+        return self._run("format_summarization", text)
+
+    async def lexical_simplification_async(self, text: str) -> str:
+        return await self._run_async("lexical_simplification", text)
+
+    async def syntactic_simplification_async(self, text: str) -> str:
+        return await self._run_async("syntactic_simplification", text)
+
+    async def format_summarization_async(self, text: str) -> str:
+        return await self._run_async("format_summarization", text)
+
+    def simplify(self, text: str) -> dict:
+        lex = self.lexical_simplification(text)
+        synt = self.syntactic_simplification(lex) if lex else ""
+        formatted = self.format_summarization(synt) if synt else ""
+        return {
+            "lexical": lex,
+            "syntactic": synt,
+            "formatted": formatted,
+        }
+
+    async def simplify_async(self, text: str) -> dict:
+        lex = await self.lexical_simplification_async(text)
+        synt = await self.syntactic_simplification_async(lex) if lex else ""
+        formatted = await self.format_summarization_async(synt) if synt else ""
+        return {
+            "lexical": lex,
+            "syntactic": synt,
+            "formatted": formatted,
+        }
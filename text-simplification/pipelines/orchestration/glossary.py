@@ -0,0 +1,272 @@
+import re
+import json
+import asyncio
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from chunking import split_sentences
+
+
+DEFAULT_GLOSSARY_PATH = Path(__file__).resolve().parents[2] / ".cache" / "medical_glossary.json"
+
+# the term -> plain pairs already used as few-shot examples in GPT4oAPI._lexical_messages
+SEED_TERMS = {
+    "dyspnea": "trouble breathing",
+    "supplemental oxygen": "extra oxygen",
+    "prn": "when needed",
+    "febrile episodes": "fevers",
+    "hypertension": "high blood pressure",
+    "pharmacological intervention": "medicine",
+    "neoplastic changes": "signs of cancer",
+}
+
+JARGON_SUFFIXES = (
+    "itis", "osis", "emia", "aemia", "ectomy", "otomy", "ostomy", "plasty", "algia", "pathy",
+    "oma", "omas", "uria", "penia", "plegia", "trophy", "scopy", "genic", "iasis", "lysis",
+)
+JARGON_ROOTS = (
+    "cardi", "neur", "hepat", "nephr", "gastr", "pulmon", "derm", "haemat", "hemat", "onco",
+    "arthr", "thromb", "enceph", "leuk", "lymph", "myocard", "pharmac", "venous", "arterial",
+)
+
+# Everyday English a lay reader knows. A sentence skips the LLM only when every word outside a
+# glossary match is in here (or is a plain inflection of one): is_jargon alone misses too much
+# corpus vocabulary (ketanserin, vasculitic, randomised, methodological) to decide that.
+COMMON_WORDS = frozenset("""
+a about above after again against all almost also although always am among an and another any anyone anything are
+around as ask at away back bad be because become been before being below best better between big both but by
+call came can cannot care case change child children come could day days did do does doing done down during each
+early easy either else end enough even ever every eye eyes face fact far feel few find first five for found four
+free from full get give go going good got great group had half hand hard has have having he health healthy help
+her here high him his home hospital how however i if in into is it its just keep kind know large last later least
+less let life like likely little live long look lot low made make man many may me mean means medicine men might
+more most much must my need needed needs never new next night no none nor not now number of off often old on once
+one only or other others our out over own part people per person place point put quite rather really right said
+same say see seem seen several she short should show side since six small so some someone something sometimes
+soon still such sure take taken taking team tell ten than that the their them then there these they thing things
+think this those though three through time times to today together too took two under until up upon us use used
+using very want was way we week weeks well were what when where whether which while who whole why will with
+within without woman women work would year years yes yet you your
+able add age ago air answer area arm arms back bed better blood body bone born brain break breath breathe breathing
+cancer cause caused causes chest clear cold common cough daily death die doctor doctors drink drug drugs ear eat
+effect effects family fat feet fever fevers fine foot gave heart heavy hurt ill illness injury kidney kidneys leg
+legs liver lung lungs mind mouth nurse nurses older pain patient patients pill pills pressure problem problems
+safe sick sign signs skin sleep smoke stomach stop sugar test tests treat treated treatment trouble weight well
+whole worse worst wound younger
+""".split())
+PLAIN_SUFFIXES = ("s", "es", "ed", "d", "ing", "ly", "er", "est")
+
+# words, and runs of everything else (numbers, punctuation) so terms never match across them
+WORD = re.compile(r"[A-Za-z][A-Za-z'-]*|[^\sA-Za-z]+")
+
+
+def tokenize(text: str) -> list:
+    return WORD.findall(text)
+
+
+def is_jargon(word: str) -> bool:
+    """
+    Cheap medical-jargon heuristic: clinical suffixes and Greek/Latin organ roots on longer words.
+    """
+    word = word.lower()
+    if len(word) < 6 or not word.isalpha():
+        return False
+    return word.endswith(JARGON_SUFFIXES) or (len(word) >= 7 and word.startswith(JARGON_ROOTS))
+
+
+def is_plain(word: str) -> bool:
+    """
+    True for words a lay reader surely knows: COMMON_WORDS and their regular inflections,
+    numbers and punctuation. Unknown words count as not plain, so the check errs towards the LLM.
+    """
+    if not word[0].isalpha():
+        return True
+    word = word.lower().strip("'")
+    if word in COMMON_WORDS:
+        return True
+    return any(word.endswith(suffix) and word[:-len(suffix)] in COMMON_WORDS for suffix in PLAIN_SUFFIXES)
+
+
+class MedicalGlossary:
+    """
+    Term -> plain-language index over word tokens. Terms live in a trie, so one
+    left-to-right pass finds the longest known term at every position of a sentence.
+    Mappings are seeded from the few-shot pairs and learned from accepted
+    (original, simplified) outputs once they have been seen `min_support` times.
+    """
+
+    def __init__(self, terms: dict = None, min_support: int = 2):
+        self.min_support = min_support
+        self.terms = {}
+        self.trie = {}
+        self.candidates = {}
+        for term, plain in (SEED_TERMS if terms is None else terms).items():
+            self.add(term, plain)
+
+    def add(self, term: str, plain: str):
+        words = [w.lower() for w in tokenize(term)]
+        node = self.trie
+        for word in words:
+            node = node.setdefault(word, {})
+        node[None] = plain
+        self.terms[" ".join(words)] = plain
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __contains__(self, term: str):
+        return " ".join(w.lower() for w in tokenize(term)) in self.terms
+
+    def matches(self, words: list) -> list:
+        """
+        Longest non-overlapping (start, end, plain) matches in a token list.
+        """
+        found, i = [], 0
+        while i < len(words):
+            node, best = self.trie, None
+            for j in range(i, len(words)):
+                node = node.get(words[j].lower())
+                if node is None:
+                    break
+                if None in node:
+                    best = (i, j + 1, node[None])
+            if best:
+                found.append(best)
+                i = best[1]
+            else:
+                i += 1
+        return found
+
+    def replace(self, sentence: str) -> tuple:
+        """
+        Returns (sentence with known terms replaced, words outside the matches that are not
+        confidently plain, see is_plain). Text between matched terms is kept byte for byte.
+        """
+        tokens = list(WORD.finditer(sentence))
+        words = [t.group() for t in tokens]
+        out, last, covered = [], 0, set()
+        for start, end, plain in self.matches(words):
+            out.append(sentence[last:tokens[start].start()])
+            # keep sentence-initial capitals
+            out.append(plain[0].upper() + plain[1:] if start == 0 and words[0][0].isupper() else plain)
+            last = tokens[end - 1].end()
+            covered.update(range(start, end))
+        out.append(sentence[last:])
+        unknown = [w for k, w in enumerate(words) if k not in covered and not is_plain(w)]
+        return "".join(out), unknown
+
+    def learn(self, original: str, simplified: str) -> list:
+        """
+        Aligns an accepted output with its input word by word and counts each jargon span
+        that was rewritten. Returns the terms promoted into the glossary by this pair.
+        """
+        source, target = tokenize(original), tokenize(simplified)
+        matcher = SequenceMatcher(None, [w.lower() for w in source], [w.lower() for w in target], autojunk=False)
+        promoted = []
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag != "replace" or i2 - i1 > 3 or j2 - j1 > 5:
+                continue
+            span = source[i1:i2]
+            if not any(is_jargon(w) for w in span) or not all(w.isalpha() for w in span):
+                continue
+            term = " ".join(w.lower() for w in span)
+            plain = " ".join(w.lower() for w in target[j1:j2])
+            counts = self.candidates.setdefault(term, {})
+            counts[plain] = counts.get(plain, 0) + 1
+            best = max(counts, key=counts.get)
+            if counts[best] >= self.min_support and self.terms.get(term) != best:
+                self.add(term, best)
+                promoted.append(term)
+        return promoted
+
+    def save(self, path=DEFAULT_GLOSSARY_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"terms": self.terms, "candidates": self.candidates}, f, indent=1, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path=DEFAULT_GLOSSARY_PATH, min_support: int = 2):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        glossary = cls(data["terms"], min_support=min_support)
+        glossary.candidates = data.get("candidates", {})
+        return glossary
+
+
+class GlossaryLexicalModel:
+    """
+    Wraps a model so its lexical stage skips the LLM only for sentences that are entirely
+    plain after glossary replacement (every remaining word passes is_plain). Consecutive
+    sentences that still need the model are sent together as one span; the plain ones are
+    rewritten deterministically.
+    Other stages pass straight through to the wrapped model.
+    """
+
+    def __init__(self, model, glossary: MedicalGlossary = None, learn: bool = False):
+        self.model = model
+        self.glossary = glossary or MedicalGlossary()
+        self.learn = learn
+        self.stats = {"sentences": 0, "model_sentences": 0, "model_calls": 0}
+
+    def __getattr__(self, name):
+        if "model" not in self.__dict__:
+            raise AttributeError(name)
+        if name == "lexical_simplification_async" and hasattr(self.model, name):
+            return self._lexical_simplification_async
+        # the wrapped model's own *_batch / *_async lexical methods would bypass the glossary
+        if name.startswith("lexical_simplification"):
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def _plan(self, text: str) -> list:
+        """
+        Replaced sentences grouped into [(needs_model, text)] runs, in order.
+        """
+        runs = []
+        for sentence in split_sentences(text):
+            replaced, unknown = self.glossary.replace(sentence)
+            needs_model = bool(unknown)
+            self.stats["sentences"] += 1
+            self.stats["model_sentences"] += needs_model
+            if runs and runs[-1][0] == needs_model:
+                runs[-1] = (needs_model, runs[-1][1] + " " + replaced)
+            else:
+                runs.append((needs_model, replaced))
+        return runs
+
+    def _finish(self, runs: list, outputs: list) -> str:
+        outputs = iter(outputs)
+        parts = []
+        for needs_model, span in runs:
+            if needs_model:
+                output = next(outputs)
+                if self.learn and output:
+                    self.glossary.learn(span, output)
+                parts.append(output or span)
+            else:
+                parts.append(span)
+        return " ".join(parts)
+
+    def lexical_simplification(self, text: str) -> str:
+        runs = self._plan(text)
+        spans = [span for needs_model, span in runs if needs_model]
+        self.stats["model_calls"] += len(spans)
+        return self._finish(runs, [self.model.lexical_simplification(span) for span in spans])
+
+    async def _lexical_simplification_async(self, text: str) -> str:
+        runs = self._plan(text)
+        spans = [span for needs_model, span in runs if needs_model]
+        self.stats["model_calls"] += len(spans)
+        outputs = await asyncio.gather(*(self.model.lexical_simplification_async(span) for span in spans))
+        return self._finish(runs, outputs)
+
+    def simplify(self, text: str) -> dict:
+        lex = self.lexical_simplification(text)
+        synt = self.model.syntactic_simplification(lex)
+        formatted = self.model.format_summarization(synt)
+        return {
+            "lexical": lex,
+            "syntactic": synt,
+            "formatted": formatted,
+        }
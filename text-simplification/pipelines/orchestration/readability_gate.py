@@ -0,0 +1,255 @@
+import re
+import json
+import asyncio
+import threading
+from pathlib import Path
+from collections import deque
+
+import numpy as np
+
+from glossary import WORD, is_jargon, MedicalGlossary
+
+
+STAGES = ("lexical", "syntactic", "format")
+
+STAGE_METHODS = {
+    "lexical": "lexical_simplification",
+    "syntactic": "syntactic_simplification",
+    "format": "format_summarization",
+}
+
+# a stage is skipped when its input meets every bound listed for it; None disables a bound
+DEFAULT_THRESHOLDS = {
+    "lexical": {"max_jargon_density": 0.02, "max_syllables_per_word": 1.6},
+    "syntactic": {"max_words_per_sentence": 15.0, "max_grade": 8.0},
+    "format": {"max_words": 80, "max_sentences": 5},
+}
+
+# threshold name -> score it bounds
+BOUNDS = {
+    "max_jargon_density": "jargon_density",
+    "max_syllables_per_word": "syllables_per_word",
+    "max_words_per_sentence": "words_per_sentence",
+    "max_grade": "grade",
+    "max_words": "words",
+    "max_sentences": "sentences",
+}
+
+SENTENCE_END = re.compile(r"[.!?]+(?=[\"')\]]?(?:\s|$))")
+VOWEL_GROUP = re.compile(r"[aeiouy]+")
+
+
+def count_syllables(word: str) -> int:
+    """
+    Vowel-group heuristic: one syllable per run of vowels, a silent final "e" dropped, at least one.
+    """
+    word = word.lower()
+    count = len(VOWEL_GROUP.findall(word))
+    if word.endswith("e") and not word.endswith(("le", "ee")) and count > 1:
+        count -= 1
+    return max(1, count)
+
+
+class ReadabilityScorer:
+    """
+    Readability and complexity of a batch of texts as numpy arrays: words, sentences,
+    words per sentence, syllables per word, jargon density (glossary terms and
+    is_jargon words per word) and Flesch-Kincaid grade.
+
+    Word features are computed once per distinct word and kept in a vocabulary, so a
+    corpus costs one regex pass per text plus a few array reductions.
+    """
+
+    def __init__(self, glossary: MedicalGlossary = None):
+        glossary = glossary or MedicalGlossary()
+        self.lexicon = {term for term in glossary.terms if " " not in term}
+        self.vocab = {}
+        self._syllables = []
+        self._jargon = []
+        self._lock = threading.Lock()
+
+    def _word_ids(self, words: list) -> np.ndarray:
+        ids = np.empty(len(words), dtype=np.int64)
+        for i, word in enumerate(words):
+            word = word.lower()
+            index = self.vocab.get(word)
+            if index is None:
+                index = self.vocab[word] = len(self._syllables)
+                self._syllables.append(count_syllables(word))
+                self._jargon.append(word in self.lexicon or is_jargon(word))
+            ids[i] = index
+        return ids
+
+    def score(self, texts: list) -> dict:
+        words, owners = [], []
+        for i, text in enumerate(texts):
+            found = [w for w in WORD.findall(text) if w[0].isalpha()]
+            words.extend(found)
+            owners.append(np.full(len(found), i, dtype=np.int64))
+        with self._lock:
+            ids = self._word_ids(words)
+            word_syllables = np.asarray(self._syllables, dtype=float)[ids]
+            word_jargon = np.asarray(self._jargon, dtype=float)[ids]
+        owner = np.concatenate(owners) if owners else np.empty(0, dtype=np.int64)
+        n = len(texts)
+
+        n_words = np.bincount(owner, minlength=n).astype(float)
+        syllables = np.bincount(owner, weights=word_syllables, minlength=n)
+        jargon = np.bincount(owner, weights=word_jargon, minlength=n)
+        sentences = np.array([max(1, len(SENTENCE_END.findall(text))) for text in texts], dtype=float)
+
+        safe_words = np.maximum(n_words, 1)
+        words_per_sentence = n_words / sentences
+        syllables_per_word = syllables / safe_words
+        return {
+            "words": n_words,
+            "sentences": sentences,
+            "words_per_sentence": words_per_sentence,
+            "syllables_per_word": syllables_per_word,
+            "jargon_density": jargon / safe_words,
+            "grade": 0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59,
+        }
+
+
+class ReadabilityGate:
+    """
+    Decides, per stage, which inputs are already simple enough to pass through unchanged.
+    The last `max_decisions` decisions (stage, skip, scores) are kept in `.decisions`; with
+    `log_path` every decision is also appended to a JSONL file. `stats()` counts all of them.
+    """
+
+    def __init__(self, thresholds: dict = None, glossary: MedicalGlossary = None, log_path=None,
+                 max_decisions: int = 1000):
+        self.thresholds = {stage: dict(bounds) for stage, bounds in DEFAULT_THRESHOLDS.items()}
+        for stage, bounds in (thresholds or {}).items():
+            self.thresholds[stage].update(bounds)
+        self.scorer = ReadabilityScorer(glossary)
+        self.log_path = Path(log_path) if log_path else None
+        self.decisions = deque(maxlen=max_decisions)
+        self.counts = {stage: {"decisions": 0, "skipped": 0} for stage in STAGES}
+
+    def skip_mask(self, stage: str, scores: dict) -> np.ndarray:
+        skip = np.ones(len(scores["words"]), dtype=bool)
+        for name, bound in self.thresholds[stage].items():
+            if bound is not None:
+                skip &= scores[BOUNDS[name]] <= bound
+        # empty input is left to the model (and its error handling)
+        return skip & (scores["words"] > 0)
+
+    def decide(self, stage: str, texts: list) -> list:
+        """
+        One decision dict per text: {"stage", "skip", <scores>}.
+        """
+        scores = self.scorer.score(texts)
+        skip = self.skip_mask(stage, scores)
+        decisions = [
+            {"stage": stage, "skip": bool(skip[i]), **{name: float(values[i]) for name, values in scores.items()}}
+            for i in range(len(texts))
+        ]
+        self.decisions.extend(decisions)
+        self.counts[stage]["decisions"] += len(decisions)
+        self.counts[stage]["skipped"] += sum(d["skip"] for d in decisions)
+        if self.log_path:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(d) + "\n" for d in decisions)
+        return decisions
+
+    def stats(self) -> dict:
+        """
+        Decisions and skips per stage.
+        """
+        return {stage: dict(counts) for stage, counts in self.counts.items()}
+
+
+class GatedModel:
+    """
+    Wraps a model class so each stage first asks a ReadabilityGate whether its input still
+    needs it; skipped stages return their input unchanged without a model call. Stage,
+    `*_async` and `*_batch` methods are gated (batches are scored in one pass and only the
+    remaining texts are sent to the wrapped batch method); everything else passes through.
+    """
+
+    def __init__(self, model, gate: ReadabilityGate = None):
+        self.model = model
+        self.gate = gate or ReadabilityGate()
+
+    def __getattr__(self, name):
+        if "model" not in self.__dict__:
+            raise AttributeError(name)
+        for stage, method in STAGE_METHODS.items():
+            if name.startswith(method) and hasattr(self.model, name):
+                suffix = name[len(method):]
+                if suffix == "_async":
+                    return lambda text, stage=stage: self._run_stage_async(stage, text)
+                if suffix == "_batch":
+                    return lambda texts, *args, stage=stage, **kwargs: self._run_stage_batch(stage, texts, *args, **kwargs)
+        if any(name.startswith(method) for method in STAGE_METHODS.values()) or name.startswith("simplify"):
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def _gate(self, stage: str, text: str, decisions: list = None) -> bool:
+        decision = self.gate.decide(stage, [text])[0]
+        if decisions is not None:
+            decisions.append(decision)
+        return decision["skip"]
+
+    def _run_stage(self, stage: str, text: str, decisions: list = None) -> str:
+        if self._gate(stage, text, decisions):
+            return text
+        return getattr(self.model, STAGE_METHODS[stage])(text)
+
+    async def _run_stage_async(self, stage: str, text: str, decisions: list = None) -> str:
+        if self._gate(stage, text, decisions):
+            return text
+        method = STAGE_METHODS[stage]
+        if hasattr(self.model, f"{method}_async"):
+            return await getattr(self.model, f"{method}_async")(text)
+        return await asyncio.to_thread(getattr(self.model, method), text)
+
+    def _run_stage_batch(self, stage: str, texts: list, *args, **kwargs) -> list:
+        decisions = self.gate.decide(stage, texts)
+        todo = [i for i, d in enumerate(decisions) if not d["skip"]]
+        outputs = list(texts)
+        if todo:
+            batch = getattr(self.model, f"{STAGE_METHODS[stage]}_batch")
+            for i, output in zip(todo, batch([texts[i] for i in todo], *args, **kwargs)):
+                outputs[i] = output
+        return outputs
+
+    def lexical_simplification(self, text: str) -> str:
+        return self._run_stage("lexical", text)
+
+    def syntactic_simplification(self, text: str) -> str:
+        return self._run_stage("syntactic", text)
+
+    def format_summarization(self, text: str) -> str:
+        return self._run_stage("format", text)
+
+    def simplify(self, text: str) -> dict:
+        """
+        simplify() with the gate's decision for each stage under "gate". A stage that returns ""
+        ends the chain: the later stages are "" without reaching the gate or the model.
+        """
+        decisions = []
+        lex = self._run_stage("lexical", text, decisions)
+        synt = self._run_stage("syntactic", lex, decisions) if lex else ""
+        formatted = self._run_stage("format", synt, decisions) if synt else ""
+        return {
+            "lexical": lex,
+            "syntactic": synt,
+            "formatted": formatted,
+            "gate": decisions,
+        }
+
+    async def simplify_async(self, text: str) -> dict:
+        decisions = []
+        lex = await self._run_stage_async("lexical", text, decisions)
+        synt = await self._run_stage_async("syntactic", lex, decisions) if lex else ""
+        formatted = await self._run_stage_async("format", synt, decisions) if synt else ""
+        return {
+            "lexical": lex,
+            "syntactic": synt,
+            "formatted": formatted,
+            "gate": decisions,
+        }
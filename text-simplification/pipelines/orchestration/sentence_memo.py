@@ -0,0 +1,256 @@
+import re
+import sys
+import json
+import asyncio
+import contextvars
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from chunking import split_sentences, approx_tokens
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "lm_model_classes"))
+from response_cache import ResponseCache, DEFAULT_CACHE_PATH, make_key
+from call_metrics import recorded_calls
+
+
+MEMO_STAGES = {
+    "lexical": "lexical_simplification",
+    "syntactic": "syntactic_simplification",
+}
+
+NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'", "–": "-", "—": "-"})
+
+
+def normalize_sentence(sentence: str) -> str:
+    """
+    Exact-repeat form of a sentence: case, quotes, dashes and whitespace folded.
+    """
+    return " ".join(sentence.translate(_QUOTES).lower().split())
+
+
+def number_template(sentence: str) -> tuple:
+    """
+    Near-exact form: every number replaced by a placeholder, e.g.
+    "6.7% (2/30) ..." -> ("<0>% (<1>/<2>) ...", ["6.7", "2", "30"]).
+    """
+    numbers = []
+
+    def placeholder(match):
+        numbers.append(match.group())
+        return f"<{len(numbers) - 1}>"
+
+    return NUMBER.sub(placeholder, normalize_sentence(sentence)), numbers
+
+
+def templated_output(output: str, numbers: list):
+    """
+    The output with the input's numbers turned back into placeholders, or None when
+    that is ambiguous (a number repeated, dropped or spelled out by the model) or when
+    the output has a number of its own, which reuse would copy into other sentences.
+    """
+    if len(set(numbers)) != len(numbers):
+        return None
+    found = list(NUMBER.finditer(output))
+    if sorted(m.group() for m in found) != sorted(numbers):
+        return None
+    parts, last = [], 0
+    for match in found:
+        parts += [output[last:match.start()], f"<{numbers.index(match.group())}>"]
+        last = match.end()
+    return "".join(parts) + output[last:]
+
+
+def _model_id(model) -> str:
+    name = getattr(model, "model_name", None) or getattr(model, "model", None)
+    return f"{type(model).__name__}:{name if isinstance(name, str) else ''}"
+
+
+class SentenceMemoModel:
+    """
+    Wraps a model so the lexical and syntactic stages reuse earlier simplifications of the
+    same sentence across reports. A sentence is reused when it repeats exactly (after
+    normalization) or differs only in its numbers. Each run of consecutive novel sentences
+    goes to the model as one call, so the stage prompt is paid once per run rather than once
+    per sentence; a run's output is memoized sentence by sentence when it splits back into
+    as many sentences. `report()` compares the prompt tokens sent with the unmemoized baseline.
+    """
+
+    def __init__(self, model, cache=None, max_workers: int = 8):
+        self.model = model
+        self.model_id = _model_id(model)
+        self.cache = cache or ResponseCache(path=DEFAULT_CACHE_PATH.with_name("sentence_memo.sqlite"))
+        self.max_workers = max_workers
+        self.stats = {
+            "stage_calls": 0, "sentences": 0, "exact_hits": 0, "template_hits": 0, "novel": 0, "model_calls": 0,
+            "chars_in": 0, "chars_sent": 0, "prompt_tokens": 0, "measured_calls": 0, "overhead_tokens": 0,
+        }
+        self._in_flight = {}
+
+    def __getattr__(self, name):
+        if "model" not in self.__dict__:
+            raise AttributeError(name)
+        # the wrapped model's own batch / async variants of memoized stages would bypass the memo
+        if any(name.startswith(method) for method in MEMO_STAGES.values()):
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def _keys(self, stage, sentence):
+        template, numbers = number_template(sentence)
+        exact = make_key(kind="sentence", model=self.model_id, stage=stage, text=normalize_sentence(sentence))
+        near = make_key(kind="sentence_template", model=self.model_id, stage=stage, text=template)
+        return exact, near, numbers
+
+    def _recall(self, stage, sentence):
+        exact, near, numbers = self._keys(stage, sentence)
+        hit = self.cache.lookup(exact)
+        if hit is not None:
+            self.stats["exact_hits"] += 1
+            return hit
+        hit = self.cache.lookup(near)
+        if hit is not None:
+            self.stats["template_hits"] += 1
+            return re.sub(r"<(\d+)>", lambda m: numbers[int(m.group(1))], json.loads(hit))
+        return None
+
+    def _remember(self, stage, sentence, output):
+        if not output:
+            return
+        exact, near, numbers = self._keys(stage, sentence)
+        self.cache.store(exact, self.model_id, output)
+        template = templated_output(output, numbers)
+        if template is not None:
+            self.cache.store(near, self.model_id, json.dumps(template))
+
+    def _plan(self, stage, text):
+        """
+        Splits a report into sentences, fills the memoized ones and returns
+        (sentences, outputs with None for novel sentences, (start, end) of each novel run).
+        """
+        sentences = split_sentences(text)
+        outputs = [self._recall(stage, s) for s in sentences]
+        runs, start = [], None
+        for i, output in enumerate(outputs + [""]):
+            if output is None and start is None:
+                start = i
+            elif output is not None and start is not None:
+                runs.append((start, i))
+                start = None
+        self.stats["stage_calls"] += 1
+        self.stats["sentences"] += len(sentences)
+        self.stats["novel"] += sum(end - start for start, end in runs)
+        self.stats["model_calls"] += len(runs)
+        self.stats["chars_in"] += len(text)
+        return sentences, outputs, runs
+
+    def _measure(self, texts, records):
+        """
+        Adds the prompt tokens the model reported for `texts` and, from them, the per-call
+        prompt overhead (instructions, few-shot examples) that an unmemoized call pays too.
+        """
+        self.stats["chars_sent"] += sum(len(t) for t in texts)
+        prompt_tokens = sum(r["prompt_tokens"] for r in records)
+        self.stats["prompt_tokens"] += prompt_tokens
+        if prompt_tokens and not any(r["error"] for r in records):
+            self.stats["measured_calls"] += len(texts)
+            self.stats["overhead_tokens"] += max(0, prompt_tokens - sum(approx_tokens(t) for t in texts))
+
+    def _finish(self, stage, sentences, outputs, runs, fresh):
+        pieces, last = [], 0
+        for (start, end), output in zip(runs, fresh):
+            pieces += outputs[last:start] + [output]
+            last = end
+            split = split_sentences(output) if output and end - start > 1 else [output]
+            if len(split) == end - start:
+                for sentence, simplified in zip(sentences[start:end], split):
+                    self._remember(stage, sentence, simplified)
+        return " ".join(pieces + outputs[last:])
+
+    def _run_stage(self, stage: str, text: str) -> str:
+        method = MEMO_STAGES[stage]
+        sentences, outputs, runs = self._plan(stage, text)
+        texts = [" ".join(sentences[start:end]) for start, end in runs]
+        with recorded_calls() as records:
+            if not texts:
+                fresh = []
+            elif hasattr(self.model, f"{method}_batch"):
+                fresh = getattr(self.model, f"{method}_batch")(texts)
+            else:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                    # each call runs in a copy of this context so its metrics reach `records`
+                    calls = [contextvars.copy_context() for _ in texts]
+                    fresh = list(pool.map(lambda ctx, t: ctx.run(getattr(self.model, method), t), calls, texts))
+        self._measure(texts, records)
+        return self._finish(stage, sentences, outputs, runs, fresh)
+
+    async def _simplify_run_async(self, stage, text):
+        # concurrent reports that share a novel run wait on the same call
+        key = (stage, normalize_sentence(text))
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(getattr(self.model, f"{MEMO_STAGES[stage]}_async")(text))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await future
+
+    async def _run_stage_async(self, stage: str, text: str) -> str:
+        if not hasattr(self.model, f"{MEMO_STAGES[stage]}_async"):
+            return await asyncio.to_thread(self._run_stage, stage, text)
+        sentences, outputs, runs = self._plan(stage, text)
+        texts = [" ".join(sentences[start:end]) for start, end in runs]
+        with recorded_calls() as records:
+            fresh = await asyncio.gather(*(self._simplify_run_async(stage, t) for t in texts))
+        self._measure(texts, records)
+        return self._finish(stage, sentences, outputs, runs, fresh)
+
+    def lexical_simplification(self, text: str) -> str:
+        return self._run_stage("lexical", text)
+
+    def syntactic_simplification(self, text: str) -> str:
+        return self._run_stage("syntactic", text)
+
+    async def lexical_simplification_async(self, text: str) -> str:
+        return await self._run_stage_async("lexical", text)
+
+    async def syntactic_simplification_async(self, text: str) -> str:
+        return await self._run_stage_async("syntactic", text)
+
+    def reuse_rate(self) -> float:
+        """
+        Share of sentences answered from the memo instead of the model.
+        """
+        return 1 - self.stats["novel"] / self.stats["sentences"] if self.stats["sentences"] else 0.0
+
+    def baseline_prompt_tokens(self) -> int:
+        """
+        Estimated prompt tokens of the same stage calls without the memo: one call per report
+        and stage with the full text, each paying the measured average prompt overhead.
+        """
+        stats = self.stats
+        overhead = stats["overhead_tokens"] / stats["measured_calls"] if stats["measured_calls"] else 0
+        return round(stats["stage_calls"] * overhead + stats["chars_in"] / 4)
+
+    def report(self) -> dict:
+        """
+        Stats plus the reuse rate and prompt tokens sent (as the model reported them) against
+        the unmemoized baseline; tokens_saved is negative when splitting into runs costs more
+        prompt overhead than the memo skips.
+        """
+        baseline = self.baseline_prompt_tokens()
+        return {
+            **self.stats,
+            "reuse_rate": self.reuse_rate(),
+            "chars_saved": 1 - self.stats["chars_sent"] / self.stats["chars_in"] if self.stats["chars_in"] else 0.0,
+            "baseline_prompt_tokens": baseline,
+            "tokens_saved": 1 - self.stats["prompt_tokens"] / baseline if baseline else 0.0,
+        }
+
+    def simplify(self, text: str) -> dict:
+        lex = self.lexical_simplification(text)
+        synt = self.syntactic_simplification(lex)
+        formatted = self.model.format_summarization(synt)
+        return {
+            "lexical": lex,
+            "syntactic": synt,
+            "formatted": formatted,
+        }
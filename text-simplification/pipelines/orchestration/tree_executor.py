@@ -0,0 +1,179 @@
+import sys
+import asyncio
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "lm_model_classes"))
+from call_metrics import metrics_path
+
+
+LAYERS = ("lexical", "syntactic", "format")
+
+STAGE_METHODS = {
+    "lexical": "lexical_simplification",
+    "syntactic": "syntactic_simplification",
+    "format": "format_summarization",
+}
+
+# short names used in the result files -> model class (imported on first use)
+MODEL_CLASSES = {
+    "gpt4o": ("GPT4oAPI", "GPT4oAPI"),
+    "deepseek": ("DeepSeekChatAPI", "DeepSeekChatAPI"),
+    "t5": ("T5LargeLocal", "T5LargeLocal"),
+    "bart": ("BartLargeCNNLocal", "BartLargeCNNLocal"),
+    "medllama": ("MedLLaMA3GGUF", "MedLLaMA3GGUF"),
+}
+
+
+def path_key(path) -> str:
+    """
+    Result key for a model path, matching the keys the evaluation notebooks write:
+    ("gpt4o",) -> "gpt4o", ("gpt4o", "deepseek") -> "gpt4o_deepseek",
+    ("gpt4o", "deepseek", "gpt4o") -> "gpt4o_formatter_on_gpt4o_deepseek".
+    """
+    if len(path) < 3:
+        return "_".join(path)
+    return f"{path[2]}_formatter_on_{path[0]}_{path[1]}"
+
+
+def load_models(names) -> dict:
+    """
+    Instantiates each named model once so it can be shared across layers.
+    """
+    models = {}
+    for name in names:
+        module_name, class_name = MODEL_CLASSES[name]
+        module = __import__(module_name)
+        models[name] = getattr(module, class_name)()
+    return models
+
+
+class SimplificationTreeExecutor:
+    """
+    Runs the lexical -> syntactic -> formatter fan-out tree for a batch of reports.
+
+    Every model path is scheduled concurrently: a node starts as soon as its parent
+    finishes, and each shared prefix is computed once per report. Models exposing
+    *_async stage methods are awaited directly; sync models run in worker threads,
+    bounded by `concurrency` (default 1, which suits local torch models).
+    """
+
+    def __init__(self, lexical_models: dict, syntactic_models: dict, format_models: dict,
+                 concurrency: dict = None, max_reports_in_flight: int = 32):
+        self.layers = {
+            "lexical": lexical_models,
+            "syntactic": syntactic_models,
+            "format": format_models,
+        }
+        self.concurrency = concurrency or {}
+        self.max_reports_in_flight = max_reports_in_flight
+        self._limits = {}
+
+    @classmethod
+    def from_names(cls, layers: dict, **kwargs):
+        """
+        Builds an executor from a declarative spec such as
+        {"lexical": ["gpt4o", "deepseek"], "syntactic": ["gpt4o", "deepseek", "t5"], "format": ["gpt4o", "bart"]}.
+        """
+        models = load_models({name for names in layers.values() for name in names})
+        return cls(*({name: models[name] for name in layers[layer]} for layer in LAYERS), **kwargs)
+
+    def paths(self):
+        return [
+            (lex, syn, fmt)
+            for lex in self.layers["lexical"]
+            for syn in self.layers["syntactic"]
+            for fmt in self.layers["format"]
+        ]
+
+    def _limit(self, name):
+        if name not in self._limits:
+            self._limits[name] = asyncio.Semaphore(self.concurrency.get(name, 1))
+        return self._limits[name]
+
+    async def _call(self, stage, name, model, text, path):
+        method = STAGE_METHODS[stage]
+        # calls made for this node are attributed to its path in the metrics sink
+        with metrics_path(path_key(path)):
+            if hasattr(model, f"{method}_async"):
+                return await getattr(model, f"{method}_async")(text)
+            async with self._limit(name):
+                return await asyncio.to_thread(getattr(model, method), text)
+
+    def _fail(self, depth, prefix, outputs):
+        if depth == len(LAYERS):
+            return
+        for name in self.layers[LAYERS[depth]]:
+            outputs[path_key(prefix + (name,))] = ""
+            self._fail(depth + 1, prefix + (name,), outputs)
+
+    async def _expand(self, depth, prefix, text, outputs, memo, journal=None, index=None):
+        if depth == len(LAYERS):
+            return
+        stage = LAYERS[depth]
+
+        async def run_child(name, model):
+            path = prefix + (name,)
+            key = path_key(path)
+            output = journal.get(index, key) if journal else None
+            if output is None:
+                # identical (stage, model, input) nodes share one call within a report
+                memo_key = (stage, name, text)
+                if memo_key not in memo:
+                    memo[memo_key] = asyncio.ensure_future(self._call(stage, name, model, text, path))
+                output = await memo[memo_key]
+                if journal and output:
+                    journal.record(index, key, output)
+            outputs[key] = output
+            if output:
+                await self._expand(depth + 1, path, output, outputs, memo, journal, index)
+            else:
+                # a failed stage fails its whole subtree instead of feeding "" to the next layer
+                self._fail(depth + 1, path, outputs)
+
+        await asyncio.gather(*(run_child(name, model) for name, model in self.layers[stage].items()))
+
+    async def run_report(self, text: str, journal=None, index=None) -> dict:
+        """
+        Runs the full tree for one report and returns {path_key: output} for every node;
+        nodes below a stage that returned "" are "" too and never reach their models.
+        With a journal, nodes already recorded for this index are reused instead of recomputed.
+        """
+        outputs = {}
+        await self._expand(0, (), text, outputs, {}, journal, index)
+        return outputs
+
+    async def run(self, entries: list, source_key: str = "source", journal=None, index_key: str = "index") -> list:
+        """
+        Runs the tree over every entry concurrently. Returns the entries extended with
+        one key per node, in input order (same layout as formatter_results.json).
+
+        Pass a batch_runner.Journal to record each node as it finishes and resume an
+        interrupted run without repeating paid calls.
+        """
+        gate = asyncio.Semaphore(self.max_reports_in_flight)
+        self._limits = {}
+
+        async def run_entry(position, entry):
+            async with gate:
+                index = entry.get(index_key, position)
+                return {**entry, **await self.run_report(entry[source_key], journal, index)}
+
+        return await asyncio.gather(*(run_entry(position, entry) for position, entry in enumerate(entries)))
+
+    def run_sync(self, entries: list, source_key: str = "source", journal=None, index_key: str = "index") -> list:
+        """
+        Blocking wrapper for scripts; inside a notebook use `await executor.run(entries)`.
+        """
+        return asyncio.run(self.run(entries, source_key, journal, index_key))
+
+
+if __name__ == "__main__":
+    executor = SimplificationTreeExecutor.from_names({
+        "lexical": ["gpt4o", "deepseek"],
+        "syntactic": ["gpt4o", "deepseek"],
+        "format": ["gpt4o", "deepseek"],
+    })
+    raw_text = "The patient presented with dyspnea and required supplemental oxygen."
+    result = executor.run_sync([{"source": raw_text}])[0]
+    for key in [path_key(path) for path in executor.paths()]:
+        print(key, "->", result[key])
@@ -0,0 +1,129 @@
+import os
+import sys
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "lm_model_classes"))
+from tree_executor import MODEL_CLASSES
+
+
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+# the model instance of this worker process, created by _init_worker
+_worker_model = None
+
+
+def _make_model(name, model_kwargs):
+    module_name, class_name = MODEL_CLASSES[name]
+    return getattr(__import__(module_name), class_name)(**model_kwargs)
+
+
+def _init_worker(name, model_kwargs, threads):
+    global _worker_model
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except (ImportError, RuntimeError):
+        # interop threads can only be set once per process
+        pass
+    # with fork and a preloaded parent this is a registry hit on the inherited weights
+    _worker_model = _make_model(name, model_kwargs)
+
+
+def _run_batch(method, texts):
+    batched = getattr(_worker_model, f"{method}_batch", None)
+    if batched is not None:
+        return batched(texts)
+    return [getattr(_worker_model, method)(text) for text in texts]
+
+
+class LocalWorkerPool:
+    """
+    Runs a local model (T5, BART, ...) in a pool of worker processes, one model per worker,
+    so many short reports use every core instead of one GIL-bound process.
+
+    With the fork start method the model is loaded once in the parent before the workers
+    start and the workers share its weights copy-on-write. Each worker pins torch / OpenMP
+    to `threads_per_worker` threads so workers do not oversubscribe the cores. Reports are
+    dispatched in batches to the model's *_batch methods.
+    """
+
+    def __init__(self, name: str, n_workers: int = None, threads_per_worker: int = None,
+                 batch_size: int = 8, model_kwargs: dict = None, start_method: str = None):
+        cores = os.cpu_count() or 1
+        self.name = name
+        self.n_workers = n_workers or cores
+        self.threads_per_worker = threads_per_worker or max(1, cores // self.n_workers)
+        self.batch_size = batch_size
+        self.model_kwargs = model_kwargs or {}
+        self.start_method = start_method or ("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+        self._pool = None
+
+    def start(self):
+        if self._pool is not None:
+            return self
+        if self.start_method == "fork":
+            # load before forking (no inference yet, so no OpenMP threads exist to break the fork)
+            _make_model(self.name, self.model_kwargs)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.n_workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_worker,
+            initargs=(self.name, self.model_kwargs, self.threads_per_worker),
+        )
+        return self
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def map(self, method: str, texts: list) -> list:
+        """
+        Runs `method` (e.g. "lexical_simplification" or "simplify") over all texts across
+        the workers; results keep the input order.
+        """
+        self.start()
+        # longer reports first so the slowest batches do not start last
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        batches = [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+        futures = [self._pool.submit(_run_batch, method, [texts[i] for i in batch]) for batch in batches]
+        results = [None] * len(texts)
+        for batch, future in zip(batches, futures):
+            for i, output in zip(batch, future.result()):
+                results[i] = output
+        return results
+
+    def lexical_simplification_batch(self, texts: list) -> list:
+        return self.map("lexical_simplification", texts)
+
+    def syntactic_simplification_batch(self, texts: list) -> list:
+        return self.map("syntactic_simplification", texts)
+
+    def format_summarization_batch(self, texts: list) -> list:
+        return self.map("format_summarization", texts)
+
+    def lexical_simplification(self, text: str) -> str:
+        return self.map("lexical_simplification", [text])[0]
+
+    def syntactic_simplification(self, text: str) -> str:
+        return self.map("syntactic_simplification", [text])[0]
+
+    def format_summarization(self, text: str) -> str:
+        return self.map("format_summarization", [text])[0]
+
+    def simplify_batch(self, texts: list) -> list:
+        """
+        Full three-stage simplify per report; each batch runs all stages inside one worker.
+        """
+        return self.map("simplify", texts)
@@ -1,7 +1,13 @@
-from datasets import load_dataset
 import pprint
 import json
 import random
+import argparse
+import itertools
+from pathlib import Path
+
+
+SPLITS = ("train", "test", "validation")
+STORE_COLUMNS = ("source", "target", "split", "index")
 
 def preprocess_dataset(dataset):
     '''
@@ -18,28 +24,128 @@ def preprocess_dataset(dataset):
     
     return dataset
 
-def get_500_pairs(dataset):
-    all_pairs = []
-    for split in ["train", "test", "validation"]:
-        for example in dataset.get(split, []):
+def iter_pairs(dataset, splits=SPLITS):
+    """
+    Streams {"source", "target", "split", "index"} pairs from a DatasetDict or a streaming
+    IterableDatasetDict (load_dataset(..., streaming=True)) without materializing any split.
+    """
+    for split in splits:
+        if split not in dataset:
+            continue
+        for index, example in enumerate(dataset[split]):
             if "source" in example and "target" in example:
-                all_pairs.append({
-                    "source": example["source"],
-                    "target": example["target"]
-                })
+                yield {"source": example["source"], "target": example["target"], "split": split, "index": index}
+
+def reservoir_sample(items, k: int, seed: int = 0) -> list:
+    """
+    Uniform sample of k items from a stream of unknown length in one pass and O(k) memory
+    (Algorithm R). The same stream, k and seed always give the same sample. The sample is
+    shuffled with the same generator, so a prefix of it (the notebooks' [:100]) is itself a
+    uniform sample rather than the earliest train examples.
+    """
+    rng = random.Random(seed)
+    reservoir = []
+    for n, item in enumerate(items):
+        if n < k:
+            reservoir.append(item)
+        else:
+            slot = rng.randint(0, n)
+            if slot < k:
+                reservoir[slot] = item
+    rng.shuffle(reservoir)
+    return reservoir
+
+def write_pairs_store(pairs, path, batch_size: int = 1024) -> int:
+    """
+    Writes pairs to a columnar store, batch_size rows at a time: Parquet for a .parquet path,
+    otherwise an Arrow IPC file that read_pairs_store can memory-map. Returns the row count.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([("source", pa.string()), ("target", pa.string()), ("split", pa.string()), ("index", pa.int64())])
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".parquet":
+        writer = pq.ParquetWriter(str(path), schema)
+        write = writer.write_table
+    else:
+        writer = pa.ipc.new_file(str(path), schema)
+        write = writer.write_batch
+    rows = 0
+    pairs = iter(pairs)
+    try:
+        while True:
+            batch = list(itertools.islice(pairs, batch_size))
+            if not batch:
+                break
+            columns = {name: [pair.get(name) for pair in batch] for name in STORE_COLUMNS}
+            record_batch = pa.RecordBatch.from_pydict(columns, schema=schema)
+            write(pa.Table.from_batches([record_batch]) if path.suffix == ".parquet" else record_batch)
+            rows += len(batch)
+    finally:
+        writer.close()
+    return rows
+
+def read_pairs_store(path, columns=("source", "target")):
+    """
+    pyarrow Table with only `columns` of a store written by write_pairs_store. Arrow IPC files are
+    memory-mapped, so the columns are not copied into RAM until they are touched.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
 
-    sampled_pairs = random.sample(all_pairs, min(500, len(all_pairs)))
-    with open("500_pairs.json", "w", encoding="utf-8") as f:
-        json.dump(sampled_pairs, f, ensure_ascii=False, indent=2)
+    columns = list(columns) if columns else None
+    if Path(path).suffix == ".parquet":
+        return pq.read_table(str(path), columns=columns, memory_map=True)
+    table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+    return table.select(columns) if columns else table
+
+def load_pairs(path, columns=("source", "target")) -> list:
+    """
+    Pairs as a list of dicts, like json.load of 500_pairs.json; reads a .json file or a columnar store.
+    """
+    if Path(path).suffix == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            pairs = json.load(f)
+        return [{name: pair.get(name) for name in columns} for pair in pairs] if columns else pairs
+    return read_pairs_store(path, columns).to_pylist()
+
+def get_500_pairs(dataset, n: int = 500, seed: int = 0, out="500_pairs.json", store=None):
+    """
+    Seeded reservoir sample of n pairs over all splits, written as JSON for the notebooks
+    and, with `store` (.arrow / .parquet), as a columnar store.
+    """
+    sampled_pairs = reservoir_sample(iter_pairs(dataset), n, seed)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump([{"source": pair["source"], "target": pair["target"]} for pair in sampled_pairs],
+                  f, ensure_ascii=False, indent=2)
+    if store:
+        write_pairs_store(sampled_pairs, store)
+    return sampled_pairs
 
 if __name__ == "__main__":
-    dataset = load_dataset("GEM/cochrane-simplification")
-    dataset = preprocess_dataset(dataset)
+    from datasets import load_dataset
+
+    parser = argparse.ArgumentParser(description="Samples Cochrane Simplification pairs into 500_pairs.json and a columnar store.")
+    parser.add_argument("-n", type=int, default=500, help="pairs in the sample")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="500_pairs.json")
+    parser.add_argument("--store", help="also write the sample to this .arrow / .parquet file")
+    parser.add_argument("--full-store", help="write every pair of the corpus to this .arrow / .parquet file instead of sampling")
+    args = parser.parse_args()
+
+    # streaming: examples are read as they are needed, whatever the corpus size
+    dataset = load_dataset("GEM/cochrane-simplification", streaming=True)
     '''
-    dataset now contains "train", "test", "validation" dictionaries.
-    to view an example, run dataset["train"][0]
+    dataset now contains "train", "test", "validation" iterable datasets.
+    to view an example, run next(iter(dataset["train"]))
     '''
-    get_500_pairs(dataset)
+    dataset = preprocess_dataset(dataset)
+    if args.full_store:
+        print(f"{write_pairs_store(iter_pairs(dataset), args.full_store)} pairs written to {args.full_store}")
+    else:
+        get_500_pairs(dataset, n=args.n, seed=args.seed, out=args.out, store=args.store)
 
     # 'source': 'Two trials met the inclusion criteria. One compared 2% ketanserin ointment in polyethylene glycol (PEG) with PEG alone, used twice a day by 40 participants with arterial leg ulcers, for eight weeks or until healing, whichever was sooner. One compared topical application of blood-derived concentrated growth factor (CGF) with standard dressing (polyurethane film or foam); both applied weekly for six weeks by 61 participants with non-healing ulcers (venous, diabetic arterial, neuropathic, traumatic, or vasculitic). Both trials were small, reported results inadequately, and were of low methodological quality. Short follow-up times (six and eight weeks) meant it would be difficult to capture sufficient healing events to allow us to make comparisons between treatments. One trial demonstrated accelerated wound healing in the ketanserin group compared with the control group. In the trial that compared CGF with standard dressings, the number of participants with diabetic arterial ulcers were only reported in the CGF group (9/31), and the number of participants with diabetic arterial ulcers and their data were not reported separately for the standard dressing group. In the CGF group, 66.6% (6/9) of diabetic arterial ulcers showed more than a 50% decrease in ulcer size compared to 6.7% (2/30) of non-healing ulcers treated with standard dressing. We assessed this as very-low certainty evidence due to the small number of studies and arterial ulcer participants, inadequate reporting of methodology and data, and short follow-up period. Only one trial reported side effects (complications), stating that no participant experienced these during follow-up (six weeks, low-certainty evidence). It should also be noted that ketanserin is not licensed in all countries for use in humans. Neither study reported time to ulcer healing, patient satisfaction or quality of life. There is insufficient evidence to determine whether the choice of topical agent or dressing affects the healing of arterial leg ulcers.', 
     # 'target': "We found two small studies that presented data for 49 participants with arterial leg ulcers (search conducted January 2019). The studies also included participants with other kinds of ulcers, and it is not clear what proportion of participants were diabetic. Neither study described the methods fully, both presented limited results for the arterial ulcer participants, and one study did not provide information on the number of participants with an arterial ulcer in the control group. The follow-up periods (six and eight weeks) were too short to measure healing. Therefore, the data that were available were incomplete and cannot be generalised to the greater population of people who suffer from arterial leg ulcers. One study randomised participants to either 2% ketanserin ointment in polyethylene glycol (PEG) or PEG alone, administered twice a day over eight weeks. This study reported increased wound healing in the ketanserin group, when compared with the control group. It should be noted that ketanserin is not licensed for use in humans in all countries. The second study randomised participants to either topically-applied growth factors isolated from the participant's own blood (concentrated growth factors (CGF)), or standard dressing; both applied weekly for six weeks. This study reported that 66.6% of CGF-treated diabetic arterial ulcers showed more than a 50% decrease in ulcer size, compared to 6.7% of non-healing ulcers treated with standard dressing. Only one study mentioned side effects, and reported that no participant experienced side effects during follow-up (six weeks). Neither of the two studies reported time to ulcer healing, patient satisfaction or quality of life measures. There is insufficient evidence to determine whether the choice of topical agent or dressing affects the healing of arterial leg ulcers. We downgraded the overall certainty of the available evidence to 'very low' and 'low', because the studies reported their methods poorly, there were only two studies and few participants with arterial disease, and because the studies were short and reported few results. This made it impossible to determine whether there was any real difference in the number of ulcers healed between the groups.", 'medical_report': 'Two trials met the inclusion criteria. One compared 2% ketanserin ointment in polyethylene glycol (PEG) with PEG alone, used twice a day by 40 participants with arterial leg ulcers, for eight weeks or until healing, whichever was sooner. One compared topical application of blood-derived concentrated growth factor (CGF) with standard dressing (polyurethane film or foam); both applied weekly for six weeks by 61 participants with non-healing ulcers (venous, diabetic arterial, neuropathic, traumatic, or vasculitic). Both trials were small, reported results inadequately, and were of low methodological quality. Short follow-up times (six and eight weeks) meant it would be difficult to capture sufficient healing events to allow us to make comparisons between treatments. One trial demonstrated accelerated wound healing in the ketanserin group compared with the control group. In the trial that compared CGF with standard dressings, the number of participants with diabetic arterial ulcers were only reported in the CGF group (9/31), and the number of participants with diabetic arterial ulcers and their data were not reported separately for the standard dressing group. In the CGF group, 66.6% (6/9) of diabetic arterial ulcers showed more than a 50% decrease in ulcer size compared to 6.7% (2/30) of non-healing ulcers treated with standard dressing. We assessed this as very-low certainty evidence due to the small number of studies and arterial ulcer participants, inadequate reporting of methodology and data, and short follow-up period. Only one trial reported side effects (complications), stating that no participant experienced these during follow-up (six weeks, low-certainty evidence). It should also be noted that ketanserin is not licensed in all countries for use in humans. Neither study reported time to ulcer healing, patient satisfaction or quality of life. There is insufficient evidence to determine whether the choice of topical agent or dressing affects the healing of arterial leg ulcers.', 'simplified_report': "We found two small studies that presented data for 49 participants with arterial leg ulcers (search conducted January 2019). The studies also included participants with other kinds of ulcers, and it is not clear what proportion of participants were diabetic. Neither study described the methods fully, both presented limited results for the arterial ulcer participants, and one study did not provide information on the number of participants with an arterial ulcer in the control group. The follow-up periods (six and eight weeks) were too short to measure healing. Therefore, the data that were available were incomplete and cannot be generalised to the greater population of people who suffer from arterial leg ulcers. One study randomised participants to either 2% ketanserin ointment in polyethylene glycol (PEG) or PEG alone, administered twice a day over eight weeks. This study reported increased wound healing in the ketanserin group, when compared with the control group. It should be noted that ketanserin is not licensed for use in humans in all countries. The second study randomised participants to either topically-applied growth factors isolated from the participant's own blood (concentrated growth factors (CGF)), or standard dressing; both applied weekly for six weeks. This study reported that 66.6% of CGF-treated diabetic arterial ulcers showed more than a 50% decrease in ulcer size, compared to 6.7% of non-healing ulcers treated with standard dressing. Only one study mentioned side effects, and reported that no participant experienced side effects during follow-up (six weeks). Neither of the two studies reported time to ulcer healing, patient satisfaction or quality of life measures. There is insufficient evidence to determine whether the choice of topical agent or dressing affects the healing of arterial leg ulcers. We downgraded the overall certainty of the available evidence to 'very low' and 'low', because the studies reported their methods poorly, there were only two studies and few participants with arterial disease, and because the studies were short and reported few results. This made it impossible to determine whether there was any real difference in the number of ulcers healed between the groups."
@@ -0,0 +1,56 @@
+import sys
+import json
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "pipelines" / "orchestration"))
+from batch_runner import Journal, JournaledBatchRunner, merge_shards, read_journal
+
+
+def write_lines(path, lines):
+    path.write_text("".join(lines), encoding="utf-8")
+
+
+def test_resume_after_a_torn_last_line_skips_finished_pairs(tmp_path):
+    path = tmp_path / "syntactic.jsonl"
+    done = json.dumps({"index": 0, "variant": "a", "output": "done a"})
+    write_lines(path, [done + "\n", '{"index": 1, "variant": "a", "outp'])
+
+    calls = []
+
+    def variant(name):
+        def run(entry):
+            calls.append((entry["index"], name))
+            return f"{name} {entry['index']}"
+        return run
+
+    entries = [{"index": 0}, {"index": 1}]
+    runner = JournaledBatchRunner(path, n_jobs=1)
+    results = runner.run(entries, {"a": variant("a"), "b": variant("b")})
+
+    assert sorted(calls) == [(0, "b"), (1, "a"), (1, "b")]
+    assert results == [{"index": 0, "a": "done a", "b": "b 0"}, {"index": 1, "a": "a 1", "b": "b 1"}]
+    # records written after the torn line survive a reload
+    assert Journal(path).completed() == {(0, "a"), (0, "b"), (1, "a"), (1, "b")}
+    assert len(list(read_journal(path))) == 4
+
+
+def test_empty_outputs_are_retried_on_the_next_run(tmp_path):
+    path = tmp_path / "lexical.jsonl"
+    JournaledBatchRunner(path).run([{"index": 0}], {"a": lambda e: ""})
+    assert JournaledBatchRunner(path).pending([{"index": 0}], {"a": None}) == [(0, "a")]
+
+
+def test_merge_shards_with_overlapping_keys(tmp_path):
+    first, second = Journal(tmp_path / "tree.0.jsonl"), Journal(tmp_path / "tree.1.jsonl")
+    first.record(0, "gpt4o", "first 0")
+    first.record(1, "gpt4o", "first 1")
+    second.record(1, "gpt4o", "second 1")
+    second.record(1, "deepseek", "second 1 deepseek")
+
+    merged = merge_shards([{"index": 0, "source": "s0"}, {"index": 1, "source": "s1"}, {"index": 2, "source": "s2"}],
+                          tmp_path / "tree.*.jsonl")
+    assert merged == [
+        {"index": 0, "source": "s0", "gpt4o": "first 0"},
+        {"index": 1, "source": "s1", "gpt4o": "second 1", "deepseek": "second 1 deepseek"},
+        {"index": 2, "source": "s2"},
+    ]
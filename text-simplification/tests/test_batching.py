@@ -0,0 +1,26 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "pipelines" / "lm_model_classes"))
+from batching import length_buckets
+
+
+def test_buckets_map_back_to_input_order():
+    lengths = [50, 3, 48, 7, 120, 5, 49, 2]
+    batches = length_buckets(lengths, batch_size=3)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    assert all(len(batch) <= 3 for batch in batches)
+    assert [[lengths[i] for i in batch] for batch in batches] == [[2, 3, 5], [7, 48, 49], [50, 120]]
+
+    # outputs computed per batch land back on their input positions
+    outputs = [None] * len(lengths)
+    for batch in batches:
+        for i, output in zip(batch, [f"out{lengths[i]}" for i in batch]):
+            outputs[i] = output
+    assert outputs == [f"out{n}" for n in lengths]
+
+
+def test_padded_token_budget_closes_a_batch_early():
+    batches = length_buckets([10, 10, 10, 40], batch_size=8, max_batch_tokens=60)
+    assert batches == [[0, 1, 2], [3]]
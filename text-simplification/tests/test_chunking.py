@@ -0,0 +1,40 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "pipelines" / "orchestration"))
+from chunking import chunk_sentences, reassemble
+
+
+def count_words(text):
+    return len(text.split())
+
+
+SENTENCES = [
+    "One two three four.",
+    "Five six seven.",
+    "Eight nine ten eleven twelve.",
+    "Thirteen fourteen.",
+    "Fifteen sixteen seventeen.",
+]
+
+
+def test_chunks_respect_the_token_budget():
+    chunks = chunk_sentences(SENTENCES, max_tokens=8, count_tokens=count_words)
+    assert chunks == [
+        "One two three four. Five six seven.",
+        "Eight nine ten eleven twelve. Thirteen fourteen.",
+        "Fifteen sixteen seventeen.",
+    ]
+    assert all(count_words(c) <= 8 for c in chunks)
+
+
+def test_overlap_sentences_stay_out_of_the_reassembled_output():
+    chunks = chunk_sentences(SENTENCES, max_tokens=9, overlap=1, count_tokens=count_words)
+    # every chunk after the first repeats the last sentence of the one before
+    assert chunks == [
+        "One two three four. Five six seven.",
+        "Five six seven. Eight nine ten eleven twelve.",
+        "Eight nine ten eleven twelve. Thirteen fourteen.",
+        "Thirteen fourteen. Fifteen sixteen seventeen.",
+    ]
+    assert reassemble(chunks, overlap=1) == " ".join(SENTENCES)
@@ -0,0 +1,18 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "preprocessing"))
+from data_loader import reservoir_sample
+
+
+def test_same_seed_gives_the_same_sample():
+    items = [{"index": i} for i in range(500)]
+    assert reservoir_sample(iter(items), 50, seed=7) == reservoir_sample(iter(items), 50, seed=7)
+    assert reservoir_sample(iter(items), 50, seed=7) != reservoir_sample(iter(items), 50, seed=8)
+
+
+def test_sample_size_is_min_of_k_and_n():
+    assert len(reservoir_sample(range(500), 50)) == 50
+    assert sorted(reservoir_sample(range(30), 50)) == list(range(30))
+    assert reservoir_sample([], 5) == []
+    assert len(set(reservoir_sample(range(500), 50))) == 50
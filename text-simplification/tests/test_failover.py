@@ -0,0 +1,68 @@
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "pipelines" / "orchestration"))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "pipelines" / "lm_model_classes"))
+from failover import FailoverModel
+from resilience import CircuitOpenError
+
+METHOD = "lexical_simplification"
+
+
+class FakeModel:
+    """
+    Answers `output` after `delay_s`; raises `error` instead when one is given.
+    """
+
+    def __init__(self, output, delay_s=0.0, error=None):
+        self.output = output
+        self.delay_s = delay_s
+        self.error = error
+        self.calls = 0
+
+    def lexical_simplification(self, text):
+        self.calls += 1
+        time.sleep(self.delay_s)
+        if self.error:
+            raise self.error
+        return self.output
+
+
+def test_hedge_threshold_comes_from_recent_primary_latencies():
+    model = FailoverModel(FakeModel("p"), FakeModel("f"), hedge_percentile=50, min_samples=3, initial_hedge_s=5.0)
+    assert model.hedge_delay(METHOD) == 5.0
+    model._latencies[METHOD].extend([0.1, 0.2, 0.3])
+    assert abs(model.hedge_delay(METHOD) - 0.2) < 1e-9
+
+
+def test_primary_that_loses_to_the_hedge_still_counts_towards_the_threshold():
+    primary, fallback = FakeModel("p", delay_s=0.3), FakeModel("f")
+    model = FailoverModel(primary, fallback, min_samples=100, initial_hedge_s=0.05)
+
+    assert model.lexical_simplification("text") == "f"
+    model._executor().shutdown(wait=True)
+    assert list(model._latencies[METHOD]) and min(model._latencies[METHOD]) >= 0.3
+
+    assert asyncio.run(model.lexical_simplification_async("text")) == "f"
+    # the cancelled async primary counts with the time it had run, never less than the hedge delay
+    assert len(model._latencies[METHOD]) == 2 and model._latencies[METHOD][-1] >= 0.05
+    assert model.stats == {"calls": 2, "hedged": 2, "hedge_wins": 2, "failovers": 0, "failures": 0}
+
+
+def test_failed_primary_fails_over_at_once():
+    for primary in (FakeModel(""), FakeModel("p", error=CircuitOpenError("circuit open for openai"))):
+        fallback = FakeModel("f")
+        model = FailoverModel(primary, fallback, initial_hedge_s=5.0)
+        assert model.lexical_simplification("text") == "f"
+        assert asyncio.run(model.lexical_simplification_async("text")) == "f"
+        assert fallback.calls == 2
+        assert model.stats == {"calls": 2, "hedged": 0, "hedge_wins": 0, "failovers": 2, "failures": 0}
+        assert not model._latencies[METHOD]
+
+
+def test_simplify_stops_when_no_provider_answers():
+    model = FailoverModel(FakeModel(""), FakeModel(""))
+    assert model.simplify("text") == {"lexical": "", "syntactic": "", "formatted": ""}
+    assert model.stats["failures"] == 1 and model.stats["calls"] == 1
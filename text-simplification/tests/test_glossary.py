@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "pipelines" / "orchestration"))
+from glossary import MedicalGlossary, GlossaryLexicalModel, is_jargon, is_plain
+
+
+class RecordingModel:
+    def __init__(self):
+        self.calls = []
+
+    def lexical_simplification(self, text):
+        self.calls.append(text)
+        return "SIMPLIFIED"
+
+
+def test_jargon_the_heuristic_misses_still_reaches_the_model():
+    words = ["ketanserin", "polyethylene", "vasculitic", "randomised", "methodological"]
+    assert not any(is_jargon(w) for w in words)
+    assert not any(is_plain(w) for w in words)
+
+    model = RecordingModel()
+    gated = GlossaryLexicalModel(model, MedicalGlossary())
+    text = "Ketanserin ointment in polyethylene glycol was used. Both trials were randomised."
+    assert gated.lexical_simplification(text) == "SIMPLIFIED"
+    assert model.calls == [text]
+
+
+def test_plain_sentences_and_known_terms_skip_the_model():
+    model = RecordingModel()
+    gated = GlossaryLexicalModel(model, MedicalGlossary())
+    output = gated.lexical_simplification("The patient had hypertension. Take your pills when needed.")
+    assert output == "The patient had high blood pressure. Take your pills when needed."
+    assert model.calls == []
+
+
+def test_only_sentences_that_are_not_plain_are_sent():
+    model = RecordingModel()
+    gated = GlossaryLexicalModel(model, MedicalGlossary())
+    output = gated.lexical_simplification("Take your pills daily. The ulcers were vasculitic.")
+    assert output == "Take your pills daily. SIMPLIFIED"
+    assert model.calls == ["The ulcers were vasculitic."]
+    assert gated.stats == {"sentences": 2, "model_sentences": 1, "model_calls": 1}
@@ -0,0 +1,70 @@
+import sys
+import json
+import asyncio
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "evaluation"))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "pipelines" / "lm_model_classes"))
+from judge_runner import JudgeRunner, validate_scores, CRITERIA
+from response_cache import ResponseCache
+
+
+def verdict(score):
+    return {criterion: score for criterion in CRITERIA}
+
+
+def test_validate_scores_keeps_valid_verdicts_and_lists_problems():
+    reply = {
+        "gpt4o": verdict(8),
+        "deepseek": {**verdict(7), "loss_of_information": "high"},
+        "t5": {**verdict(6), "distortion_of_information": 12},
+    }
+    valid, errors = validate_scores(reply, ["gpt4o", "deepseek", "t5", "bart"])
+
+    assert valid == {"gpt4o": verdict(8.0)}
+    assert errors == [
+        "'deepseek' has no numeric 'loss_of_information'",
+        "'t5' distortion_of_information = 12.0 is outside 0–10",
+        "missing scores for pipeline 'bart'",
+    ]
+    assert validate_scores([1, 2], ["gpt4o"]) == ({}, ["the reply is not a JSON object keyed by pipeline name"])
+
+
+class ScriptedJudge(JudgeRunner):
+    """
+    Answers each request with the next scripted reply and keeps the conversations it was sent.
+    """
+
+    def __init__(self, replies, cache):
+        super().__init__(cache=cache)
+        self.replies = list(replies)
+        self.conversations = []
+
+    async def _ask(self, messages):
+        self.conversations.append(list(messages))
+        return self.replies.pop(0)
+
+
+def test_repair_asks_again_only_for_the_pipelines_that_failed(tmp_path):
+    judge = ScriptedJudge([
+        "```json\n" + json.dumps({"gpt4o": verdict(8), "deepseek": {"lexical_simplicity": 9}}) + "\n```",
+        "not json",
+        json.dumps({"deepseek": verdict(6)}),
+    ], cache=ResponseCache(path=tmp_path / "verdicts.sqlite"))
+    outputs = {"gpt4o": "output a", "deepseek": "output b"}
+
+    verdicts, failed = asyncio.run(judge.judge_entry("source", "target", outputs))
+    assert verdicts == {"gpt4o": verdict(8.0), "deepseek": verdict(6.0)}
+    assert failed == []
+    repair = judge.conversations[1][-1]["content"]
+    assert "deepseek" in repair and "gpt4o" not in repair
+
+    # valid verdicts are cached, so a rerun asks nothing
+    rerun = ScriptedJudge([], cache=judge.cache)
+    assert asyncio.run(rerun.judge_entry("source", "target", outputs)) == (verdicts, [])
+
+
+def test_pipelines_without_a_valid_verdict_after_the_repairs_are_reported(tmp_path):
+    judge = ScriptedJudge(["{}", "{}", "{}"], cache=ResponseCache(path=tmp_path / "verdicts.sqlite"))
+    assert asyncio.run(judge.judge_entry("source", "target", {"gpt4o": "output"})) == ({}, ["gpt4o"])
+    assert len(judge.conversations) == judge.max_repairs + 1
@@ -0,0 +1,36 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "evaluation"))
+from metric_engine import MetricEngine
+
+# (source, references, prediction, ROUGE-2, ROUGE-L, SARI); ROUGE from rouge_score's
+# RougeScorer (best reference), SARI from evaluate's sari on the same strings
+PARITY_CASES = [
+    ("About 20% of patients had dyspnea, e.g. shortness of breath, after 2.5 mg doses.",
+     ["About 20% of patients had trouble breathing after 2.5 mg doses."],
+     "About 20% of patients had trouble breathing, e.g. short breath, after doses of 2.5 mg.",
+     0.5925925925925926, 0.7586206896551724, 60.74162030030098),
+    ("Hypertension was managed conservatively without pharmacological intervention.",
+     ["High blood pressure was controlled without medicine.", "Blood pressure was treated without drugs."],
+     "High blood pressure was managed without using medicine.",
+     0.4615384615384615, 0.8, 69.474011826953),
+    ("The patient presented with dyspnea and required supplemental oxygen.",
+     ["The patient had trouble breathing and needed extra oxygen."],
+     "",
+     0.0, 0.0, 43.98148148148148),
+    ("Both trials were small & reported results inadequately (low quality).",
+     ["The two studies were small. They reported results poorly."],
+     "Both studies were small and reported their results poorly - low quality.",
+     1 / 3, 0.6, 65.76210826210826),
+]
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_scores_match_rouge_score_and_evaluate_sari(n_jobs):
+    sources, references, predictions, *expected = zip(*PARITY_CASES)
+    results = MetricEngine(n_jobs=n_jobs, chunk_size=2).score(list(sources), list(references), {"p": list(predictions)})
+    for metric, values in zip(("ROUGE-2", "ROUGE-L", "SARI"), expected):
+        assert results["p"][metric] == pytest.approx(list(values), abs=1e-12)
@@ -0,0 +1,74 @@
+import sys
+import types
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+MODULE_PATH = Path(__file__).resolve().parents[1] / "pipelines" / "n_shot_clf" / "bart-large-mnli.py"
+
+REPORT = (
+    "Two trials with 101 participants compared topical treatment of arterial leg ulcers. "
+    "Patients treated with ketanserin showed faster healing than the placebo group. "
+    "Adverse outcomes such as infection or pain were rare in both trials. "
+    "The certainty of the evidence on mortality and healing was very low, "
+    "so the clinical benefit of the intervention remains uncertain for these patients."
+)
+
+
+class FakeMNLI:
+    """
+    Stands in for the zero-shot pipeline: every text scores highest as `label`.
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self.texts = []
+
+    def __call__(self, texts, labels, batch_size=8):
+        self.texts += texts
+        ranked = [self.label] + [l for l in labels if l != self.label]
+        return [{"labels": ranked, "scores": [1.0 / (i + 1) for i in range(len(ranked))]} for _ in texts]
+
+
+@pytest.fixture
+def make_classifier(monkeypatch):
+    spec = importlib.util.spec_from_file_location("bart_large_mnli", MODULE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    def make(label="medical report"):
+        fake = FakeMNLI(label)
+        # the classifier imports transformers.pipeline on construction; no model is loaded here
+        monkeypatch.setitem(sys.modules, "transformers", types.SimpleNamespace(pipeline=lambda task, model=None: fake))
+        return module.NShotMedicalClassifier(), fake
+    return make
+
+
+def test_texts_where_both_signals_agree_skip_the_model(make_classifier):
+    classifier, fake = make_classifier(label="news article")
+    code = "import os\ndef main():\n    return os.getcwd()\n"
+    assert classifier.prefilter_decision(REPORT) is True
+    assert classifier.prefilter_decision(code) is False
+    assert classifier.is_medical_many([REPORT, code]) == [True, False]
+    assert fake.texts == []
+
+
+def test_texts_where_the_signals_disagree_fall_through_to_the_model(make_classifier):
+    classifier, fake = make_classifier(label="medical report")
+    padded = "patient treatment trial placebo. " + "The river runs under the old stone bridge and the birds sing. " * 5
+    snippet = "prompt: summarise the patient's treatment in one line"
+    plain_report = "Ketanserin ointment sped up closing of leg wounds in a small study of forty adults over eight weeks."
+    texts = [padded, snippet, plain_report]
+
+    assert [classifier.prefilter_decision(t) for t in texts] == [None, None, None]
+    assert classifier.is_medical_many(texts) == [True, True, True]
+    assert fake.texts == texts
+
+
+def test_empty_input_is_rejected_without_the_model(make_classifier):
+    classifier, fake = make_classifier()
+    assert classifier.prefilter_decision("") is False
+    assert classifier.prefilter_decision("  \n 42 ") is False
+    assert classifier.is_medical_many(["", "   "]) == [False, False]
+    assert fake.texts == []
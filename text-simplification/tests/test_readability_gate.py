@@ -0,0 +1,51 @@
+import sys
+import asyncio
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "pipelines" / "orchestration"))
+from readability_gate import ReadabilityGate, GatedModel
+
+REPORT = ("Participants with hypercholesterolaemia randomised to atorvastatin demonstrated statistically "
+          "significant reductions in low-density lipoprotein concentrations compared with placebo.")
+
+
+class FailingLexicalModel:
+    def __init__(self):
+        self.calls = []
+
+    def lexical_simplification(self, text):
+        self.calls.append("lexical")
+        return ""
+
+    def syntactic_simplification(self, text):
+        self.calls.append("syntactic")
+        return text
+
+    def format_summarization(self, text):
+        self.calls.append("format")
+        return text
+
+    async def lexical_simplification_async(self, text):
+        return self.lexical_simplification(text)
+
+
+def test_failed_stage_ends_the_chain():
+    model = FailingLexicalModel()
+    gated = GatedModel(model)
+    expected = {"lexical": "", "syntactic": "", "formatted": ""}
+
+    result = gated.simplify(REPORT)
+    assert {k: result[k] for k in expected} == expected
+    assert [d["stage"] for d in result["gate"]] == ["lexical"]
+
+    result = asyncio.run(gated.simplify_async(REPORT))
+    assert {k: result[k] for k in expected} == expected
+    assert model.calls == ["lexical", "lexical"]
+
+
+def test_decision_window_is_bounded_but_stats_count_everything():
+    gate = ReadabilityGate(max_decisions=3)
+    for _ in range(4):
+        gate.decide("lexical", ["Take your pills.", REPORT])
+    assert len(gate.decisions) == 3
+    assert gate.stats()["lexical"] == {"decisions": 8, "skipped": 4}
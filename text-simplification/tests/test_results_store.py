@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "evaluation"))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "pipelines" / "orchestration"))
+from results_store import ResultsStore, parse_path
+from tree_executor import SimplificationTreeExecutor, path_key
+
+
+def test_parse_path_round_trips_the_tree_executor_keys():
+    layer = {"gpt4o": None, "deepseek": None, "t5": None}
+    executor = SimplificationTreeExecutor(layer, layer, layer)
+    for path in executor.paths():
+        for prefix in (path[:1], path[:2], path):
+            assert parse_path(path_key(prefix)) == prefix
+            assert parse_path("/".join(prefix)) == prefix
+
+    assert parse_path("gpt4o_formatter_on_gpt4o_deepseek") == ("gpt4o", "deepseek", "gpt4o")
+    assert parse_path("source") is None
+    assert parse_path("gpt4o_unknown") is None
+    assert parse_path(("gpt4o", "deepseek", "t5", "bart")) is None
+
+
+def test_store_returns_outputs_under_the_executor_keys(tmp_path):
+    store = ResultsStore(tmp_path / "results.sqlite")
+    store.append_many([(0, "gpt4o", "lex"), (0, ("gpt4o", "deepseek"), "syn"), (0, "gpt4o/deepseek/bart", "fmt")])
+    assert store.get(0, "bart_formatter_on_gpt4o_deepseek") == "fmt"
+    assert store.for_report(0) == {"gpt4o": "lex", "gpt4o_deepseek": "syn", "bart_formatter_on_gpt4o_deepseek": "fmt"}
+    store.close()
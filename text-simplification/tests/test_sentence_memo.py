@@ -0,0 +1,82 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "pipelines" / "orchestration"))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "pipelines" / "lm_model_classes"))
+from sentence_memo import SentenceMemoModel
+from response_cache import ResponseCache
+import call_metrics
+from call_metrics import MetricsSink, get_sink
+
+PROMPT_OVERHEAD = 300
+
+
+class PromptedModel:
+    """
+    Echoes each sentence upper-cased and records a prompt of PROMPT_OVERHEAD tokens plus the text.
+    """
+
+    model_name = "prompted"
+
+    def __init__(self):
+        self.calls = []
+
+    def lexical_simplification(self, text):
+        self.calls.append(text)
+        get_sink().record("fake", self.model_name, "lexical", 0.0,
+                          usage={"prompt_tokens": PROMPT_OVERHEAD + len(text) // 4})
+        return text.upper()
+
+
+def test_novel_sentences_of_a_report_share_one_call(tmp_path, monkeypatch):
+    monkeypatch.setattr(call_metrics, "_sink", MetricsSink())
+    model = PromptedModel()
+    memo = SentenceMemoModel(model, cache=ResponseCache(path=tmp_path / "memo.sqlite"))
+    first = "The trial enrolled adults. Pain fell. Sleep improved."
+    second = "The trial enrolled adults. Nausea was rare. Sleep improved."
+
+    assert memo.lexical_simplification(first) == first.upper()
+    assert memo.lexical_simplification(second) == second.upper()
+    assert model.calls == [first, "Nausea was rare."]
+
+    report = memo.report()
+    assert report["model_calls"] == 2
+    assert report["prompt_tokens"] == sum(PROMPT_OVERHEAD + len(c) // 4 for c in model.calls)
+    assert report["baseline_prompt_tokens"] > report["prompt_tokens"]
+
+
+class PercentModel:
+    """
+    Rewrites "<n> of <m> people improved" as a sentence that may add a figure of its own.
+    """
+
+    model_name = "percent"
+
+    def __init__(self, extra=""):
+        self.extra = extra
+        self.calls = []
+
+    def lexical_simplification(self, text):
+        self.calls.append(text)
+        improved, total = text.split()[0], text.split()[2]
+        return f"{improved} out of {total} people got better{self.extra}."
+
+
+def test_number_template_is_reused_with_the_new_numbers(tmp_path):
+    model = PercentModel()
+    memo = SentenceMemoModel(model, cache=ResponseCache(path=tmp_path / "memo.sqlite"))
+
+    assert memo.lexical_simplification("12 of 30 people improved.") == "12 out of 30 people got better."
+    assert memo.lexical_simplification("7 of 45 people improved.") == "7 out of 45 people got better."
+    assert model.calls == ["12 of 30 people improved."]
+    assert memo.stats["template_hits"] == 1
+
+
+def test_output_numbers_not_in_the_input_are_never_templated(tmp_path):
+    model = PercentModel(extra=" (47%)")
+    memo = SentenceMemoModel(model, cache=ResponseCache(path=tmp_path / "memo.sqlite"))
+
+    memo.lexical_simplification("12 of 30 people improved.")
+    assert memo.lexical_simplification("7 of 45 people improved.") == "7 out of 45 people got better (47%)."
+    assert model.calls == ["12 of 30 people improved.", "7 of 45 people improved."]
+    assert memo.stats["template_hits"] == 0
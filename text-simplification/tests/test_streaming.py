@@ -0,0 +1,48 @@
+import sys
+import asyncio
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "pipelines" / "lm_model_classes"))
+from streaming import SentenceBuffer, stream_stages, collect
+
+
+def test_sentence_buffer_keeps_abbreviations_and_decimals_inside_a_sentence():
+    buffer = SentenceBuffer(min_chars=20)
+    assert buffer.feed("Take 2.5 mg daily, e.g. Aspirin") == []
+    # a boundary only counts once the next sentence has started
+    assert buffer.feed(" was given.") == []
+    assert buffer.feed(" It ended.") == ["Take 2.5 mg daily, e.g. Aspirin was given."]
+    assert buffer.feed(" Then it stopped") == []
+    assert buffer.flush() == "It ended. Then it stopped"
+    assert buffer.flush() == ""
+
+
+def test_sentence_buffer_holds_groups_shorter_than_min_chars():
+    buffer = SentenceBuffer(min_chars=40)
+    assert buffer.feed("Short one. Another") == []
+    assert buffer.feed(" short one. And a third") == []
+    assert buffer.feed(" one. Done") == ["Short one. Another short one. And a third one."]
+    assert buffer.flush() == "Done"
+
+
+def recording_stage(inputs):
+    async def stream(text):
+        inputs.append(text)
+        for word in text.split(" "):
+            yield f"{word} "
+    return stream
+
+
+def test_whole_input_stage_runs_once_on_the_complete_upstream_text():
+    syntactic_inputs, format_inputs = [], []
+    text = "One is here. Two is here. Three is here. Four is here."
+    stages = [
+        ("lexical", recording_stage([])),
+        ("syntactic", recording_stage(syntactic_inputs)),
+        ("formatted", recording_stage(format_inputs)),
+    ]
+    result = asyncio.run(collect(stream_stages(text, stages, min_chars=10, whole_input=("formatted",))))
+
+    assert len(syntactic_inputs) > 1
+    assert format_inputs == [result["syntactic"]]
+    assert result["formatted"] == text
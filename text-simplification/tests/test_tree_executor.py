@@ -0,0 +1,41 @@
+import sys
+import asyncio
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "pipelines" / "orchestration"))
+from tree_executor import SimplificationTreeExecutor
+
+
+class FakeModel:
+    """
+    Tags its input with the stage and model name; `fail` lists stages that return "".
+    """
+
+    def __init__(self, name, fail=()):
+        self.name = name
+        self.fail = fail
+        self.calls = []
+
+    def _run(self, stage, text):
+        self.calls.append((stage, text))
+        return "" if stage in self.fail else f"{text}>{self.name}"
+
+    def lexical_simplification(self, text):
+        return self._run("lexical", text)
+
+    def syntactic_simplification(self, text):
+        return self._run("syntactic", text)
+
+    def format_summarization(self, text):
+        return self._run("format", text)
+
+
+def test_failed_stage_fails_its_subtree_without_calling_children():
+    broken, good = FakeModel("b", fail=("lexical",)), FakeModel("g")
+    executor = SimplificationTreeExecutor({"b": broken, "g": good}, {"g": good}, {"g": good})
+    outputs = asyncio.run(executor.run_report("r"))
+
+    assert outputs["b"] == "" and outputs["b_g"] == "" and outputs["g_formatter_on_b_g"] == ""
+    assert outputs["g_formatter_on_g_g"] == "r>g>g>g"
+    assert broken.calls == [("lexical", "r")]
+    assert all(text != "" for _, text in good.calls)